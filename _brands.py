@@ -0,0 +1,96 @@
+import difflib
+import threading
+from collections import Counter
+from functools import lru_cache
+
+import _jobscope
+from marcas import marcas
+from _text import normalize_text
+
+
+# Alias que no salen de normalizar los nombres de marcas.py
+EXTRA_ALIASES = {
+    "ssang yong": "SsangYong",
+    "mercedes": "Mercedes Benz",
+    "mb": "Mercedes Benz",
+    "lynk": "Lynk & Co",
+    "lynk and co": "Lynk & Co",
+    "great wall": "GWM",
+    "haval": "GWM",
+    "omoda": "Omoda-jaecoo",
+    "jaecoo": "Omoda-jaecoo",
+    "omoda jaecoo": "Omoda-jaecoo",
+    "mg motor": "Mg",
+    "vw": "Volkswagen",
+}
+
+FUZZY_CUTOFF = 0.85
+FUZZY_MIN_LEN = 3
+
+
+def _key(name: str) -> str:
+    # "Mercedes-Benz", "MERCEDES BENZ", " mercedes benz " -> "mercedesbenz"
+    return normalize_text(name).replace(" ", "")
+
+
+def _build_index() -> dict:
+    index = {}
+    for name in marcas:
+        index.setdefault(_key(name), name)
+    for alias, name in EXTRA_ALIASES.items():
+        index.setdefault(_key(alias), name)
+    return index
+
+
+# clave normalizada -> nombre canónico (key de marcas)
+_INDEX = _build_index()
+_KEYS = list(_INDEX)
+
+_lock = threading.Lock()
+
+
+def _counters() -> tuple[Counter, Counter]:
+    # (sin resolver, fuzzy) del job en curso (_jobscope)
+    return _jobscope.current().get("brands", lambda: (Counter(), Counter()))
+
+
+@lru_cache(maxsize=1024)
+def _fuzzy(key: str) -> str | None:
+    if len(key) < FUZZY_MIN_LEN:
+        return None
+    match = difflib.get_close_matches(key, _KEYS, n=1, cutoff=FUZZY_CUTOFF)
+    return _INDEX[match[0]] if match else None
+
+
+def resolve_brand(name) -> str | None:
+    """Nombre canónico de marcas.py para `name` (exacto, normalizado o fuzzy), o None."""
+    if not name:
+        return None
+    if name in marcas:
+        return name
+
+    key = _key(str(name))
+    canon = _INDEX.get(key)
+    if canon is None:
+        canon = _fuzzy(key)
+        unresolved, fuzzy_hits = _counters()
+        with _lock:
+            if canon is None:
+                unresolved[name] += 1
+            else:
+                fuzzy_hits[f"{name} -> {canon}"] += 1
+    return canon
+
+
+def brand_id(name, default=None):
+    canon = resolve_brand(name)
+    return marcas[canon] if canon is not None else default
+
+
+def summary() -> dict:
+    unresolved, fuzzy_hits = _counters()
+    with _lock:
+        return {
+            "brands_unresolved": dict(unresolved),
+            "brands_fuzzy": dict(fuzzy_hits),
+        }
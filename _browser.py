@@ -0,0 +1,252 @@
+import contextvars
+import json
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+import urllib.request
+
+# Si el orquestador levantó un Chromium compartido, el hijo recibe su endpoint CDP acá
+CDP_ENV = "BROWSER_CDP_ENDPOINT"
+# en el runner en proceso cada job trae el suyo (_plugins.run_main); no se toca os.environ
+# porque lo comparten todos los jobs del proceso
+_cdp_var = contextvars.ContextVar("cdp_endpoint", default=None)
+
+STARTUP_TIMEOUT_SEC = 20
+
+CHROMIUM_ARGS = [
+    "--no-first-run",
+    "--no-default-browser-check",
+    "--disable-dev-shm-usage",
+    "--disable-background-networking",
+    "--disable-blink-features=AutomationControlled",
+]
+
+# las pestañas de _pages.PagePool trabajan en segundo plano: que Chromium no las frene
+BACKGROUND_TAB_ARGS = [
+    "--disable-background-timer-throttling",
+    "--disable-backgrounding-occluded-windows",
+    "--disable-renderer-backgrounding",
+]
+
+
+# ===================== LADO SCRAPER =====================
+
+def cdp_endpoint() -> str | None:
+    return _cdp_var.get() or os.getenv(CDP_ENV) or None
+
+
+def _with_background_args(launch_kwargs):
+    args = list(launch_kwargs.get("args") or [])
+    args += [a for a in BACKGROUND_TAB_ARGS if a not in args]
+    return {**launch_kwargs, "args": args}
+
+
+def launch_chromium(pw, **launch_kwargs):
+    """
+    Reemplazo de pw.chromium.launch(...) (sync).
+    Con BROWSER_CDP_ENDPOINT se conecta al Chromium compartido; cada scraper debe
+    trabajar en su propio browser.new_context() y browser.close() solo desconecta.
+    Los args/headless de launch_kwargs solo aplican al fallback local.
+    """
+    endpoint = cdp_endpoint()
+    if endpoint:
+        try:
+            return pw.chromium.connect_over_cdp(endpoint, slow_mo=launch_kwargs.get("slow_mo"))
+        except Exception as e:
+            print(f"[BROWSER][WARN] no se pudo conectar a {endpoint} ({e}); lanzando Chromium local", flush=True)
+    return pw.chromium.launch(**_with_background_args(launch_kwargs))
+
+
+async def launch_chromium_async(pw, **launch_kwargs):
+    """Igual que launch_chromium, para playwright.async_api."""
+    endpoint = cdp_endpoint()
+    if endpoint:
+        try:
+            return await pw.chromium.connect_over_cdp(endpoint, slow_mo=launch_kwargs.get("slow_mo"))
+        except Exception as e:
+            print(f"[BROWSER][WARN] no se pudo conectar a {endpoint} ({e}); lanzando Chromium local", flush=True)
+    return await pw.chromium.launch(**_with_background_args(launch_kwargs))
+
+
+class LazyPage:
+    """
+    Página sync de Playwright que recién lanza Chromium la primera vez que se pide con get().
+    Para scrapers HTTP-first (_http.HttpFirst): si todo sale por HTTP, nunca se abre un navegador.
+    """
+
+    def __init__(self, site: str | None = None, launch: dict | None = None, context: dict | None = None, setup=None):
+        self.site = site
+        self.launch = launch or {}
+        self.context = context or {}
+        self.setup = setup
+        self._pw = None
+        self._browser = None
+        self._ctx = None
+        self._page = None
+
+    @property
+    def started(self) -> bool:
+        return self._page is not None
+
+    def get(self):
+        if self._page is None:
+            from playwright.sync_api import sync_playwright
+            from _network import block_resources
+
+            self._pw = sync_playwright().start()
+            self._browser = launch_chromium(self._pw, **self.launch)
+            self._ctx = self._browser.new_context(**self.context)
+            if self.site:
+                block_resources(self._ctx, self.site)
+            self._page = self._ctx.new_page()
+            if self.setup:
+                self.setup(self._page)
+        return self._page
+
+    def close(self):
+        for obj in (self._ctx, self._browser):
+            if obj is not None:
+                try:
+                    obj.close()
+                except Exception:
+                    pass
+        if self._pw is not None:
+            self._pw.stop()
+        self._pw = self._browser = self._ctx = self._page = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ===================== LADO ORQUESTADOR =====================
+
+def chromium_executable() -> str:
+    path = os.getenv("CHROMIUM_PATH")
+    if path:
+        return path
+    from playwright.sync_api import sync_playwright
+
+    pw = sync_playwright().start()
+    try:
+        return pw.chromium.executable_path
+    finally:
+        pw.stop()
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class BrowserServer:
+    """Un proceso Chromium con --remote-debugging-port, vivo durante toda la corrida."""
+
+    def __init__(self, executable: str, headless: bool = True):
+        self.executable = executable
+        self.headless = headless
+        self.port = None
+        self.proc = None
+        self._profile = None
+
+    @property
+    def endpoint(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def alive(self) -> bool:
+        return self.proc is not None and self.proc.poll() is None
+
+    def start(self):
+        self.port = _free_port()
+        self._profile = tempfile.mkdtemp(prefix="cdp-profile-")
+        cmd = [
+            self.executable,
+            f"--remote-debugging-port={self.port}",
+            "--remote-debugging-address=127.0.0.1",
+            f"--user-data-dir={self._profile}",
+            *CHROMIUM_ARGS,
+            *BACKGROUND_TAB_ARGS,
+        ]
+        if self.headless:
+            cmd.append("--headless=new")
+        cmd.append("about:blank")
+
+        self.proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+
+        deadline = time.time() + STARTUP_TIMEOUT_SEC
+        while time.time() < deadline:
+            if not self.alive():
+                break
+            try:
+                with urllib.request.urlopen(f"{self.endpoint}/json/version", timeout=1) as r:
+                    json.load(r)
+                return self
+            except Exception:
+                time.sleep(0.2)
+
+        self.stop()
+        raise RuntimeError(f"Chromium no respondió en el puerto {self.port}")
+
+    def stop(self):
+        if self.proc is not None and self.proc.poll() is None:
+            self.proc.terminate()
+            try:
+                self.proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+                self.proc.wait()
+        self.proc = None
+        if self._profile:
+            shutil.rmtree(self._profile, ignore_errors=True)
+            self._profile = None
+
+
+class BrowserPool:
+    """
+    N Chromium compartidos; cada job recibe uno por round-robin.
+    Si un proceso murió (crash/OOM) se relanza al pedir su endpoint.
+    """
+
+    def __init__(self, size: int = 1, headless: bool = True):
+        self.size = max(1, size)
+        self.headless = headless
+        self.servers = []
+        self.restarts = 0
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def start(self):
+        exe = chromium_executable()
+        self.servers = [BrowserServer(exe, self.headless).start() for _ in range(self.size)]
+        return self
+
+    def endpoint(self) -> str:
+        with self._lock:
+            server = self.servers[self._next % self.size]
+            self._next += 1
+            if not server.alive():
+                server.stop()
+                server.start()
+                self.restarts += 1
+            return server.endpoint
+
+    def close(self):
+        for s in self.servers:
+            s.stop()
+        self.servers = []
+
+    def summary(self) -> dict:
+        return {"browser_pool_size": self.size, "browser_restarts": self.restarts}
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,207 @@
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+
+import _jobscope
+
+# CAPTURE_DUMP=state/captures guarda cada respuesta capturada (para escribir extractores nuevos)
+DUMP_DIR = os.getenv("CAPTURE_DUMP") or None
+MAX_BODY_BYTES = 5 * 1024 * 1024
+
+_JSON_TYPES = ("application/json", "text/json", "+json", "text/javascript", "application/javascript")
+_stats_lock = threading.Lock()
+
+
+def _stats(scope=None) -> dict:
+    # contadores del job (_jobscope); las respuestas llegan por callback, fuera del contexto del job
+    return (scope or _jobscope.current()).get("capture", lambda: {"api_responses": 0, "api_rows": 0, "dom_fallbacks": 0})
+
+
+class Captured:
+    __slots__ = ("url", "status", "resource_type", "content_type", "data", "text", "ts")
+
+    def __init__(self, url, status, resource_type, content_type, data=None, text=None):
+        self.url = url
+        self.status = status
+        self.resource_type = resource_type
+        self.content_type = content_type
+        self.data = data    # JSON ya parseado (None si no era JSON)
+        self.text = text    # cuerpo crudo (solo documentos / texto)
+        self.ts = time.time()
+
+
+class ResponseCapture:
+    """
+    Escucha page.on("response") y se queda con las respuestas cuya URL calza con `patterns`
+    (regex), leyendo el cuerpo en el momento: después de navegar Chromium ya no lo entrega.
+
+        cap = ResponseCapture(brand="kia", patterns=[r"kia\\.cl/modelos/"], types={"document"})
+        await cap.attach_async(page)
+        await page.goto(url)
+        await cap.settle()
+        for r in cap.matching(r"/modelos/"): ...
+
+    clear() entre páginas para que cada extracción vea solo lo de su página.
+    Por defecto solo mira xhr/fetch; `types` agrega otros (ej. "document" para JSON embebido).
+    """
+
+    def __init__(self, brand: str, patterns, types=("xhr", "fetch")):
+        self.brand = brand
+        self.patterns = [re.compile(p) for p in patterns]
+        self.types = set(types)
+        self.records: list[Captured] = []
+        self._lock = threading.Lock()
+        self._tasks = set()
+        self._scope = _jobscope.current()
+
+    # ---------- filtro / lectura ----------
+
+    def _wanted(self, response) -> bool:
+        try:
+            if response.status < 200 or response.status >= 300:
+                return False
+            if response.request.resource_type not in self.types:
+                return False
+        except Exception:
+            return False
+        return any(p.search(response.url) for p in self.patterns)
+
+    def _store(self, response, body: bytes):
+        ctype = (response.headers.get("content-type") or "").lower()
+        data, text = None, None
+        raw = body.decode("utf-8", "replace")
+        if any(t in ctype for t in _JSON_TYPES) or raw.lstrip()[:1] in ("{", "["):
+            try:
+                data = json.loads(raw)
+            except ValueError:
+                text = raw
+        else:
+            text = raw
+        rec = Captured(response.url, response.status, response.request.resource_type, ctype, data, text)
+        with self._lock:
+            self.records.append(rec)
+        with _stats_lock:
+            _stats(self._scope)["api_responses"] += 1
+        if DUMP_DIR:
+            _dump(self.brand, rec)
+
+    def _on_response_sync(self, response):
+        if not self._wanted(response):
+            return
+        try:
+            body = response.body()
+        except Exception:
+            return  # la página navegó o el cuerpo no está disponible
+        if len(body) <= MAX_BODY_BYTES:
+            self._store(response, body)
+
+    async def _read_async(self, response):
+        try:
+            body = await response.body()
+        except Exception:
+            return
+        if len(body) <= MAX_BODY_BYTES:
+            self._store(response, body)
+
+    def _on_response_async(self, response):
+        if not self._wanted(response):
+            return
+        task = asyncio.get_running_loop().create_task(self._read_async(response))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    # ---------- API ----------
+
+    def attach(self, page):
+        """playwright.sync_api: el cuerpo se lee dentro del handler."""
+        page.on("response", self._on_response_sync)
+        return self
+
+    async def attach_async(self, page):
+        """playwright.async_api: el cuerpo se lee en una task; settle() espera las pendientes."""
+        page.on("response", self._on_response_async)
+        return self
+
+    async def settle(self, timeout: float = 5.0):
+        if self._tasks:
+            await asyncio.wait(list(self._tasks), timeout=timeout)
+
+    def clear(self):
+        with self._lock:
+            self.records = []
+
+    def matching(self, pattern: str | None = None) -> list[Captured]:
+        rx = re.compile(pattern) if pattern else None
+        with self._lock:
+            return [r for r in self.records if rx is None or rx.search(r.url)]
+
+    def payloads(self, pattern: str | None = None) -> list:
+        return [r.data for r in self.matching(pattern) if r.data is not None]
+
+
+# ===================== EXTRACCIÓN =====================
+
+def find_records(obj, required, any_of=(), max_depth: int = 12):
+    """
+    Recorre un JSON y devuelve los dicts que tienen todas las claves `required` y al menos
+    una de `any_of` (comparación sin mayúsculas). Sirve para ubicar el array de versiones /
+    precios sin depender de la ruta exacta dentro de la respuesta.
+    """
+    required = [k.lower() for k in required]
+    any_of = [k.lower() for k in any_of]
+    out, stack = [], [(obj, 0)]
+    while stack:
+        node, depth = stack.pop()
+        if depth > max_depth:
+            continue
+        if isinstance(node, dict):
+            keys = {k.lower() for k in node}
+            if all(k in keys for k in required) and (not any_of or any(k in keys for k in any_of)):
+                out.append(node)
+            stack.extend((v, depth + 1) for v in node.values() if isinstance(v, (dict, list)))
+        elif isinstance(node, list):
+            stack.extend((v, depth + 1) for v in reversed(node) if isinstance(v, (dict, list)))
+    return out
+
+
+def get_ci(d: dict, *keys):
+    """Primer valor no vacío entre `keys`, sin distinguir mayúsculas."""
+    lower = {k.lower(): v for k, v in d.items()}
+    for k in keys:
+        v = lower.get(k.lower())
+        if v not in (None, ""):
+            return v
+    return None
+
+
+def count_rows(n: int, fallback: bool = False):
+    """El scraper avisa cuántas filas salieron de la API, o que tuvo que caer al DOM."""
+    with _stats_lock:
+        stats = _stats()
+        if fallback:
+            stats["dom_fallbacks"] += 1
+        else:
+            stats["api_rows"] += n
+
+
+def summary() -> dict:
+    with _stats_lock:
+        stats = _stats()
+        return dict(stats) if stats["api_responses"] or stats["dom_fallbacks"] else {}
+
+
+def _dump(brand: str, rec: Captured):
+    try:
+        d = Path(DUMP_DIR) / brand
+        d.mkdir(parents=True, exist_ok=True)
+        name = re.sub(r"[^A-Za-z0-9]+", "_", rec.url.split("://", 1)[-1])[:120]
+        path = d / f"{int(rec.ts * 1000)}_{name}.json"
+        body = {"url": rec.url, "status": rec.status, "type": rec.resource_type,
+                "data": rec.data, "text": rec.text if rec.data is None else None}
+        path.write_text(json.dumps(body, ensure_ascii=False, indent=1), encoding="utf-8")
+    except Exception as e:
+        print(f"[CAPTURE][WARN] no pude guardar {rec.url}: {e}", flush=True)
@@ -0,0 +1,111 @@
+import json
+import os
+import threading
+import time
+from datetime import date
+from pathlib import Path
+
+CHECKPOINT_DIR = Path("state/checkpoints")
+# checkpoints de corridas que fallaron y nadie retomó: se borran pasadas N horas sin escribirse
+MAX_AGE_HOURS = float(os.getenv("CHECKPOINT_MAX_AGE_HOURS", "48"))
+
+
+def checkpoint_key() -> str:
+    # run_jobs.py pasa la misma clave a todos los intentos de un job; a mano, vale el día
+    return os.getenv("CHECKPOINT_KEY") or date.today().isoformat()
+
+
+class Checkpoint:
+    """
+    Progreso de una marca dentro de una corrida: unidades (ej. modelos) ya terminadas
+    y sus filas extraídas, en state/checkpoints/{brand}_{key}.jsonl (una línea por unidad).
+
+    Un reintento crea el mismo Checkpoint, salta lo que done() y recupera las filas con rows().
+    clear() al terminar bien: la próxima corrida parte de cero. Lo que quede de corridas
+    fallidas se borra solo al crear cualquier Checkpoint, pasadas MAX_AGE_HOURS sin escribirse.
+    """
+
+    def __init__(self, brand: str, key: str | None = None, directory=CHECKPOINT_DIR, enabled: bool | None = None):
+        self.brand = brand
+        self.key = key or checkpoint_key()
+        self.path = Path(directory) / f"{brand}_{self.key}.jsonl"
+        self.enabled = enabled if enabled is not None else os.getenv("CHECKPOINT", "on").lower() != "off"
+        self._lock = threading.Lock()
+        self._units = {}
+        if self.enabled:
+            prune(directory)
+            self._load()
+        self.resumed = len(self._units)
+        if self.resumed:
+            print(f"[CHECKPOINT] {brand}: retomando, {len(self._units)} unidad(es) ya hechas ({self.path})", flush=True)
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        with self.path.open("r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    # última línea a medio escribir si el proceso murió justo ahí
+                    continue
+                self._units[rec["unit"]] = rec.get("rows") or []
+
+    def done(self, unit: str) -> bool:
+        return self.enabled and unit in self._units
+
+    def rows(self, unit: str) -> list:
+        return list(self._units.get(unit, []))
+
+    def all_rows(self) -> list:
+        with self._lock:
+            return [r for rows in self._units.values() for r in rows]
+
+    def completed(self) -> list:
+        with self._lock:
+            return list(self._units)
+
+    def mark_done(self, unit: str, rows: list | None = None):
+        """Registra la unidad como terminada (llamar recién cuando sus filas ya se guardaron)."""
+        if not self.enabled:
+            return
+        rec = {"unit": unit, "ts": int(time.time()), "rows": rows or []}
+        line = json.dumps(rec, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self._units[unit] = rec["rows"]
+
+    def clear(self):
+        with self._lock:
+            self._units = {}
+            if self.path.exists():
+                self.path.unlink()
+
+    def summary(self) -> dict:
+        return {"checkpoint_resumed": self.resumed}
+
+
+def prune(directory=CHECKPOINT_DIR, max_age_hours: float = MAX_AGE_HOURS) -> list[Path]:
+    """Borra los checkpoints sin escribir hace más de max_age_hours (0 = no borrar)."""
+    directory = Path(directory)
+    if max_age_hours <= 0 or not directory.exists():
+        return []
+    cutoff = time.time() - max_age_hours * 3600
+    removed = []
+    for p in directory.glob("*.jsonl"):
+        try:
+            if p.stat().st_mtime < cutoff:
+                p.unlink()
+                removed.append(p)
+        except OSError:
+            pass  # otro proceso lo borró / lo está usando
+    if removed:
+        print(f"[CHECKPOINT] {len(removed)} checkpoint(s) de más de {max_age_hours:g} h borrados", flush=True)
+    return removed
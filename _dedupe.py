@@ -0,0 +1,169 @@
+import atexit
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+import _jobscope
+
+# lock entre procesos para LocalIndexFile.save(); no existe en Windows
+try:
+    import fcntl
+    HAS_FCNTL = True
+except Exception:
+    HAS_FCNTL = False
+
+
+def version_key(marca, model, model_detail) -> str:
+    """Id estable de una versión (sirve como document id del índice)."""
+    raw = json.dumps([marca, model, model_detail], ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _as_list(v) -> list:
+    # algunos scrapers mandan un solo precio / tipo suelto (int o str) en vez de lista
+    if v is None:
+        return []
+    if isinstance(v, (list, tuple)):
+        return list(v)
+    return [v]
+
+
+def fingerprint(marca, model, model_detail, tiposprecio, precio) -> str:
+    """Huella del contenido que importa de una fila de "modelos"."""
+    raw = json.dumps(
+        [marca, model, model_detail, _as_list(tiposprecio), _as_list(precio)],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class FingerprintIndex:
+    """
+    Última huella conocida por versión, cargada una vez por marca con `loader(marca)`,
+    que devuelve {version_key: fingerprint}.
+    """
+
+    def __init__(self, loader):
+        self.loader = loader
+        self._by_marca = {}
+        self._lock = threading.Lock()
+
+    @property
+    def stats(self) -> dict:
+        # contadores del job en curso (_jobscope); las huellas cargadas son del proceso
+        return _jobscope.current().get(self, lambda: {"unchanged": 0, "changed": 0})
+
+    def is_unchanged(self, marca: str, key: str, fp: str) -> bool:
+        with self._lock:
+            known = self._by_marca.get(marca)
+            if known is None:
+                known = dict(self.loader(marca))
+                self._by_marca[marca] = known
+
+            if known.get(key) == fp:
+                self.stats["unchanged"] += 1
+                return True
+
+            self.stats["changed"] += 1
+            return False
+
+    def remember(self, marca: str, key: str, fp: str):
+        with self._lock:
+            self._by_marca.setdefault(marca, {})[key] = fp
+
+    def summary(self) -> dict:
+        return {
+            "dedupe_unchanged": self.stats["unchanged"],
+            "dedupe_changed": self.stats["changed"],
+        }
+
+
+class LocalIndexFile:
+    """
+    Índice local en JSON: {marca: {version_key: {fingerprint, doc_id, last_seen, seen_count}}}.
+    Se guarda al salir del proceso. Varios procesos comparten el archivo: save() relee y mezcla
+    bajo un lock (state/....json.lock) solo lo que cambió este proceso, así el último en salir
+    no pisa lo que guardaron los otros.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._data = None
+        self._changes = {}  # marca -> key -> {fingerprint, doc_id?, last_seen, seen}
+        atexit.register(self.save)
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _ensure(self):
+        if self._data is None:
+            self._data = self._read()
+
+    def load(self, marca: str) -> dict:
+        with self._lock:
+            self._ensure()
+            return {k: v.get("fingerprint") for k, v in self._data.get(marca, {}).items()}
+
+    def record(self, marca: str, key: str, fp: str, ts: int, doc_id: str | None = None):
+        with self._lock:
+            self._ensure()
+            entry = self._data.setdefault(marca, {}).setdefault(key, {"seen_count": 0})
+            if doc_id is not None:
+                entry["doc_id"] = doc_id
+            entry["fingerprint"] = fp
+            entry["last_seen"] = ts
+            entry["seen_count"] = entry.get("seen_count", 0) + 1
+
+            change = self._changes.setdefault(marca, {}).setdefault(key, {"seen": 0})
+            if doc_id is not None:
+                change["doc_id"] = doc_id
+            change["fingerprint"] = fp
+            change["last_seen"] = ts
+            change["seen"] += 1
+
+    def save(self):
+        with self._lock:
+            if not self._changes:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with _file_lock(self.path.with_suffix(self.path.suffix + ".lock")):
+                data = self._read()
+                for marca, entries in self._changes.items():
+                    by_key = data.setdefault(marca, {})
+                    for key, change in entries.items():
+                        entry = by_key.setdefault(key, {"seen_count": 0})
+                        entry["seen_count"] = entry.get("seen_count", 0) + change["seen"]
+                        # la huella / doc más reciente gana; los conteos se suman
+                        if change["last_seen"] >= entry.get("last_seen", 0):
+                            entry["fingerprint"] = change["fingerprint"]
+                            entry["last_seen"] = change["last_seen"]
+                            if "doc_id" in change:
+                                entry["doc_id"] = change["doc_id"]
+                tmp = self.path.with_suffix(self.path.suffix + f".{os.getpid()}.tmp")
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False)
+                os.replace(tmp, self.path)
+            self._data = data
+            self._changes = {}
+
+
+@contextmanager
+def _file_lock(path: Path):
+    """Lock exclusivo entre procesos (fcntl); sin fcntl (Windows) solo queda el merge."""
+    with open(path, "a+") as f:
+        if HAS_FCNTL:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if HAS_FCNTL:
+                fcntl.flock(f, fcntl.LOCK_UN)
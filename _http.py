@@ -0,0 +1,344 @@
+import os
+import re
+import threading
+import time
+import urllib.request
+import zlib
+from urllib.parse import urljoin
+
+import _jobscope
+
+# cliente HTTP: httpx (keep-alive, http2 si está h2) > requests.Session > urllib (sin pool)
+try:
+    import httpx
+    HAS_HTTPX = True
+except Exception:
+    HAS_HTTPX = False
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    HAS_REQUESTS = True
+except Exception:
+    HAS_REQUESTS = False
+
+# parser HTML: selectolax > lxml (+cssselect) > BeautifulSoup; sin ninguno no hay camino HTTP
+try:
+    # selectolax >= 1.0 solo trae el backend lexbor; el viejo selectolax.parser queda de respaldo
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+    HAS_SELECTOLAX = True
+except Exception:
+    try:
+        from selectolax.parser import HTMLParser
+        HAS_SELECTOLAX = True
+    except Exception:
+        HAS_SELECTOLAX = False
+
+try:
+    import lxml.html
+    import cssselect  # noqa: F401  (lo usa lxml para .cssselect)
+    HAS_LXML = True
+except Exception:
+    HAS_LXML = False
+
+try:
+    from bs4 import BeautifulSoup, NavigableString
+    HAS_BS4 = True
+except Exception:
+    HAS_BS4 = False
+
+HAS_PARSER = HAS_SELECTOLAX or HAS_LXML or HAS_BS4
+
+# HTTP_FIRST=off: todo por el navegador como antes
+ENABLED = os.getenv("HTTP_FIRST", "on").lower() != "off" and HAS_PARSER
+TIMEOUT_SEC = float(os.getenv("HTTP_TIMEOUT_SEC", "15"))
+# tras N páginas incompletas seguidas sin ningún acierto, ese tipo de página va directo al navegador
+MAX_MISSES = int(os.getenv("HTTP_FIRST_MAX_MISSES", "3"))
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36"
+)
+DEFAULT_HEADERS = {
+    "User-Agent": USER_AGENT,
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "es-CL,es;q=0.9,en;q=0.6",
+}
+
+_WS = re.compile(r"\s+")
+
+
+def clean(s) -> str:
+    return _WS.sub(" ", s or "").strip()
+
+
+# ===================== CLIENTE =====================
+
+class _Client:
+    """Un cliente por HttpFirst: las conexiones se reutilizan entre páginas del mismo sitio."""
+
+    def __init__(self, headers=None, timeout=TIMEOUT_SEC):
+        self.headers = {**DEFAULT_HEADERS, **(headers or {})}
+        self.timeout = timeout
+        if HAS_HTTPX:
+            try:
+                import h2  # noqa: F401
+                http2 = True
+            except Exception:
+                http2 = False
+            self._c = httpx.Client(
+                headers=self.headers, timeout=timeout, follow_redirects=True, http2=http2,
+                limits=httpx.Limits(max_keepalive_connections=10, max_connections=20),
+            )
+            self.backend = "httpx"
+        elif HAS_REQUESTS:
+            self._c = requests.Session()
+            self._c.headers.update(self.headers)
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=10)
+            self._c.mount("https://", adapter)
+            self._c.mount("http://", adapter)
+            self.backend = "requests"
+        else:
+            self._c = None
+            self.backend = "urllib"
+
+    def get(self, url: str):
+        """(status, url final, html). Lanza en errores de red."""
+        if self.backend == "httpx":
+            r = self._c.get(url)
+            return r.status_code, str(r.url), r.text
+        if self.backend == "requests":
+            r = self._c.get(url, timeout=self.timeout)
+            return r.status_code, r.url, r.text
+        req = urllib.request.Request(url, headers={**self.headers, "Accept-Encoding": "gzip, deflate"})
+        with urllib.request.urlopen(req, timeout=self.timeout) as r:
+            body = r.read()
+            enc = (r.headers.get("Content-Encoding") or "").lower()
+            if enc in ("gzip", "deflate"):
+                body = zlib.decompress(body, 16 + zlib.MAX_WBITS if enc == "gzip" else zlib.MAX_WBITS)
+            charset = r.headers.get_content_charset() or "utf-8"
+            return r.status, r.geturl(), body.decode(charset, "replace")
+
+    def close(self):
+        if self._c is not None:
+            self._c.close()
+
+
+# ===================== DOCUMENTO =====================
+
+# Texto "canónico" de un nodo: todos sus nodos de texto unidos por un espacio y con los
+# espacios colapsados. Node.text() lo calcula sobre el HTML; TEXT_JS es lo mismo dentro del
+# navegador (locator.evaluate(TEXT_JS)), para que el camino HTTP y el DOM den el mismo string
+# (y con eso el mismo modelDetail / version_key) para una misma celda.
+TEXT_JS = """
+(el) => {
+    const w = document.createTreeWalker(el, NodeFilter.SHOW_TEXT);
+    const out = [];
+    while (w.nextNode()) {
+        const p = w.currentNode.parentNode;
+        if (p && (p.nodeName === "SCRIPT" || p.nodeName === "STYLE")) continue;
+        out.push(w.currentNode.data);
+    }
+    return out.join(" ").replace(/\\s+/g, " ").trim();
+}
+"""
+
+
+class Node:
+    """Nodo HTML con la misma interfaz sea cual sea el parser."""
+
+    __slots__ = ("_n",)
+
+    def __init__(self, n):
+        self._n = n
+
+    def select(self, css: str) -> list["Node"]:
+        n = self._n
+        if HAS_SELECTOLAX:
+            return [Node(x) for x in n.css(css)]
+        if HAS_LXML:
+            return [Node(x) for x in n.cssselect(css)]
+        return [Node(x) for x in n.select(css)]
+
+    def select_one(self, css: str) -> "Node | None":
+        found = self.select(css)
+        return found[0] if found else None
+
+    def text(self) -> str:
+        """Texto canónico (ver TEXT_JS)."""
+        n = self._n
+        if HAS_SELECTOLAX:
+            parts = [t.text(deep=False) for t in n.traverse(include_text=True)
+                     if t.tag == "-text" and (t.parent is None or t.parent.tag not in ("script", "style"))]
+        elif HAS_LXML:
+            parts = [t for t in n.xpath(".//text()")
+                     if not (t.is_text and t.getparent().tag in ("script", "style"))]
+        else:
+            # type() exacto: Comment / CData / Doctype son subclases de NavigableString
+            parts = [t for t in n.find_all(string=True)
+                     if type(t) is NavigableString and t.parent.name not in ("script", "style")]
+        return clean(" ".join(parts))
+
+    def attr(self, name: str, default: str = "") -> str:
+        n = self._n
+        if HAS_SELECTOLAX:
+            v = (n.attributes or {}).get(name)
+        else:
+            v = n.get(name)
+        if isinstance(v, list):  # bs4 devuelve class como lista
+            v = " ".join(v)
+        return v if v is not None else default
+
+    # atajos: primer match o "" (como safe_text / safe_attr de los scrapers)
+    def text_of(self, *selectors: str) -> str:
+        for css in selectors:
+            node = self.select_one(css)
+            if node is not None:
+                t = node.text()
+                if t:
+                    return t
+        return ""
+
+    def attr_of(self, selectors, name: str) -> str:
+        for css in ([selectors] if isinstance(selectors, str) else selectors):
+            node = self.select_one(css)
+            if node is not None:
+                v = node.attr(name)
+                if v:
+                    return v
+        return ""
+
+
+def parse_html(html: str) -> Node:
+    if HAS_SELECTOLAX:
+        return Node(HTMLParser(html).root)
+    if HAS_LXML:
+        return Node(lxml.html.fromstring(html))
+    return Node(BeautifulSoup(html, "html.parser"))
+
+
+class Doc(Node):
+    __slots__ = ("url",)
+
+    def __init__(self, root: Node, url: str):
+        super().__init__(root._n)
+        self.url = url
+
+    def abs(self, href: str) -> str:
+        return urljoin(self.url, href) if href else ""
+
+
+# ===================== HTTP PRIMERO =====================
+
+_registry_lock = threading.Lock()
+
+
+def _registry() -> list:
+    # fetchers creados por el job en curso (_jobscope): se van con el job, no se acumulan en el proceso
+    return _jobscope.current().get("http_fetchers", list)
+
+
+class HttpFirst:
+    """
+    Intenta una página por HTTP + parser y solo si el resultado está incompleto
+    devuelve None para que el scraper haga lo de siempre con Playwright.
+
+        web = HttpFirst("zentrum")
+        versiones = web.extract("modelo", url, lambda doc: versiones_desde_html(doc, m), versiones_completas)
+        if versiones is None:
+            versiones = versiones_con_navegador(page, m)   # camino navegador de antes
+
+    parse(doc) recibe un Doc (select / text / attr / abs) y usa el mismo esquema que el DOM.
+    complete(result) tiene que poder decir que la página está entera: "no vacío" no sirve
+    para listados con lazy-load / scroll infinito (el HTML estático trae solo la primera
+    tanda); esos se quedan en el navegador.
+    Por tipo de página (`kind`): si las primeras MAX_MISSES salen incompletas sin ningún
+    acierto (ej. precios que llegan por AJAX) ese tipo deja de intentarse por HTTP.
+    """
+
+    def __init__(self, site: str, headers=None, max_misses: int = MAX_MISSES, enabled: bool | None = None):
+        self.site = site
+        self.enabled = ENABLED if enabled is None else enabled
+        self.max_misses = max_misses
+        self._headers = headers
+        self._client = None
+        self._lock = threading.Lock()
+        self.hits = {}
+        self.misses = {}
+        self.escalations = 0
+        self.fetch_sec = 0.0
+        with _registry_lock:
+            _registry().append(self)
+
+    def _get_client(self):
+        if self._client is None:
+            self._client = _Client(self._headers)
+        return self._client
+
+    def usable(self, kind: str) -> bool:
+        if not self.enabled:
+            return False
+        return self.hits.get(kind, 0) > 0 or self.misses.get(kind, 0) < self.max_misses
+
+    def fetch(self, url: str) -> Doc | None:
+        t0 = time.perf_counter()
+        try:
+            status, final_url, html = self._get_client().get(url)
+        except Exception as e:
+            print(f"[HTTP][WARN] {url}: {e}", flush=True)
+            return None
+        finally:
+            self.fetch_sec += time.perf_counter() - t0
+        if status != 200 or not html:
+            print(f"[HTTP][WARN] {url}: status {status}", flush=True)
+            return None
+        return Doc(parse_html(html), final_url)
+
+    def extract(self, kind: str, url: str, parse, complete):
+        """Resultado de parse(doc) si pasa complete(); None = escalar al navegador."""
+        if not self.usable(kind):
+            self.escalations += 1
+            return None
+        doc = self.fetch(url)
+        result = None
+        if doc is not None:
+            try:
+                result = parse(doc)
+            except Exception as e:
+                print(f"[HTTP][WARN] parseo de {url} falló: {e}", flush=True)
+                result = None
+        with self._lock:
+            if result is not None and complete(result):
+                self.hits[kind] = self.hits.get(kind, 0) + 1
+                return result
+            self.misses[kind] = self.misses.get(kind, 0) + 1
+            self.escalations += 1
+            if not self.usable(kind):
+                print(f"[HTTP] {self.site}/{kind}: {self.misses[kind]} páginas incompletas por HTTP, sigo solo con navegador", flush=True)
+        return None
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    def summary(self) -> dict:
+        return {
+            "http_hits": sum(self.hits.values()),
+            "http_misses": sum(self.misses.values()),
+            "http_escalations": self.escalations,
+            "http_fetch_sec": round(self.fetch_sec, 2),
+        }
+
+
+def summary() -> dict:
+    """Suma de los HttpFirst del job (para run_stats)."""
+    with _registry_lock:
+        fetchers = list(_registry())
+    if not fetchers:
+        return {}
+    out = {}
+    for f in fetchers:
+        for k, v in f.summary().items():
+            out[k] = round(out.get(k, 0) + v, 2)
+    return out
@@ -0,0 +1,45 @@
+import contextvars
+import threading
+from contextlib import contextmanager
+
+
+class JobScope:
+    """
+    Contadores de un job para run_stats() (writer, cache, marcas, red, captura, HTTP, esperas).
+
+    Un script suelto es un proceso = un job y usa el scope del proceso. El runner en proceso
+    (_plugins.run_main) abre uno por job: lo que cuente ese job (su hilo, sus tasks, los hilos
+    del SavePipeline) queda en el suyo y no se mezcla con los otros jobs ni con corridas anteriores.
+    """
+
+    def __init__(self, job: str, run_id: str | None = None):
+        self.job = job
+        self.run_id = run_id
+        self._lock = threading.Lock()
+        self._data = {}
+
+    def get(self, key, factory):
+        """Objeto de `key` en este job; lo crea con factory() la primera vez."""
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                value = self._data[key] = factory()
+            return value
+
+
+_PROCESS = JobScope("process")
+_current = contextvars.ContextVar("job_scope", default=None)
+
+
+def current() -> JobScope:
+    return _current.get() or _PROCESS
+
+
+@contextmanager
+def job_scope(job: str, run_id: str | None = None):
+    scope = JobScope(job, run_id)
+    token = _current.set(scope)
+    try:
+        yield scope
+    finally:
+        _current.reset(token)
@@ -0,0 +1,168 @@
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from _storage import Increment
+
+# fcntl es solo POSIX: sin él el dueño de un segmento se reconoce por el pid del nombre
+try:
+    import fcntl
+    HAS_FCNTL = True
+except Exception:
+    HAS_FCNTL = False
+
+
+JOURNAL_DIR = Path("state/journal")
+
+
+def new_run_id() -> str:
+    return f"{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}"
+
+
+def _encode(data: dict) -> dict:
+    return {k: {"__increment__": v.value} if isinstance(v, Increment) else v for k, v in data.items()}
+
+
+def _decode(data: dict) -> dict:
+    return {
+        k: Increment(v["__increment__"]) if isinstance(v, dict) and "__increment__" in v else v
+        for k, v in data.items()
+    }
+
+
+class WriteJournal:
+    """
+    Journal append-only de escrituras pendientes: un segmento JSONL por run en state/journal/.
+
+    Líneas:
+      {"op": "set", "seq": n, "collection", "doc_id", "data", "merge"}   antes de enviar
+      {"op": "ack", "seqs": [...]}                                         después del commit
+
+    Si todo quedó confirmado, el segmento se borra al cerrar. Mientras el run lo tiene abierto
+    guarda un flock exclusivo sobre él: replay_journal.py salta los segmentos con dueño.
+    """
+
+    def __init__(self, directory=JOURNAL_DIR, run_id: str | None = None):
+        self.directory = Path(directory)
+        self.run_id = run_id or new_run_id()
+        self.path = self.directory / f"{self.run_id}.jsonl"
+        self._f = None
+        self._seq = 0
+        self._unacked = set()
+        self._lock = threading.Lock()
+
+    def _file(self):
+        if self._f is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._f = open(self.path, "a", encoding="utf-8")
+            if HAS_FCNTL:
+                fcntl.flock(self._f, fcntl.LOCK_EX)  # se suelta al cerrar el archivo
+        return self._f
+
+    def append(self, collection: str, doc_id: str, data: dict, merge: bool) -> int:
+        with self._lock:
+            self._seq += 1
+            entry = {
+                "op": "set",
+                "seq": self._seq,
+                "collection": collection,
+                "doc_id": doc_id,
+                "data": _encode(data),
+                "merge": merge,
+            }
+            self._file().write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+            self._unacked.add(self._seq)
+            return self._seq
+
+    def sync(self):
+        """fsync del segmento; se llama una vez por flush, antes de enviar el lote."""
+        with self._lock:
+            if self._f is not None:
+                self._f.flush()
+                os.fsync(self._f.fileno())
+
+    def ack(self, seqs):
+        seqs = list(seqs)
+        if not seqs:
+            return
+        with self._lock:
+            self._file().write(json.dumps({"op": "ack", "seqs": seqs}) + "\n")
+            self._f.flush()
+            self._unacked.difference_update(seqs)
+
+    def close(self):
+        with self._lock:
+            if self._f is None:
+                return
+            self._f.close()
+            self._f = None
+            if not self._unacked:
+                self.path.unlink(missing_ok=True)
+
+
+def read_pending(path) -> list[dict]:
+    """Entradas "set" de un segmento que no tienen ack, en orden de seq."""
+    sets = {}
+    acked = set()
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # última línea truncada por un crash
+                continue
+            if entry.get("op") == "set":
+                entry["data"] = _decode(entry["data"])
+                sets[entry["seq"]] = entry
+            elif entry.get("op") == "ack":
+                acked.update(entry.get("seqs") or [])
+    return [sets[s] for s in sorted(sets) if s not in acked]
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except Exception:
+        return True  # sin permiso para señalarlo: existe
+    return True
+
+
+@contextmanager
+def claim_segment(path):
+    """
+    Toma un segmento para el replay: True si quedó tomado, False si lo tiene un run vivo
+    (su WriteJournal sigue abierto) u otro replay. Sin fcntl: False si el pid del nombre vive.
+    """
+    path = Path(path)
+    if not HAS_FCNTL:
+        m = re.search(r"-(\d+)$", path.stem)
+        yield not (m and int(m.group(1)) != os.getpid() and _pid_alive(int(m.group(1))))
+        return
+    with open(path, "a", encoding="utf-8") as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def mark_acked(path, seqs):
+    """Agrega un ack a un segmento existente (usado por el replay)."""
+    seqs = list(seqs)
+    if not seqs:
+        return
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"op": "ack", "seqs": seqs}) + "\n")
@@ -0,0 +1,67 @@
+import threading
+import time
+
+import _jobscope
+
+
+class ModelLookupCache:
+    """
+    Cache por proceso de (marca, model) -> (categoria, origen).
+
+    La primera consulta de una marca carga todas sus filas de "modelos" con `loader(marca)`
+    (una sola query) y de ahí en adelante responde desde memoria hasta que vence el TTL
+    o se llama a invalidate().
+    """
+
+    def __init__(self, loader, ttl_sec: float = 3600.0):
+        self.loader = loader
+        self.ttl_sec = float(ttl_sec)
+        self._by_marca = {}   # marca -> (loaded_at, {model: (categoria, origen)})
+        self._lock = threading.Lock()
+
+    @property
+    def stats(self) -> dict:
+        # contadores del job en curso (_jobscope); el cache en sí es del proceso
+        return _jobscope.current().get(self, lambda: {"hits": 0, "misses": 0, "loads": 0})
+
+    def get(self, marca: str, model: str):
+        with self._lock:
+            entry = self._by_marca.get(marca)
+            if entry is None or (time.time() - entry[0]) > self.ttl_sec:
+                entry = (time.time(), self._load(marca))
+                self._by_marca[marca] = entry
+
+            found = entry[1].get(model)
+            if found is None:
+                self.stats["misses"] += 1
+                return None, None
+
+            self.stats["hits"] += 1
+            return found
+
+    def invalidate(self, marca: str | None = None):
+        with self._lock:
+            if marca is None:
+                self._by_marca.clear()
+            else:
+                self._by_marca.pop(marca, None)
+
+    def summary(self) -> dict:
+        return {
+            "lookup_hits": self.stats["hits"],
+            "lookup_misses": self.stats["misses"],
+            "lookup_loads": self.stats["loads"],
+        }
+
+    def _load(self, marca: str) -> dict:
+        self.stats["loads"] += 1
+        out = {}
+        for data in self.loader(marca):
+            model = data.get("model")
+            categoria = data.get("categoria")
+            origen = data.get("origen")
+            # nos quedamos con la primera fila que traiga algún dato útil
+            if model in out and any(out[model]):
+                continue
+            out[model] = (categoria, origen)
+        return out
@@ -0,0 +1,210 @@
+import os
+import threading
+from collections import Counter
+from urllib.parse import urlsplit
+
+import _jobscope
+
+# ===================== REGLAS =====================
+
+# tipos de recurso (request.resource_type de Playwright) que ningún scraper necesita descargar:
+# las URLs de imágenes se siguen leyendo del DOM (src / data-src), solo no se bajan
+DEFAULT_BLOCK_TYPES = {"image", "media", "font"}
+
+# dominios de terceros por categoría (se compara el host y sus subdominios)
+BLOCK_DOMAINS = {
+    "analytics": [
+        "google-analytics.com", "googletagmanager.com", "analytics.google.com",
+        "hotjar.com", "hotjar.io", "clarity.ms", "mc.yandex.ru", "segment.io", "segment.com",
+        "mixpanel.com", "amplitude.com", "newrelic.com", "nr-data.net", "fullstory.com",
+        "mouseflow.com", "crazyegg.com", "matomo.cloud",
+    ],
+    "ads": [
+        "doubleclick.net", "googleadservices.com", "googlesyndication.com", "adservice.google.com",
+        "connect.facebook.net", "facebook.com/tr", "snap.licdn.com", "px.ads.linkedin.com",
+        "analytics.tiktok.com", "criteo.com", "criteo.net", "taboola.com", "outbrain.com",
+        "bat.bing.com", "ads-twitter.com", "static.ads-twitter.com", "adform.net",
+    ],
+    "chat": [
+        "zopim.com", "zdassets.com", "intercom.io", "intercomcdn.com", "tawk.to", "livechatinc.com",
+        "driftt.com", "drift.com", "hubspot.com", "hs-scripts.com", "hs-analytics.net", "onesignal.com",
+        "userway.org", "whatsapp-widget", "getbutton.io", "leadsbridge.com", "botmaker.com",
+    ],
+}
+
+# por sitio (nombre que pasa el scraper): se suman / quitan a lo de arriba
+#   block_types:   reemplaza DEFAULT_BLOCK_TYPES
+#   block_domains: dominios extra a bloquear
+#   allow_domains: nunca se bloquean (ej. el CDN desde donde el sitio sirve su API)
+#   domain_categories: categorías de BLOCK_DOMAINS que aplican (por defecto todas)
+SITE_RULES = {
+    # lo mismo que cortaba el route_handler original de Geely y nada más: las imágenes
+    # (lazy-load) y los widgets del sitio se siguen bajando
+    "geely": {
+        "block_types": [],
+        "domain_categories": [],
+        "block_domains": ["google-analytics", "gtm", "hotjar", "doubleclick"],
+    },
+}
+
+# tamaño típico de lo bloqueado, para estimar bytes ahorrados (no se puede medir lo que no se baja)
+_EST_KB = {"image": 60, "media": 800, "font": 35, "script": 60, "stylesheet": 20, "texttrack": 5}
+_EST_KB_OTHER = 3
+
+ENABLED = os.getenv("NET_POLICY", "on").lower() != "off"
+
+
+# ===================== POLÍTICA =====================
+
+class NetworkPolicy:
+    """
+    Decide por request si se aborta: por tipo de recurso o por dominio de terceros.
+    Se instala con block_resources(ctx) / await block_resources_async(ctx) sobre un
+    BrowserContext o una Page; los contadores quedan en summary() y en run_stats().
+    """
+
+    def __init__(self, site: str | None = None, block_types=None, block_domains=(), allow_domains=()):
+        rules = SITE_RULES.get(site or "", {})
+        env_types = os.getenv("NET_BLOCK_TYPES")
+        if block_types is None:
+            block_types = rules.get("block_types")
+        if block_types is None and env_types is not None:
+            block_types = {t.strip() for t in env_types.split(",") if t.strip()}
+        self.site = site
+        self.block_types = set(DEFAULT_BLOCK_TYPES if block_types is None else block_types)
+        self.allow_domains = tuple(list(rules.get("allow_domains", [])) + list(allow_domains))
+
+        self._domains = []  # (patrón, categoría)
+        categories = rules.get("domain_categories")
+        for cat, domains in BLOCK_DOMAINS.items():
+            if categories is not None and cat not in categories:
+                continue
+            self._domains.extend((d, cat) for d in domains)
+        self._domains.extend((d, "site") for d in list(rules.get("block_domains", [])) + list(block_domains))
+
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.blocked = Counter()   # motivo (tipo de recurso o categoría de dominio) -> n
+        self.saved_kb = 0
+
+    def _domain_category(self, url: str) -> str | None:
+        parts = urlsplit(url)
+        host = parts.hostname or ""
+        target = host + parts.path
+        if any(host == d or host.endswith("." + d) for d in self.allow_domains):
+            return None
+        for pattern, cat in self._domains:
+            if "/" in pattern or "." not in pattern:
+                # patrón con ruta o palabra suelta ("facebook.com/tr", "gtm")
+                if pattern in target:
+                    return cat
+            elif host == pattern or host.endswith("." + pattern):
+                return cat
+        return None
+
+    def verdict(self, url: str, resource_type: str) -> str | None:
+        """Motivo del bloqueo, o None si el request pasa. También actualiza los contadores."""
+        reason = None
+        if not url.startswith("data:"):
+            reason = self._domain_category(url)
+            if reason is None and resource_type in self.block_types:
+                reason = resource_type
+        with self._lock:
+            self.requests += 1
+            if reason:
+                self.blocked[reason] += 1
+                self.saved_kb += _EST_KB.get(resource_type, _EST_KB_OTHER)
+        return reason
+
+    # ---------- handlers ----------
+
+    def _handler_sync(self, route):
+        try:
+            req = route.request
+            if self.verdict(req.url, req.resource_type):
+                return route.abort()
+            return route.continue_()
+        except Exception:
+            # ante la duda el request sigue; si la página ya se cerró, no hay nada que hacer
+            try:
+                route.continue_()
+            except Exception:
+                pass
+
+    async def _handler_async(self, route):
+        try:
+            req = route.request
+            if self.verdict(req.url, req.resource_type):
+                return await route.abort()
+            return await route.continue_()
+        except Exception:
+            try:
+                await route.continue_()
+            except Exception:
+                pass
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {
+                "net_requests": self.requests,
+                "net_blocked": sum(self.blocked.values()),
+                "net_saved_kb_est": self.saved_kb,
+                "net_blocked_by": dict(self.blocked),
+            }
+
+
+_policies_lock = threading.Lock()
+
+
+def _policies() -> list:
+    # políticas instaladas por el job en curso (_jobscope)
+    return _jobscope.current().get("net_policies", list)
+
+
+def _register(policy: NetworkPolicy) -> NetworkPolicy:
+    with _policies_lock:
+        _policies().append(policy)
+    return policy
+
+
+def block_resources(target, site: str | None = None, **rules) -> NetworkPolicy | None:
+    """Instala la política en un BrowserContext o Page (playwright.sync_api). NET_POLICY=off la apaga."""
+    if not ENABLED:
+        return None
+    policy = NetworkPolicy(site, **rules)
+    try:
+        target.route("**/*", policy._handler_sync)
+    except Exception as e:
+        print(f"[NET][WARN] No pude registrar la política de red: {e}", flush=True)
+        return None
+    return _register(policy)
+
+
+async def block_resources_async(target, site: str | None = None, **rules) -> NetworkPolicy | None:
+    """Igual que block_resources, para playwright.async_api."""
+    if not ENABLED:
+        return None
+    policy = NetworkPolicy(site, **rules)
+    try:
+        await target.route("**/*", policy._handler_async)
+    except Exception as e:
+        print(f"[NET][WARN] No pude registrar la política de red: {e}", flush=True)
+        return None
+    return _register(policy)
+
+
+def summary() -> dict:
+    """Suma de las políticas instaladas por el job (para run_stats)."""
+    with _policies_lock:
+        policies = list(_policies())
+    if not policies:
+        return {}
+    out = {"net_requests": 0, "net_blocked": 0, "net_saved_kb_est": 0, "net_blocked_by": Counter()}
+    for p in policies:
+        s = p.summary()
+        out["net_requests"] += s["net_requests"]
+        out["net_blocked"] += s["net_blocked"]
+        out["net_saved_kb_est"] += s["net_saved_kb_est"]
+        out["net_blocked_by"].update(s["net_blocked_by"])
+    out["net_blocked_by"] = dict(out["net_blocked_by"])
+    return out
@@ -0,0 +1,109 @@
+import asyncio
+import os
+import time
+from urllib.parse import urlsplit
+
+# pestañas por scraper y máximo de pestañas simultáneas contra un mismo dominio
+PAGE_POOL = int(os.getenv("PAGE_POOL", "3"))
+PER_DOMAIN = int(os.getenv("PAGE_POOL_PER_DOMAIN", "3"))
+# separación mínima entre dos navegaciones que arrancan contra el mismo dominio (s)
+DOMAIN_DELAY_SEC = float(os.getenv("PAGE_POOL_DOMAIN_DELAY", "0.5"))
+
+
+class _Domain:
+    def __init__(self, limit: int):
+        self.sem = asyncio.Semaphore(limit)
+        self.lock = asyncio.Lock()
+        self.last_start = 0.0
+
+
+class PagePool:
+    """
+    N pestañas de un mismo BrowserContext (playwright.async_api) trabajando una cola.
+
+        async with PagePool(context, size=3, setup=preparar) as pool:
+            resultados = await pool.map(procesar, modelos, url=lambda m: m["url"])
+
+    - procesar(page, item) corre en la primera pestaña libre; la pestaña se reusa
+    - map() devuelve los resultados en el orden de `items`; si un item falla, en su
+      lugar queda la excepción (como asyncio.gather(return_exceptions=True))
+    - con url=..., no más de `per_domain` pestañas a la vez por dominio y al menos
+      `domain_delay` s entre arranques contra el mismo dominio
+    - setup(page) se llama una vez por pestaña (timeouts, captura de respuestas, etc.)
+    - size=1 es exactamente el recorrido secuencial de antes
+    """
+
+    def __init__(self, context, size: int = PAGE_POOL, per_domain: int = PER_DOMAIN,
+                 domain_delay: float = DOMAIN_DELAY_SEC, setup=None, first_page=None):
+        self.context = context
+        self.size = max(1, size)
+        self.per_domain = max(1, per_domain)
+        self.domain_delay = domain_delay
+        self.setup = setup
+        self.pages = []
+        self._first_page = first_page
+        self._own = []
+        self._free = None
+        self._domains = {}
+
+    async def start(self):
+        if self._free is not None:
+            return self
+        self._free = asyncio.Queue()
+        for i in range(self.size):
+            if i == 0 and self._first_page is not None:
+                page = self._first_page
+            else:
+                page = await self.context.new_page()
+                self._own.append(page)
+            if self.setup:
+                await self.setup(page)
+            self.pages.append(page)
+            self._free.put_nowait(page)
+        return self
+
+    async def close(self):
+        # la pestaña recibida en first_page es del scraper: esa no se cierra
+        for page in self._own:
+            try:
+                await page.close()
+            except Exception:
+                pass
+        self._own = []
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def _polite(self, url):
+        host = urlsplit(url).hostname if url else None
+        if not host:
+            return None
+        dom = self._domains.get(host)
+        if dom is None:
+            dom = self._domains[host] = _Domain(self.per_domain)
+        await dom.sem.acquire()
+        async with dom.lock:
+            wait = dom.last_start + self.domain_delay - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            dom.last_start = time.monotonic()
+        return dom
+
+    async def run(self, fn, item, url=None):
+        await self.start()
+        dom = await self._polite(url(item) if url else None)
+        page = await self._free.get()
+        try:
+            return await fn(page, item)
+        finally:
+            self._free.put_nowait(page)
+            if dom:
+                dom.sem.release()
+
+    async def map(self, fn, items, url=None) -> list:
+        items = list(items)
+        await self.start()
+        return await asyncio.gather(*(self.run(fn, it, url) for it in items), return_exceptions=True)
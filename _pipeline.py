@@ -0,0 +1,173 @@
+import contextvars
+import queue
+import threading
+import time
+import traceback
+from collections import Counter
+
+
+_STOP = object()
+# close() espera a lo más esto por commits que no confirmaron; los que falten cuentan como error
+CONFIRM_TIMEOUT_SEC = 120
+
+
+class SavePipeline:
+    """
+    Cola acotada + pool de hilos que ejecutan `save_fn(*args)` mientras el scraper sigue.
+
+    - submit() bloquea cuando la cola está llena (backpressure)
+    - close() drena la cola y espera a los hilos
+    - los contadores se suman al dict `stats` del script:
+        save_enqueued, saved_ok, save_errors
+    - submit(..., unit=X) + seal(X, cb): cb(errores) cuando terminaron todos los saves de X
+    - con flush (ej. utils.writer.flush) save_fn recibe on_commit= y una fila cuenta como
+      saved_ok (y termina su unidad) recién cuando el writer confirma el commit; sin flush,
+      cuando save_fn retorna. close() llama a flush y espera esas confirmaciones.
+    """
+
+    def __init__(self, save_fn, stats: dict | None = None, workers: int = 4, maxsize: int = 200, flush=None):
+        self.save_fn = save_fn
+        self.flush = flush
+        self.stats = stats if stats is not None else {}
+        for k in ("save_enqueued", "saved_ok", "save_errors"):
+            self.stats.setdefault(k, 0)
+        self._unconfirmed = 0
+        self._gave_up = False  # close() ya contó como error lo que no confirmó
+        self._confirmed = threading.Condition()
+
+        self._q = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._pending = Counter()
+        self._unit_errors = Counter()
+        self._sealed = {}
+        self._closed = False
+        # cada hilo con una copia del contexto de quien crea el pipeline: así save_fn ve el
+        # ReportTimer (spans) y la salida del job en curso (_plugins) aunque corra en otro hilo
+        self._threads = [
+            threading.Thread(target=contextvars.copy_context().run, args=(self._worker,), name=f"save-{i}", daemon=True)
+            for i in range(max(1, workers))
+        ]
+        for t in self._threads:
+            t.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def submit(self, *args, unit=None):
+        if self._closed:
+            raise RuntimeError("SavePipeline cerrado")
+        self._bump("save_enqueued")
+        if unit is not None:
+            with self._lock:
+                self._pending[unit] += 1
+        self._q.put((args, unit))
+
+    def seal(self, unit, on_done):
+        """No se encolan más filas de `unit`; on_done(n_errores) corre cuando todas se procesaron."""
+        with self._lock:
+            if self._pending[unit] > 0:
+                self._sealed[unit] = on_done
+                return
+            self._pending.pop(unit, None)
+            errors = self._unit_errors.pop(unit, 0)
+        on_done(errors)
+
+    def mark_error(self):
+        """Cuenta una fila descartada antes de encolar (mismo contador que los fallos de save)."""
+        self._bump("save_errors")
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._threads:
+            self._q.put(_STOP)
+        for t in self._threads:
+            t.join()
+        if self.flush is not None:
+            self.flush()
+            deadline = time.monotonic() + CONFIRM_TIMEOUT_SEC
+            while True:
+                with self._confirmed:
+                    if not self._unconfirmed or time.monotonic() >= deadline:
+                        lost = self._unconfirmed
+                        self._unconfirmed = 0
+                        self._gave_up = True
+                        break
+                    self._confirmed.wait(timeout=1)
+                    waiting = self._unconfirmed
+                # flush sin tener _confirmed: los on_commit (de este u otro hilo) lo necesitan
+                if waiting:
+                    self.flush()  # filas que otro hilo encoló mientras tanto
+            if lost:
+                print(f"[ERROR] {lost} fila(s) sin confirmación del writer tras {CONFIRM_TIMEOUT_SEC}s", flush=True)
+                with self._lock:
+                    self.stats["save_errors"] += lost
+
+    def _bump(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _saved(self, unit, ok: bool):
+        self._bump("saved_ok" if ok else "save_errors")
+        if unit is not None:
+            self._unit_finished(unit, not ok)
+
+    def _confirm_cb(self, unit):
+        done = threading.Event()
+        with self._confirmed:
+            self._unconfirmed += 1
+
+        def on_commit(ok):
+            with self._confirmed:
+                if done.is_set() or self._gave_up:
+                    return  # una sola confirmación por fila
+                done.set()
+                self._unconfirmed -= 1
+                self._confirmed.notify_all()
+            self._saved(unit, ok)
+        return on_commit
+
+    def _unit_finished(self, unit, failed: bool):
+        with self._lock:
+            if failed:
+                self._unit_errors[unit] += 1
+            self._pending[unit] -= 1
+            if self._pending[unit] > 0 or unit not in self._sealed:
+                return
+            on_done = self._sealed.pop(unit)
+            self._pending.pop(unit, None)
+            errors = self._unit_errors.pop(unit, 0)
+        try:
+            on_done(errors)
+        except Exception as e:
+            print(f"[ERROR] callback de unidad {unit} falló: {e}", flush=True)
+
+    def _worker(self):
+        while True:
+            item = self._q.get()
+            try:
+                if item is _STOP:
+                    return
+                args, unit = item
+                on_commit = None
+                try:
+                    if self.flush is None:
+                        self.save_fn(*args)
+                        self._saved(unit, True)
+                    else:
+                        on_commit = self._confirm_cb(unit)
+                        self.save_fn(*args, on_commit=on_commit)
+                except Exception as e:
+                    print(f"[ERROR] save en background falló para {args}: {e}", flush=True)
+                    traceback.print_exc()
+                    if on_commit is None:
+                        self._saved(unit, False)
+                    else:
+                        on_commit(False)  # no-op si la fila ya había confirmado
+            finally:
+                self._q.task_done()
@@ -0,0 +1,160 @@
+import asyncio
+import contextvars
+import inspect
+import io
+import json
+import sys
+import threading
+import traceback
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+import _browser
+import _jobscope
+import _reports
+from _journal import new_run_id
+from _reports import ReportTimer, counts_from_stats
+
+
+@dataclass
+class RunContext:
+    """
+    Lo que plugin_runner le pasa a run_main() por cada marca.
+    Firestore/writer/caches de utils ya son compartidos por vivir en el mismo proceso.
+    """
+    job: str
+    headless: bool = True
+    browser_endpoint: Optional[str] = None
+    emit: Callable[[str], None] = print
+    shared: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def storage(self):
+        from _storage import get_storage
+        return get_storage()
+
+
+# ===================== STDOUT POR JOB =====================
+
+# destino de las líneas del job actual; contextvars sigue a asyncio.to_thread y a las tasks
+_sink = contextvars.ContextVar("plugin_sink", default=None)
+
+
+class _LineRouter(io.TextIOBase):
+    """Reemplaza sys.stdout/stderr: manda cada línea al sink del job que la escribió."""
+
+    def __init__(self, fallback):
+        self.fallback = fallback
+        self._partial = threading.local()
+
+    def write(self, s):
+        sink = _sink.get()
+        if sink is None:
+            return self.fallback.write(s)
+        buf = getattr(self._partial, "buf", "") + s
+        *lines, self._partial.buf = buf.split("\n")
+        for line in lines:
+            self._deliver(sink, line)
+        return len(s)
+
+    def _deliver(self, sink, line):
+        # lo que imprima el sink (ctx.emit) va directo al stdout real, no de vuelta al sink
+        token = _sink.set(None)
+        try:
+            sink(line)
+        finally:
+            _sink.reset(token)
+
+    def flush(self):
+        sink = _sink.get()
+        buf = getattr(self._partial, "buf", "")
+        if sink is not None and buf:
+            self._partial.buf = ""
+            self._deliver(sink, buf)
+        self.fallback.flush()
+
+    @property
+    def encoding(self):
+        return getattr(self.fallback, "encoding", "utf-8")
+
+    def isatty(self):
+        return False
+
+
+_install_lock = threading.Lock()
+
+
+def install_router():
+    with _install_lock:
+        if not isinstance(sys.stdout, _LineRouter):
+            sys.stdout = _LineRouter(sys.stdout)
+        if not isinstance(sys.stderr, _LineRouter):
+            sys.stderr = _LineRouter(sys.stderr)
+
+
+# ===================== ADAPTADOR main() -> RunReport =====================
+
+def run_main(main_fn: Callable, ctx: RunContext):
+    """
+    Ejecuta el main() de un orq_* en este proceso y lo traduce a RunReport.
+    Mismo criterio que orchestrator.run_script: RUN_OK + código 0, summary = último JSON con "status".
+    Si main() acepta `headless` se le pasa ctx.headless.
+    """
+    install_router()
+    timer = ReportTimer(ctx.job, activate=False)
+    state = {"run_ok": False, "summary": None}
+
+    def sink(line):
+        ctx.emit(line.rstrip())
+        if "RUN_OK" in line:
+            state["run_ok"] = True
+        try:
+            parsed = json.loads(line.strip())
+            if isinstance(parsed, dict) and "status" in parsed:
+                state["summary"] = parsed
+        except ValueError:
+            pass
+
+    token = _sink.set(sink)
+    cdp_token = _browser._cdp_var.set(ctx.browser_endpoint)
+    active_token = _reports._active_var.set(None)
+    slot = {}
+    slot_token = _reports._job_slot.set(slot)
+    rc = 0
+    try:
+        # contadores de run_stats() y run_id del parquet propios del job, no los del proceso
+        with _jobscope.job_scope(ctx.job, run_id=f"{new_run_id()}-{ctx.job}"):
+            if "headless" in inspect.signature(main_fn).parameters:
+                out = main_fn(headless=ctx.headless)
+            else:
+                out = main_fn()
+            if inspect.iscoroutine(out):
+                asyncio.run(out)
+    except SystemExit as e:
+        rc = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except Exception as e:
+        print(f"[FATAL] {e}")
+        traceback.print_exc()
+        rc = 1
+    finally:
+        sys.stdout.flush()
+        # spans del ReportTimer que haya creado el main() del job
+        job_timer = slot.get("timer")
+        spans = None
+        if job_timer is not None:
+            spans = job_timer.spans_summary() or None
+            _reports.release(job_timer)
+        _reports._job_slot.reset(slot_token)
+        _reports._active_var.reset(active_token)
+        _browser._cdp_var.reset(cdp_token)
+        _sink.reset(token)
+
+    summary = state["summary"] or {}
+    timer.finalize(
+        **counts_from_stats(summary),
+        spans=spans,
+        success=state["run_ok"] and rc == 0,
+        return_code=rc,
+        summary=state["summary"],
+    )
+    return timer.report
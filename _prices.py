@@ -0,0 +1,223 @@
+import atexit
+import importlib.util
+import math
+import re
+import threading
+import time
+from datetime import datetime
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from pathlib import Path
+
+import _jobscope
+
+# pyarrow es opcional: sin él, el store queda deshabilitado y los saves siguen normal.
+# Se importa recién al escribir / leer (utils lo carga en todos los scrapers y pyarrow pesa)
+HAS_ARROW = importlib.util.find_spec("pyarrow") is not None
+
+
+PRICES_DIR = Path("data/prices")
+
+_schema = None
+
+
+def _arrow():
+    """(pa, ds, pq, SCHEMA), importados la primera vez."""
+    global _schema
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    if _schema is None:
+        _schema = pa.schema([
+            ("run_id", pa.string()),
+            ("ts", pa.int64()),
+            ("brand", pa.string()),
+            ("model", pa.string()),
+            ("version", pa.string()),
+            ("price_type", pa.string()),
+            ("price", pa.int64()),
+            ("source", pa.string()),
+            ("collection", pa.string()),
+        ])
+    return pa, ds, pq, _schema
+
+
+_NUM_RE = re.compile(r"-?\d[\d.,]*")
+_THOUSANDS_RE = re.compile(r"^-?\d{1,3}(\.\d{3})+$")
+
+
+def _round(d: Decimal) -> int:
+    return int(d.quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def _to_int(v):
+    """
+    Precio entero (CLP) redondeado. Números: tal cual / redondeados (12990000.0 del JSON).
+    Texto: el primer número, con "." de miles y "," decimal ("$12.990.000,5" -> 12990001);
+    un solo "." sin grupos de 3 es decimal ("12990000.0").
+    """
+    if v is None or isinstance(v, bool):
+        return None
+    if isinstance(v, int):
+        return v
+    if isinstance(v, float):
+        return _round(Decimal(repr(v))) if math.isfinite(v) else None
+    if isinstance(v, Decimal):
+        return _round(v) if v.is_finite() else None
+    m = _NUM_RE.search(str(v))
+    if not m:
+        return None
+    num = m.group(0).rstrip(".,")
+    if "," in num:
+        num = num.replace(".", "").replace(",", ".")
+    elif _THOUSANDS_RE.match(num) or num.count(".") > 1:
+        num = num.replace(".", "")
+    try:
+        return _round(Decimal(num))
+    except InvalidOperation:
+        return None
+
+
+def _to_str(v):
+    return None if v is None else str(v)
+
+
+def _as_list(v) -> list:
+    # un precio / tipo suelto (int o str) cuenta como lista de uno
+    if v is None:
+        return []
+    if isinstance(v, (list, tuple)):
+        return list(v)
+    return [v]
+
+
+def _partition(root: Path, ts: int) -> Path:
+    return root / f"date={datetime.fromtimestamp(ts):%Y-%m-%d}"
+
+
+class PriceStore:
+    """
+    Observaciones de precio en Parquet particionado por día (data/prices/date=YYYY-MM-DD/).
+    Acumula en memoria y escribe un archivo chico por flush; compact() los junta por día.
+    """
+
+    def __init__(self, root=PRICES_DIR, run_id: str = "", flush_rows: int = 5000, enabled: bool = True):
+        self.root = Path(root)
+        self.run_id = run_id
+        self.flush_rows = flush_rows
+        self.enabled = HAS_ARROW and enabled
+        self._rows = []
+        self._parts = 0
+        self._lock = threading.Lock()
+        if self.enabled:
+            atexit.register(self.close)
+
+    def add(self, brand, model, version, price_type, price, source, collection, ts: int | None = None):
+        if not self.enabled:
+            return
+        row = {
+            # en el runner en proceso cada job trae su run_id; si no, el del proceso
+            "run_id": _jobscope.current().run_id or self.run_id,
+            "ts": int(ts or time.time()),
+            "brand": _to_str(brand),
+            "model": _to_str(model),
+            "version": _to_str(version),
+            "price_type": _to_str(price_type),
+            "price": _to_int(price),
+            "source": _to_str(source),
+            "collection": collection,
+        }
+        with self._lock:
+            self._rows.append(row)
+            full = len(self._rows) >= self.flush_rows
+        if full:
+            self.flush()
+
+    def add_prices(self, brand, model, version, tiposprecio, precio, source, collection, ts: int | None = None):
+        """Una fila por tipo de precio (tiposprecio[i] -> precio[i])."""
+        for price_type, price in zip(_as_list(tiposprecio), _as_list(precio)):
+            self.add(brand, model, version, price_type, price, source, collection, ts=ts)
+
+    def flush(self) -> int:
+        if not self.enabled:
+            return 0
+        with self._lock:
+            rows = self._rows
+            self._rows = []
+            if not rows:
+                return 0
+            self._parts += 1
+            part = self._parts
+
+        pa, _, pq, schema = _arrow()
+        by_day = {}
+        for r in rows:
+            by_day.setdefault(_partition(self.root, r["ts"]), []).append(r)
+
+        for folder, day_rows in by_day.items():
+            folder.mkdir(parents=True, exist_ok=True)
+            table = pa.Table.from_pylist(day_rows, schema=schema)
+            pq.write_table(table, folder / f"part-{self.run_id}-{part:04d}.parquet", compression="zstd")
+        return len(rows)
+
+    def close(self):
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"[PRICES][ERROR] no se pudo escribir parquet: {e}", flush=True)
+
+
+# ===================== LECTURA / MANTENIMIENTO =====================
+
+def compact(root=PRICES_DIR, day: str | None = None) -> dict:
+    """Junta los part-*.parquet de un día (default: todos los días) en un solo archivo ordenado."""
+    if not HAS_ARROW:
+        raise RuntimeError("pyarrow no está instalado")
+    pa, _, pq, schema = _arrow()
+
+    root = Path(root)
+    folders = [root / f"date={day}"] if day else sorted(root.glob("date=*"))
+    out = {}
+    for folder in folders:
+        parts = sorted(folder.glob("*.parquet"))
+        if len(parts) <= 1:
+            continue
+        table = pa.concat_tables([pq.read_table(p, schema=schema) for p in parts])
+        table = table.sort_by([("brand", "ascending"), ("model", "ascending"), ("ts", "ascending")])
+
+        tmp = folder / f"compact-{int(time.time())}.parquet.tmp"
+        pq.write_table(table, tmp, compression="zstd", row_group_size=128_000)
+        final = tmp.with_suffix("")
+        tmp.rename(final)
+        for p in parts:
+            if p != final:
+                p.unlink()
+        out[folder.name] = {"files": len(parts), "rows": table.num_rows}
+    return out
+
+
+def scan(root=PRICES_DIR, brand=None, model=None, since: str | None = None, until: str | None = None, columns=None):
+    """Tabla Arrow filtrada por marca/modelo y rango de fechas (YYYY-MM-DD, inclusive)."""
+    if not HAS_ARROW:
+        raise RuntimeError("pyarrow no está instalado")
+    pa, ds, _, schema = _arrow()
+
+    root = Path(root)
+    if not root.exists():
+        return pa.Table.from_pylist([], schema=schema)
+
+    dataset = ds.dataset(root, format="parquet", partitioning="hive", schema=schema.append(pa.field("date", pa.string())))
+    expr = None
+
+    def _and(e):
+        return e if expr is None else expr & e
+
+    if brand:
+        expr = _and(ds.field("brand") == brand)
+    if model:
+        expr = _and(ds.field("model") == model)
+    if since:
+        expr = _and(ds.field("date") >= since)
+    if until:
+        expr = _and(ds.field("date") <= until)
+
+    return dataset.to_table(filter=expr, columns=columns)
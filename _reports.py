@@ -1,4 +1,6 @@
 import json, time, os, sys
+import asyncio, atexit, contextvars, functools, threading
+from contextlib import contextmanager
 from dataclasses import dataclass, asdict
 from typing import Optional, Dict, Any
 
@@ -13,17 +15,64 @@ class RunReport:
     started_at: float = 0.0
     finished_at: float = 0.0
     meta: Optional[Dict[str, Any]] = None  # extras (ej: source urls, warnings, etc)
+    spans: Optional[Dict[str, Dict[str, float]]] = None  # "fase/subfase" -> {total_sec, calls}
+
+
+# timer activo del job; los hilos del pipeline lo heredan (SavePipeline arranca con copy_context)
+_active_var = contextvars.ContextVar("report_timer", default=None)
+# _plugins.run_main pone un dict por job: ahí queda el ReportTimer que cree el main(), también
+# si lo creó dentro de asyncio.run() (otro contexto, el set de _active_var no vuelve)
+_job_slot = contextvars.ContextVar("report_job_slot", default=None)
+
+# nombres de los spans abiertos en el contexto actual (para anidar "a/b/c")
+_stack = contextvars.ContextVar("report_span_stack", default=())
+
 
 class ReportTimer:
-    def __init__(self, brand: str):
+    def __init__(self, brand: str, activate: bool = True):
         self.brand = brand
         self.t0 = time.time()
         self.report = RunReport(brand=brand, started_at=self.t0)
+        self._spans: Dict[str, list] = {}
+        self._lock = threading.Lock()
+        self._exit_registered = False
+        if activate:
+            _active_var.set(self)
+            slot = _job_slot.get()
+            if slot is not None:
+                slot["timer"] = self
+
+    # ---------- spans ----------
+
+    @contextmanager
+    def span(self, name: str):
+        path = _stack.get() + (name,)
+        token = _stack.set(path)
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            dt = time.perf_counter() - t
+            _stack.reset(token)
+            with self._lock:
+                acc = self._spans.setdefault("/".join(path), [0.0, 0])
+                acc[0] += dt
+                acc[1] += 1
+
+    def timed(self, name: Optional[str] = None):
+        return _decorate(lambda n: self.span(n), name)
+
+    def spans_summary(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {k: {"total_sec": round(v[0], 3), "calls": v[1]} for k, v in sorted(self._spans.items())}
+
+    # ---------- resultado ----------
 
     def finalize(self, **kwargs):
         t1 = time.time()
         self.report.finished_at = t1
         self.report.duration_sec = round(t1 - self.t0, 3)
+        self.report.spans = self.spans_summary() or None
         for k, v in kwargs.items():
             if hasattr(self.report, k):
                 setattr(self.report, k, v)
@@ -35,3 +84,85 @@ class ReportTimer:
     def print_result_line(self):
         payload = asdict(self.report)
         print("__RESULT__=" + json.dumps(payload, ensure_ascii=False), flush=True)
+
+    def print_on_exit(self, stats: Optional[Dict[str, Any]] = None):
+        """Imprime __RESULT__ al salir del proceso (cubre todos los sys.exit del main)."""
+        def _emit():
+            self.finalize(**counts_from_stats(stats or {}))
+            self.print_result_line()
+
+        self._exit_hook = _emit
+        self._exit_registered = True
+        atexit.register(_emit)
+
+    def cancel_exit_hook(self):
+        if self._exit_registered:
+            atexit.unregister(self._exit_hook)
+            self._exit_registered = False
+
+
+def counts_from_stats(stats: Dict[str, Any]) -> Dict[str, int]:
+    """models/versions/items/errors de RunReport a partir del dict stats de un orq_*."""
+    errors = sum(v for k, v in stats.items() if k.endswith("_errors") and isinstance(v, int))
+    return {
+        "models": stats.get("models_found", 0) or 0,
+        "versions": stats.get("versions_found", stats.get("rows_extracted", 0)) or 0,
+        "items": stats.get("saved_ok", 0) or 0,
+        "errors": errors,
+    }
+
+
+def current() -> Optional[ReportTimer]:
+    return _active_var.get()
+
+
+def release(timer: ReportTimer):
+    """El runner en proceso ya tomó los spans: que no imprima al salir."""
+    timer.cancel_exit_hook()
+
+
+# ===================== HELPERS PARA LOS SCRAPERS =====================
+
+@contextmanager
+def span(name: str):
+    """with span("navegacion"): ...  (no hace nada si no hay ReportTimer activo)"""
+    timer = current()
+    if timer is None:
+        yield
+        return
+    with timer.span(name):
+        yield
+
+
+def _decorate(make_span, name):
+    def deco(fn):
+        label = name or fn.__name__
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def awrapper(*args, **kwargs):
+                with make_span(label):
+                    return await fn(*args, **kwargs)
+            return awrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with make_span(label):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+def timed(name: Optional[str] = None):
+    """@timed() / @timed("filtros/click"): span con el nombre de la función (sync o async)."""
+    return _decorate(span, name)
+
+
+def instrument(namespace: dict, *names: str, prefix: str = ""):
+    """
+    Envuelve en su lugar helpers ya definidos de un módulo:
+        instrument(globals(), "close_overlays", "extract_cards")
+    """
+    for n in names:
+        fn = namespace.get(n)
+        if callable(fn) and not hasattr(fn, "__wrapped__"):
+            namespace[n] = timed(prefix + n)(fn)
@@ -0,0 +1,241 @@
+import os
+import threading
+import time
+from pathlib import Path
+
+# psutil es opcional: sin él se lee /proc (Linux); en otros sistemas el monitor queda apagado
+try:
+    import psutil
+    HAS_PSUTIL = True
+except Exception:
+    HAS_PSUTIL = False
+
+HAS_PROCFS = Path("/proc/self/stat").exists()
+
+SAMPLE_INTERVAL_SEC = 2.0
+MB = 1024 * 1024
+
+
+# ===================== LECTURA DE PROCESOS =====================
+
+class _ProcSnapshot:
+    """Una foto de todos los procesos: ppid, rss y tiempo de CPU acumulado por pid."""
+
+    _PAGE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+    _TICK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+    def __init__(self):
+        self.ppid, self.rss, self.cpu = {}, {}, {}
+        if HAS_PSUTIL:
+            for p in psutil.process_iter(["ppid", "memory_info", "cpu_times"]):
+                info = p.info
+                if info["memory_info"] is None or info["cpu_times"] is None:
+                    continue
+                self.ppid[p.pid] = info["ppid"]
+                self.rss[p.pid] = info["memory_info"].rss
+                self.cpu[p.pid] = info["cpu_times"].user + info["cpu_times"].system
+            return
+
+        for entry in os.scandir("/proc"):
+            if not entry.name.isdigit():
+                continue
+            pid = int(entry.name)
+            try:
+                with open(f"/proc/{pid}/stat", "rb") as f:
+                    fields = f.read().rsplit(b")", 1)[1].split()
+                with open(f"/proc/{pid}/statm", "rb") as f:
+                    rss_pages = int(f.read().split()[1])
+            except (OSError, IndexError, ValueError):
+                continue  # el proceso terminó mientras se leía
+            self.ppid[pid] = int(fields[1])
+            self.cpu[pid] = (int(fields[11]) + int(fields[12])) / self._TICK
+            self.rss[pid] = rss_pages * self._PAGE
+
+    def tree(self, root: int) -> list[int]:
+        children = {}
+        for pid, ppid in self.ppid.items():
+            children.setdefault(ppid, []).append(pid)
+        out, stack = [], [root]
+        while stack:
+            pid = stack.pop()
+            if pid in self.ppid:
+                out.append(pid)
+            stack.extend(children.get(pid, ()))
+        return out
+
+
+def _system_usage(prev_cpu):
+    """(% memoria usada, % CPU desde la muestra anterior, estado CPU para la próxima)."""
+    if HAS_PSUTIL:
+        return psutil.virtual_memory().percent, psutil.cpu_percent(None), None
+
+    mem = {}
+    with open("/proc/meminfo") as f:
+        for line in f:
+            k, v = line.split(":", 1)
+            mem[k] = int(v.split()[0])
+    mem_pct = 100.0 * (1 - mem.get("MemAvailable", mem["MemFree"]) / mem["MemTotal"])
+
+    with open("/proc/stat") as f:
+        vals = [int(x) for x in f.readline().split()[1:]]
+    idle, total = vals[3] + (vals[4] if len(vals) > 4 else 0), sum(vals)
+    cpu_pct = 0.0
+    if prev_cpu:
+        d_total, d_idle = total - prev_cpu[1], idle - prev_cpu[0]
+        cpu_pct = 100.0 * (1 - d_idle / d_total) if d_total > 0 else 0.0
+    return mem_pct, cpu_pct, (idle, total)
+
+
+# ===================== MONITOR =====================
+
+class _JobUsage:
+    def __init__(self, pid, cap_bytes, on_cap):
+        self.pid = pid
+        self.cap_bytes = cap_bytes
+        self.on_cap = on_cap
+        self.samples = 0
+        self.rss_peak = 0
+        self.rss_sum = 0
+        self.cpu_peak = 0.0
+        self.cpu_sum = 0.0
+        self.procs_peak = 0
+        self.killed = False
+        self._last_cpu = None
+        self._last_t = None
+
+    def summary(self) -> dict:
+        n = max(1, self.samples)
+        return {
+            "rss_peak_mb": round(self.rss_peak / MB, 1),
+            "rss_avg_mb": round(self.rss_sum / n / MB, 1),
+            "cpu_peak_pct": round(self.cpu_peak, 1),
+            "cpu_avg_pct": round(self.cpu_sum / n, 1),
+            "procs_peak": self.procs_peak,
+            "samples": self.samples,
+            "killed_mem_cap": self.killed,
+        }
+
+
+class ResourceMonitor:
+    """
+    Muestrea cada `interval` s el RSS y CPU de cada árbol de procesos registrado
+    (python + chromium hijos) y el uso global de la máquina.
+
+    - admit(): bloquea hasta que memoria y CPU estén bajo los techos (siempre deja correr
+      al menos un job, para no trabarse si la máquina ya viene cargada); unregister() libera
+    - cap por job: si el árbol pasa `max_rss_mb` se llama on_cap() (matar el grupo)
+    """
+
+    def __init__(self, max_mem_pct: float = 85.0, max_cpu_pct: float = 90.0, interval: float = SAMPLE_INTERVAL_SEC):
+        self.max_mem_pct = max_mem_pct
+        self.max_cpu_pct = max_cpu_pct
+        self.interval = interval
+        self.enabled = HAS_PSUTIL or HAS_PROCFS
+        self.mem_pct = 0.0
+        self.cpu_pct = 0.0
+        self._jobs = {}
+        self._running = 0
+        self._last_admit = 0.0
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._prev_cpu = None
+        self._thread = None
+        if not self.enabled:
+            print("[RESOURCES][WARN] sin psutil ni /proc: no hay control de memoria/CPU", flush=True)
+
+    def start(self):
+        if self.enabled and self._thread is None:
+            self._sample()
+            self._thread = threading.Thread(target=self._loop, name="resource-monitor", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval * 2)
+        with self._cond:
+            self._cond.notify_all()
+
+    # ---------- jobs ----------
+
+    def admit(self, name: str = "", timeout: float | None = None) -> bool:
+        if not self.enabled:
+            return True
+        deadline = None if timeout is None else time.time() + timeout
+        waited = False
+        with self._cond:
+            while self._running and (self._over_limits() or time.time() - self._last_admit < self.interval):
+                if not waited and self._over_limits():
+                    print(f"[RESOURCES] {name} en espera: mem={self.mem_pct:.0f}% cpu={self.cpu_pct:.0f}%", flush=True)
+                    waited = True
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(timeout=min(remaining, self.interval) if remaining is not None else self.interval)
+            # el cupo se libera en unregister(); entre admisiones pasa al menos una muestra
+            self._running += 1
+            self._last_admit = time.time()
+        return True
+
+    def _over_limits(self) -> bool:
+        return self.mem_pct >= self.max_mem_pct or self.cpu_pct >= self.max_cpu_pct
+
+    def register(self, key, pid: int, max_rss_mb: float | None = None, on_cap=None):
+        with self._cond:
+            cap = max_rss_mb * MB if max_rss_mb else None
+            self._jobs[key] = _JobUsage(pid, cap, on_cap)
+
+    def unregister(self, key) -> dict:
+        """Libera el cupo tomado en admit() (llamar siempre, aunque el proceso no haya arrancado)."""
+        with self._cond:
+            usage = self._jobs.pop(key, None)
+            if self.enabled:
+                self._running = max(0, self._running - 1)
+            self._cond.notify_all()
+        return usage.summary() if usage else {}
+
+    # ---------- muestreo ----------
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self._sample()
+            except Exception as e:
+                print(f"[RESOURCES][WARN] muestreo falló: {e}", flush=True)
+
+    def _sample(self):
+        mem_pct, cpu_pct, self._prev_cpu = _system_usage(self._prev_cpu)
+        snap = _ProcSnapshot()
+        now = time.time()
+        to_kill = []
+
+        with self._cond:
+            self.mem_pct, self.cpu_pct = mem_pct, cpu_pct
+            for u in self._jobs.values():
+                pids = snap.tree(u.pid)
+                if not pids:
+                    continue
+                rss = sum(snap.rss.get(p, 0) for p in pids)
+                cpu = sum(snap.cpu.get(p, 0.0) for p in pids)
+                cpu_pct_job = 0.0
+                if u._last_cpu is not None and now > u._last_t:
+                    cpu_pct_job = max(0.0, 100.0 * (cpu - u._last_cpu) / (now - u._last_t))
+                u._last_cpu, u._last_t = cpu, now
+
+                u.samples += 1
+                u.rss_sum += rss
+                u.rss_peak = max(u.rss_peak, rss)
+                u.cpu_sum += cpu_pct_job
+                u.cpu_peak = max(u.cpu_peak, cpu_pct_job)
+                u.procs_peak = max(u.procs_peak, len(pids))
+
+                if u.cap_bytes and rss > u.cap_bytes and not u.killed:
+                    u.killed = True
+                    to_kill.append((u, rss))
+            self._cond.notify_all()
+
+        for u, rss in to_kill:
+            print(f"[RESOURCES] pid {u.pid} supera el cap de memoria ({rss / MB:.0f} MB > {u.cap_bytes / MB:.0f} MB): se mata", flush=True)
+            if u.on_cap:
+                u.on_cap()
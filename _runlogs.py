@@ -0,0 +1,343 @@
+import gzip
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# zstandard es opcional: sin él se usa gzip
+try:
+    import zstandard
+    HAS_ZSTD = True
+except Exception:
+    HAS_ZSTD = False
+
+LOG_DIR = Path("runs/logs")
+LOG_CODEC = os.getenv("LOG_CODEC", "zstd" if HAS_ZSTD else "gzip")
+CHUNK_LINES = 2000          # líneas por bloque comprimido independiente
+FLUSH_SEC = float(os.getenv("LOG_FLUSH_SEC", "5"))  # un bloque a medio llenar se escribe a lo más a los N s
+MAX_INDEXED_ERRORS = 200    # líneas de error guardadas en el índice
+RETENTION_DAYS = int(os.getenv("LOG_RETENTION_DAYS", "30"))
+
+_SUFFIX = {"gzip": ".log.gz", "zstd": ".log.zst"}
+_NAME_RE = re.compile(r"^(?P<job>.+)-(?P<ts>\d{8}-\d{6})-attempt(?P<attempt>\d+)\.log(\.gz|\.zst)?$")
+
+_ERROR_RE = re.compile(r"\[(ERROR|FATAL)\]|Traceback \(most recent call last\)|❌|\bException\b")
+_WARN_RE = re.compile(r"\[WARN|⚠️")
+
+
+def severity(line: str) -> str | None:
+    if _ERROR_RE.search(line):
+        return "error"
+    if _WARN_RE.search(line):
+        return "warn"
+    return None
+
+
+def _compress(codec: str, data: bytes) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=6).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def _decompress(codec: str, data: bytes) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def _frames(codec: str, data: bytes):
+    """(offset, largo, texto) de cada frame completo; se corta en el primero truncado o corrupto."""
+    offset = 0
+    while offset < len(data):
+        if codec == "zstd":
+            d = zstandard.ZstdDecompressor().decompressobj()
+        else:
+            d = zlib.decompressobj(wbits=31)  # un miembro gzip
+        try:
+            raw = d.decompress(data[offset:])
+        except Exception:
+            return
+        if not getattr(d, "eof", True):
+            return  # último frame a medio escribir
+        length = len(data) - offset - len(d.unused_data)
+        yield offset, length, raw.decode("utf-8", "replace")
+        offset += length
+
+
+# ===================== ESCRITURA =====================
+
+class RunLog:
+    """
+    Log de un intento escrito en streaming y comprimido por bloques de CHUNK_LINES líneas.
+    Cada bloque es un frame gzip/zstd independiente (el archivo completo sigue siendo
+    un .gz/.zst válido) y el índice {base}.idx.json guarda su offset, rango de líneas
+    y si contiene errores, para poder leer solo los bloques que interesan.
+
+    Un bloque a medio llenar se escribe a los FLUSH_SEC segundos y el índice se reescribe
+    después de cada bloque ("finished_at": None hasta close()): si el proceso muere se
+    pierden a lo más FLUSH_SEC segundos de log. Sin índice, list_logs lo reconstruye
+    recorriendo los frames.
+    """
+
+    def __init__(self, job: str, attempt: int = 1, directory=LOG_DIR, codec: str = LOG_CODEC):
+        if codec == "zstd" and not HAS_ZSTD:
+            codec = "gzip"
+        self.codec = codec
+        self.job = job
+        self.attempt = attempt
+        self.started_at = time.time()
+        self.dir = Path(directory)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        base = f"{job}-{datetime.fromtimestamp(self.started_at):%Y%m%d-%H%M%S}-attempt{attempt}"
+        self.path = self.dir / (base + _SUFFIX[codec])
+        self.index_path = self.dir / (base + ".idx.json")
+
+        self._f = open(self.path, "wb")
+        self._lock = threading.Lock()
+        self._buf = []
+        self._timer = None
+        self._chunk_first = 1
+        self._chunk_sev = set()
+        self.lines = 0
+        self.raw_bytes = 0
+        self.chunks = []
+        self.errors = []
+        self.counts = {"error": 0, "warn": 0}
+        self.meta = {}
+
+    def write_line(self, line: str):
+        line = line.rstrip("\n")
+        with self._lock:
+            self.lines += 1
+            sev = severity(line)
+            if sev:
+                self.counts[sev] += 1
+                self._chunk_sev.add(sev)
+                if sev == "error" and len(self.errors) < MAX_INDEXED_ERRORS:
+                    self.errors.append([self.lines, line[:500]])
+            self._buf.append(line)
+            if len(self._buf) >= CHUNK_LINES:
+                self._flush_chunk()
+            elif self._timer is None:
+                self._timer = threading.Timer(FLUSH_SEC, self._on_timer)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _on_timer(self):
+        with self._lock:
+            self._timer = None
+            if not self._f.closed:
+                self._flush_chunk()
+
+    def _flush_chunk(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._buf:
+            return
+        raw = ("\n".join(self._buf) + "\n").encode("utf-8", "replace")
+        data = _compress(self.codec, raw)
+        offset = self._f.tell()
+        self._f.write(data)
+        self._f.flush()
+        self.chunks.append({
+            "offset": offset,
+            "length": len(data),
+            "first_line": self._chunk_first,
+            "lines": len(self._buf),
+            "severity": sorted(self._chunk_sev),
+        })
+        self.raw_bytes += len(raw)
+        self._chunk_first += len(self._buf)
+        self._buf = []
+        self._chunk_sev = set()
+        self._write_index(finished=False)
+
+    def _write_index(self, finished: bool):
+        # counts / errors cubren solo lo ya escrito en bloques (el buffer quedó vacío al llegar acá)
+        index = {
+            "job": self.job,
+            "attempt": self.attempt,
+            "codec": self.codec,
+            "file": self.path.name,
+            "started_at": self.started_at,
+            "finished_at": time.time() if finished else None,
+            "lines": self._chunk_first - 1,
+            "raw_bytes": self.raw_bytes,
+            "compressed_bytes": self._f.tell(),
+            "counts": self.counts,
+            "errors": self.errors,
+            "chunks": self.chunks,
+            **self.meta,
+        }
+        tmp = self.index_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(index, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.index_path)
+
+    def close(self, **meta):
+        with self._lock:
+            if self._f.closed:
+                return
+            self._flush_chunk()
+            self.meta.update(meta)
+            self._write_index(finished=True)
+            self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ===================== LECTURA =====================
+
+def rebuild_index(path: Path) -> dict:
+    """
+    Índice de un .gz/.zst sin .idx.json (proceso muerto antes del primer índice, o de antes
+    de que se reescribiera por bloque), recorriendo los frames completos del archivo.
+    """
+    path = Path(path)
+    codec = "zstd" if path.suffix == ".zst" else "gzip"
+    m = _NAME_RE.match(path.name)
+    index = {
+        "job": m.group("job") if m else path.name.split(".log")[0],
+        "attempt": int(m.group("attempt")) if m else 1,
+        "codec": codec,
+        "file": path.name,
+        "started_at": (datetime.strptime(m.group("ts"), "%Y%m%d-%H%M%S").timestamp() if m
+                       else path.stat().st_mtime),
+        "finished_at": None,
+        "recovered": True,
+        "lines": 0,
+        "raw_bytes": 0,
+        "compressed_bytes": 0,
+        "counts": {"error": 0, "warn": 0},
+        "errors": [],
+        "chunks": [],
+    }
+    if codec == "zstd" and not HAS_ZSTD:
+        return index
+    data = path.read_bytes()
+    for offset, length, text in _frames(codec, data):
+        lines = text.split("\n")
+        if lines and lines[-1] == "":
+            lines.pop()
+        sev_chunk = set()
+        for i, line in enumerate(lines, index["lines"] + 1):
+            sev = severity(line)
+            if sev:
+                index["counts"][sev] += 1
+                sev_chunk.add(sev)
+                if sev == "error" and len(index["errors"]) < MAX_INDEXED_ERRORS:
+                    index["errors"].append([i, line[:500]])
+        index["chunks"].append({
+            "offset": offset,
+            "length": length,
+            "first_line": index["lines"] + 1,
+            "lines": len(lines),
+            "severity": sorted(sev_chunk),
+        })
+        index["lines"] += len(lines)
+        index["raw_bytes"] += len(text.encode("utf-8"))
+        index["compressed_bytes"] = offset + length
+    return index
+
+
+class LogEntry:
+    """Un log en disco: comprimido con índice (propio o reconstruido), o .log plano de antes."""
+
+    def __init__(self, path: Path, index: dict | None = None):
+        self.path = path
+        self.index = index
+        m = _NAME_RE.match(path.name)
+        self.job = (index or {}).get("job") or (m.group("job") if m else path.stem)
+        self.attempt = int((index or {}).get("attempt") or (m.group("attempt") if m else 1))
+        if index:
+            self.started = datetime.fromtimestamp(index["started_at"])
+        elif m:
+            self.started = datetime.strptime(m.group("ts"), "%Y%m%d-%H%M%S")
+        else:
+            self.started = datetime.fromtimestamp(path.stat().st_mtime)
+
+    def iter_lines(self, only_severity: str | None = None):
+        """(n° de línea, texto). Con only_severity solo descomprime los bloques que la tienen."""
+        if self.index is None:
+            with open(self.path, "r", encoding="utf-8", errors="replace") as f:
+                for n, line in enumerate(f, 1):
+                    yield n, line.rstrip("\n")
+            return
+
+        codec = self.index["codec"]
+        with open(self.path, "rb") as f:
+            for ch in self.index["chunks"]:
+                if only_severity and only_severity not in ch["severity"]:
+                    continue
+                f.seek(ch["offset"])
+                text = _decompress(codec, f.read(ch["length"])).decode("utf-8", "replace")
+                for i, line in enumerate(text.split("\n")[:ch["lines"]]):
+                    yield ch["first_line"] + i, line
+
+
+def list_logs(directory=LOG_DIR, job: str | None = None, since: datetime | None = None,
+              until: datetime | None = None) -> list[LogEntry]:
+    directory = Path(directory)
+    if not directory.exists():
+        return []
+    out = []
+    for p in directory.iterdir():
+        if p.name.endswith(".idx.json") or not _NAME_RE.match(p.name):
+            continue
+        index = None
+        if p.suffix in (".gz", ".zst"):
+            idx_path = directory / (p.name.split(".log")[0] + ".idx.json")
+            if idx_path.exists():
+                try:
+                    index = json.loads(idx_path.read_text(encoding="utf-8"))
+                except ValueError:
+                    index = None
+            # sin índice, o sin cerrar y con frames escritos después del último índice
+            # (el proceso murió entre el bloque y su índice): se reconstruye de los frames
+            if index is None or (index.get("finished_at") is None
+                                 and p.stat().st_size > index.get("compressed_bytes", 0)):
+                index = rebuild_index(p)
+        e = LogEntry(p, index)
+        if job and e.job != job:
+            continue
+        if since and e.started < since:
+            continue
+        if until and e.started >= until:
+            continue
+        out.append(e)
+    return sorted(out, key=lambda e: (e.started, e.job, e.attempt))
+
+
+def prune(directory=LOG_DIR, keep_days: int = RETENTION_DAYS, dry_run: bool = False,
+          plain: bool = False) -> list[Path]:
+    """
+    Borra logs comprimidos (y su índice) más viejos que keep_days: inicio del intento y
+    última escritura (mtime), así un intento largo que sigue escribiendo no se toca.
+    Los .log planos de antes (algunos versionados en git) solo con plain=True.
+    """
+    if keep_days <= 0:
+        return []
+    cutoff = datetime.now() - timedelta(days=keep_days)
+    removed = []
+    for e in list_logs(directory, until=cutoff):
+        if e.index is None and not plain:
+            continue
+        if datetime.fromtimestamp(e.path.stat().st_mtime) >= cutoff:
+            continue
+        paths = [e.path]
+        idx_path = Path(directory) / (e.path.name.split(".log")[0] + ".idx.json")
+        if e.index is not None and idx_path.exists():
+            paths.append(idx_path)
+        for p in paths:
+            if not dry_run:
+                p.unlink(missing_ok=True)
+            removed.append(p)
+    return removed
@@ -0,0 +1,81 @@
+import heapq
+import json
+import os
+import statistics
+import threading
+from pathlib import Path
+
+HISTORY_PATH = Path("state/job_history.json")
+WINDOW = 10                 # corridas que se guardan por job
+DEFAULT_DURATION_SEC = 300  # job sin historial
+
+
+class JobHistory:
+    """
+    Historial móvil por job: duración de las últimas WINDOW corridas y si fallaron.
+    Archivo JSON chico en state/, se reescribe completo (tmp + rename) al guardar.
+    """
+
+    def __init__(self, path=HISTORY_PATH, window: int = WINDOW):
+        self.path = Path(path)
+        self.window = window
+        self._lock = threading.Lock()
+        self.data = {}
+        if self.path.exists():
+            try:
+                self.data = json.loads(self.path.read_text(encoding="utf-8"))
+            except Exception as e:
+                print(f"[SCHED][WARN] historial ilegible ({e}), se parte de cero", flush=True)
+
+    def record(self, job: str, duration_sec: float, success: bool):
+        with self._lock:
+            runs = self.data.setdefault(job, [])
+            runs.append({"d": round(float(duration_sec), 2), "ok": bool(success)})
+            del runs[:-self.window]
+
+    def save(self):
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(self.data, indent=1), encoding="utf-8")
+            os.replace(tmp, self.path)
+
+    # ---------- estimaciones ----------
+
+    def expected_duration(self, job: str) -> float:
+        runs = self.data.get(job)
+        if runs:
+            return statistics.median(r["d"] for r in runs)
+        known = [statistics.median(r["d"] for r in rs) for rs in self.data.values() if rs]
+        return statistics.mean(known) if known else DEFAULT_DURATION_SEC
+
+    def failure_rate(self, job: str) -> float:
+        runs = self.data.get(job) or []
+        return sum(not r["ok"] for r in runs) / len(runs) if runs else 0.0
+
+    def fail_at(self, job: str) -> float:
+        # en qué segundo suele morir cuando falla (0 si nunca falló)
+        fails = [r["d"] for r in self.data.get(job) or [] if not r["ok"]]
+        return statistics.median(fails) if fails else 0.0
+
+    def expected_cost(self, job: str, retries: int = 0) -> float:
+        # duración esperada contando los reintentos que probablemente hagan falta
+        return self.expected_duration(job) * (1 + self.failure_rate(job) * retries)
+
+    def priority(self, job: str, retries: int = 0) -> float:
+        # LPT + adelantar lo que suele fallar tarde (deja margen para reintentar)
+        return self.expected_cost(job, retries) + self.failure_rate(job) * self.fail_at(job)
+
+
+def order_jobs(jobs, history: JobHistory, key=lambda j: j, retries=lambda j: 0) -> list:
+    """Longest-job-first: más caro primero; empates mantienen el orden original."""
+    return sorted(jobs, key=lambda j: -history.priority(key(j), retries(j)))
+
+
+def predict_makespan(costs, workers: int) -> float:
+    """Simula el pool (cada worker libre toma el siguiente job de la lista)."""
+    heap = [0.0] * max(1, workers)
+    for c in costs:
+        t = heapq.heappop(heap)
+        heapq.heappush(heap, t + c)
+    return max(heap) if costs else 0.0
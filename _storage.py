@@ -0,0 +1,256 @@
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+
+
+# Límite duro de operaciones por WriteBatch en Firestore
+FIRESTORE_BATCH_LIMIT = 500
+
+DEFAULT_CREDENTIALS = "carscrapping-2225c-firebase-adminsdk-fbsvc-6abe929cb8.json"
+
+
+@dataclass(frozen=True)
+class Increment:
+    """Incremento atómico de un campo numérico, independiente del backend."""
+    value: int = 1
+
+
+# ===================== FIRESTORE =====================
+
+class FirestoreStorage:
+    """
+    Backend Firestore. firebase_admin se importa e inicializa recién en el primer uso,
+    así importar utils no paga el arranque ni necesita red.
+
+    Cada fila de commit() es (collection, doc_id, data, merge).
+    """
+
+    name = "firestore"
+
+    def __init__(self, credentials_path: str = DEFAULT_CREDENTIALS, mode: str = "batch"):
+        self.credentials_path = credentials_path
+        self.mode = mode
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    import firebase_admin
+                    from firebase_admin import credentials, firestore
+
+                    if not firebase_admin._apps:
+                        cred = credentials.Certificate(self.credentials_path)
+                        firebase_admin.initialize_app(cred)
+                    self._client = firestore.client()
+        return self._client
+
+    def _resolve(self, data: dict) -> dict:
+        if not any(isinstance(v, Increment) for v in data.values()):
+            return data
+        from firebase_admin import firestore
+        return {k: firestore.Increment(v.value) if isinstance(v, Increment) else v for k, v in data.items()}
+
+    def new_id(self, collection: str) -> str:
+        return self.client.collection(collection).document().id
+
+    def set(self, collection: str, doc_id: str, data: dict, merge: bool = False):
+        self.client.collection(collection).document(doc_id).set(self._resolve(data), merge=merge)
+
+    def delete(self, collection: str, doc_id: str):
+        self.client.collection(collection).document(doc_id).delete()
+
+    def find(self, collection: str, filters: dict | None = None, fields: list | None = None):
+        from google.cloud.firestore_v1.base_query import FieldFilter
+
+        query = self.client.collection(collection)
+        for field, value in (filters or {}).items():
+            query = query.where(filter=FieldFilter(field, "==", value))
+        if fields:
+            query = query.select(list(fields))
+        for doc in query.stream():
+            yield doc.id, (doc.to_dict() or {})
+
+    def commit(self, rows) -> list[bool]:
+        """Escribe las filas y devuelve, por fila, si quedó confirmada."""
+        if self.mode == "bulk":
+            return self._commit_bulk(rows)
+        return self._commit_batches(rows)
+
+    def _commit_batches(self, rows):
+        ok = []
+        for i in range(0, len(rows), FIRESTORE_BATCH_LIMIT):
+            chunk = rows[i:i + FIRESTORE_BATCH_LIMIT]
+            try:
+                batch = self.client.batch()
+                for collection, doc_id, data, merge in chunk:
+                    ref = self.client.collection(collection).document(doc_id)
+                    batch.set(ref, self._resolve(data), merge=merge)
+                batch.commit()
+                ok += [True] * len(chunk)
+            except Exception as e:
+                ok += [False] * len(chunk)
+                print(f"[STORAGE][ERROR] commit de {len(chunk)} filas falló: {e}", flush=True)
+        return ok
+
+    def _commit_bulk(self, rows):
+        done = set()
+        lock = threading.Lock()
+
+        def on_result(doc_ref, result, bw):
+            with lock:
+                done.add(doc_ref.path)
+
+        def on_error(failure, bw):
+            # reintenta hasta 3 veces; después se cuenta como fallida
+            if failure.attempts < 3:
+                return True
+            print(f"[STORAGE][ERROR] bulk write falló: {failure.message}", flush=True)
+            return False
+
+        try:
+            bw = self.client.bulk_writer()
+            bw.on_write_result(on_result)
+            bw.on_write_error(on_error)
+            for collection, doc_id, data, merge in rows:
+                ref = self.client.collection(collection).document(doc_id)
+                bw.set(ref, self._resolve(data), merge=merge)
+            bw.close()
+        except Exception as e:
+            print(f"[STORAGE][ERROR] bulk writer falló: {e}", flush=True)
+
+        return [f"{collection}/{doc_id}" in done for collection, doc_id, _, _ in rows]
+
+
+# ===================== SQLITE =====================
+
+class SQLiteStorage:
+    """
+    Stand-in local: una tabla (collection, id, data JSON). Sirve para dry runs,
+    benchmarks y desarrollo sin red.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str = "state/local.db"):
+        self.path = path
+        self._conn = None
+        self._init_lock = threading.Lock()
+        self._lock = threading.Lock()
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            with self._init_lock:
+                if self._conn is None:
+                    if self.path != ":memory:":
+                        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+                    conn = sqlite3.connect(self.path, check_same_thread=False)
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS docs ("
+                        " collection TEXT NOT NULL,"
+                        " id TEXT NOT NULL,"
+                        " data TEXT NOT NULL,"
+                        " PRIMARY KEY (collection, id))"
+                    )
+                    self._conn = conn
+        return self._conn
+
+    def new_id(self, collection: str) -> str:
+        return uuid.uuid4().hex[:20]
+
+    def _merge(self, old: dict, data: dict, merge: bool) -> dict:
+        base = dict(old) if merge else {}
+        for k, v in data.items():
+            if isinstance(v, Increment):
+                base[k] = (base.get(k) or 0) + v.value
+            else:
+                base[k] = v
+        return base
+
+    def _set_locked(self, collection, doc_id, data, merge):
+        old = {}
+        if merge:
+            row = self.conn.execute(
+                "SELECT data FROM docs WHERE collection = ? AND id = ?", (collection, doc_id)
+            ).fetchone()
+            if row:
+                old = json.loads(row[0])
+        new = self._merge(old, data, merge)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO docs (collection, id, data) VALUES (?, ?, ?)",
+            (collection, doc_id, json.dumps(new, ensure_ascii=False, default=str)),
+        )
+
+    def set(self, collection: str, doc_id: str, data: dict, merge: bool = False):
+        with self._lock:
+            self._set_locked(collection, doc_id, data, merge)
+            self.conn.commit()
+
+    def delete(self, collection: str, doc_id: str):
+        with self._lock:
+            self.conn.execute("DELETE FROM docs WHERE collection = ? AND id = ?", (collection, doc_id))
+            self.conn.commit()
+
+    def find(self, collection: str, filters: dict | None = None, fields: list | None = None):
+        sql = "SELECT id, data FROM docs WHERE collection = ?"
+        params = [collection]
+        for field, value in (filters or {}).items():
+            sql += " AND json_extract(data, ?) = ?"
+            params += [f'$."{field}"', value]
+
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+
+        for doc_id, raw in rows:
+            data = json.loads(raw)
+            if fields:
+                data = {k: data[k] for k in fields if k in data}
+            yield doc_id, data
+
+    def commit(self, rows) -> list[bool]:
+        with self._lock:
+            try:
+                for collection, doc_id, data, merge in rows:
+                    self._set_locked(collection, doc_id, data, merge)
+                self.conn.commit()
+                return [True] * len(rows)
+            except Exception as e:
+                self.conn.rollback()
+                print(f"[STORAGE][ERROR] commit sqlite de {len(rows)} filas falló: {e}", flush=True)
+                return [False] * len(rows)
+
+
+# ===================== SELECCIÓN =====================
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_storage():
+    """
+    Backend por proceso según STORAGE_BACKEND (firestore | sqlite).
+    No abre conexiones: eso pasa en la primera lectura/escritura.
+    """
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                backend = os.getenv("STORAGE_BACKEND", "firestore").lower()
+                if backend == "sqlite":
+                    _storage = SQLiteStorage(os.getenv("STORAGE_SQLITE_PATH", "state/local.db"))
+                elif backend == "firestore":
+                    _storage = FirestoreStorage(
+                        os.getenv("FIREBASE_CREDENTIALS", DEFAULT_CREDENTIALS),
+                        mode=os.getenv("WRITER_MODE", "batch"),
+                    )
+                else:
+                    raise ValueError(f"STORAGE_BACKEND desconocido: {backend}")
+    return _storage
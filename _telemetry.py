@@ -0,0 +1,218 @@
+import json
+import os
+import sqlite3
+import statistics
+import threading
+import time
+from pathlib import Path
+
+TELEMETRY_DB = Path(os.getenv("TELEMETRY_DB", "state/telemetry.db"))
+RESULT_PREFIX = "__RESULT__="
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS job_runs (
+    run_id       TEXT NOT NULL,
+    ts           INTEGER NOT NULL,
+    runner       TEXT,
+    job          TEXT NOT NULL,
+    success      INTEGER,
+    return_code  INTEGER,
+    duration_sec REAL,
+    models       INTEGER,
+    versions     INTEGER,
+    saved_ok     INTEGER,
+    save_errors  INTEGER,
+    metrics      TEXT
+);
+CREATE INDEX IF NOT EXISTS job_runs_job_ts ON job_runs (job, ts);
+CREATE TABLE IF NOT EXISTS job_phases (
+    run_id    TEXT NOT NULL,
+    job       TEXT NOT NULL,
+    phase     TEXT NOT NULL,
+    total_sec REAL,
+    calls     INTEGER
+);
+CREATE INDEX IF NOT EXISTS job_phases_job ON job_phases (job, phase);
+"""
+
+
+# ===================== PARSEO DE SALIDA =====================
+
+class OutputScanner:
+    """
+    Mira la salida de un job línea a línea y se queda con lo que sirve:
+    RUN_OK, el último JSON con "status" (summary) y el último __RESULT__=.
+    """
+
+    def __init__(self):
+        self.run_ok = False
+        self.summary = None
+        self.result = None
+
+    def feed(self, line: str):
+        line = line.strip()
+        if "RUN_OK" in line:
+            self.run_ok = True
+        if line.startswith(RESULT_PREFIX):
+            try:
+                self.result = json.loads(line[len(RESULT_PREFIX):])
+            except ValueError:
+                pass
+            return
+        if line.startswith("{"):
+            try:
+                parsed = json.loads(line)
+                if isinstance(parsed, dict) and "status" in parsed:
+                    self.summary = parsed
+            except ValueError:
+                pass
+
+    def feed_file(self, path):
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                self.feed(line)
+        return self
+
+
+# ===================== STORE =====================
+
+def _first(*values):
+    for v in values:
+        if v is not None:
+            return v
+    return None
+
+
+class TelemetryStore:
+    """Serie de tiempo de corridas por job (SQLite local, una fila por job por corrida)."""
+
+    def __init__(self, path=TELEMETRY_DB):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn = None
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def record(self, run_id: str, runner: str, job: str, success: bool, duration_sec: float,
+               return_code=None, summary: dict | None = None, result: dict | None = None,
+               resources: dict | None = None, ts: int | None = None):
+        summary = summary or {}
+        result = result or {}
+        job = job.removesuffix(".py")
+        row = (
+            run_id,
+            int(ts or time.time()),
+            runner,
+            job,
+            int(bool(success)),
+            return_code,
+            float(duration_sec or 0),
+            _first(summary.get("models_found"), result.get("models")),
+            _first(summary.get("versions_found"), result.get("versions")),
+            _first(summary.get("saved_ok"), result.get("items")),
+            _first(summary.get("save_errors"), result.get("errors")),
+            json.dumps({"summary": summary, "result": result, "resources": resources or {}}, ensure_ascii=False, default=str),
+        )
+        phases = (result.get("spans") or {}).items()
+        with self._lock:
+            c = self.conn
+            c.execute("INSERT INTO job_runs VALUES (?,?,?,?,?,?,?,?,?,?,?,?)", row)
+            c.executemany(
+                "INSERT INTO job_phases VALUES (?,?,?,?,?)",
+                [(run_id, job, name, s.get("total_sec"), s.get("calls")) for name, s in phases],
+            )
+            c.commit()
+
+    def record_result(self, run_id: str, runner: str, r: dict):
+        """Atajo para los dicts de resultado de orchestrator/plugin_runner/run_jobs."""
+        self.record(
+            run_id,
+            runner,
+            r.get("script") or r.get("job"),
+            r.get("success"),
+            r.get("duration_sec"),
+            return_code=r.get("return_code"),
+            summary=r.get("summary"),
+            result=r.get("result") or r.get("report"),
+            resources=r.get("resources"),
+        )
+
+    def runs(self, job: str | None = None, since_ts: int = 0) -> list[dict]:
+        sql = "SELECT * FROM job_runs WHERE ts >= ?"
+        args = [since_ts]
+        if job:
+            sql += " AND job = ?"
+            args.append(job.removesuffix(".py"))
+        sql += " ORDER BY job, ts"
+        with self._lock:
+            cur = self.conn.execute(sql, args)
+            cols = [d[0] for d in cur.description]
+            return [dict(zip(cols, r)) for r in cur.fetchall()]
+
+    def phases(self, job: str, since_ts: int = 0) -> list[dict]:
+        sql = """
+            SELECT p.phase, COUNT(*) AS runs, AVG(p.total_sec) AS avg_sec, MAX(p.total_sec) AS max_sec, SUM(p.calls) AS calls
+            FROM job_phases p JOIN (SELECT DISTINCT run_id, job FROM job_runs WHERE ts >= ?) r
+              ON r.run_id = p.run_id AND r.job = p.job
+            WHERE p.job = ?
+            GROUP BY p.phase ORDER BY avg_sec DESC
+        """
+        with self._lock:
+            cur = self.conn.execute(sql, (since_ts, job.removesuffix(".py")))
+            cols = [d[0] for d in cur.description]
+            return [dict(zip(cols, r)) for r in cur.fetchall()]
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+# ===================== ESTADÍSTICA =====================
+
+def percentile(values, p: float):
+    vals = sorted(v for v in values if v is not None)
+    if not vals:
+        return None
+    k = (len(vals) - 1) * p
+    lo, hi = int(k), min(int(k) + 1, len(vals) - 1)
+    return round(vals[lo] + (vals[hi] - vals[lo]) * (k - lo), 2)
+
+
+def regression(runs: list[dict], factor: float = 1.3, baseline: int = 7) -> dict | None:
+    """Última corrida vs mediana de las `baseline` anteriores (más lenta o con menos guardados)."""
+    if len(runs) < 2:
+        return None
+    last, prev = runs[-1], runs[-1 - baseline:-1]
+    base_dur = statistics.median(r["duration_sec"] for r in prev)
+    saved = [r["saved_ok"] for r in prev if r["saved_ok"] is not None]
+    base_saved = statistics.median(saved) if saved else None
+
+    flags = []
+    if base_dur and last["duration_sec"] > base_dur * factor:
+        flags.append(f"duración {last['duration_sec']:.0f}s vs {base_dur:.0f}s")
+    if base_saved and last["saved_ok"] is not None and last["saved_ok"] < base_saved / factor:
+        flags.append(f"saved_ok {last['saved_ok']} vs {base_saved:.0f}")
+    if not last["success"] and all(r["success"] for r in prev):
+        flags.append("falló (venía OK)")
+    return {"job": last["job"], "flags": flags} if flags else None
+
+
+def record_all(runner: str, results: list[dict], run_id: str):
+    """Guarda los resultados de una corrida; la telemetría nunca tumba al runner."""
+    if os.getenv("TELEMETRY", "on").lower() == "off":
+        return
+    store = TelemetryStore()
+    try:
+        for r in results:
+            store.record_result(run_id, runner, r)
+    except Exception as e:
+        print(f"[TELEMETRY][WARN] no se pudo guardar: {e}", flush=True)
+    finally:
+        store.close()
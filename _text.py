@@ -0,0 +1,77 @@
+import re
+import unicodedata
+from functools import lru_cache
+
+
+# ===================== PATRONES =====================
+
+# todo lo que no sea [a-z0-9] (separadores /-_ incluidos) colapsa a un espacio
+_NON_ALNUM_RUN = re.compile(r"[^a-z0-9]+")
+
+
+def _build_accent_table() -> dict:
+    """Tabla para str.translate: letras latinas acentuadas -> base, marcas combinantes -> nada."""
+    table = {}
+    for start, end in ((0x00C0, 0x0250), (0x1E00, 0x1F00)):
+        for cp in range(start, end):
+            ch = chr(cp)
+            base = "".join(c for c in unicodedata.normalize("NFD", ch) if unicodedata.category(c) != "Mn")
+            if base != ch:
+                table[cp] = base
+    for cp in range(0x0300, 0x0370):
+        table[cp] = None
+    return table
+
+
+_ACCENTS = _build_accent_table()
+
+
+def _strip_accents(text: str) -> str:
+    if text.isascii():
+        return text
+    text = text.translate(_ACCENTS)
+    if text.isascii():
+        return text
+    # fuera de las tablas latinas: camino lento, mismo resultado que antes
+    text = unicodedata.normalize("NFD", text)
+    return "".join(c for c in text if unicodedata.category(c) != "Mn")
+
+
+# ===================== API =====================
+
+@lru_cache(maxsize=8192)
+def normalize_text(text: str) -> str:
+    if not text:
+        return ""
+    text = _strip_accents(text.lower())
+    return _NON_ALNUM_RUN.sub(" ", text).strip()
+
+
+def normalize_many(texts) -> list[str]:
+    return [normalize_text(t) for t in texts]
+
+
+def tokens_from_norm(norm: str, min_len: int = 2) -> list[str]:
+    # filtrar tokens cortos / basura
+    return sorted({t for t in norm.split(" ") if len(t) >= min_len and not t.isdigit()})
+
+
+def tokenize(text: str, min_len: int = 2) -> list[str]:
+    return tokens_from_norm(normalize_text(text), min_len)
+
+
+def tokenize_many(texts, min_len: int = 2) -> list[list[str]]:
+    return [tokenize(t, min_len) for t in texts]
+
+
+def build_model_search_fields(model: str, model_detail: str | None = None) -> dict:
+    combined = f"{model or ''} {model_detail or ''}".strip()
+    norm = normalize_text(combined)
+    return {
+        "model_norm": norm,
+        "model_tokens": tokens_from_norm(norm),
+    }
+
+
+def build_model_search_fields_many(pairs) -> list[dict]:
+    return [build_model_search_fields(m, d) for m, d in pairs]
@@ -0,0 +1,583 @@
+import asyncio
+import atexit
+import json
+import os
+import re
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from pathlib import Path
+
+import _jobscope
+
+# Esperas por evento en vez de sleeps fijos, con perfil de cuánto bloqueó cada una.
+#
+#   from _waits import dom_quiet, count_stable, scroll_until_stable, selector_ready, load_idle, response
+#   page.goto(url)
+#   n = count_stable(page, ".card-version", "kia/versiones", max_ms=15000)
+#
+#   before = signature(page, "#grilla")        # click que pide datos (filtro, pestaña, select):
+#   tab.click()                                # esperar a que la grilla cambie, no a un DOM quieto,
+#   changed(page, "#grilla", "difor/tab", before)  # que puede llegar antes que la respuesta
+#
+# Cada espera tiene un nombre "sitio/paso": con ese nombre se acumula el perfil (summary()
+# -> run_stats -> telemetría). Solo las esperas de "asentamiento" (dom_quiet, load_idle), cuyo
+# timeout no cambia lo que se extrae, aprenden un timeout adaptativo (state/waits/<sitio>.json);
+# selector_ready / count_stable / changed / response esperan siempre su máximo, porque ahí un timeout
+# significa saltarse datos o quedarse con una lista parcial.
+# Los selectores de estas esperas son CSS puro (corren con querySelectorAll en la página).
+
+WAIT_STATE_DIR = Path("state/waits")
+# WAIT_ADAPTIVE=off: siempre el máximo configurado en cada llamada
+# (solo aplica a dom_quiet / load_idle; tras un timeout con el timeout acortado se reintenta
+# una vez con el máximo y el historial de esa espera se descarta)
+ADAPTIVE = os.getenv("WAIT_ADAPTIVE", "on").lower() != "off"
+# timeout efectivo = p95 de lo que tardó esa espera en corridas anteriores * factor, acotado a [mín, máx]
+ADAPT_FACTOR = float(os.getenv("WAIT_ADAPT_FACTOR", "2.0"))
+ADAPT_MIN_MS = int(os.getenv("WAIT_MIN_MS", "300"))
+ADAPT_MIN_SAMPLES = 5
+WINDOW = 30  # muestras que se guardan por espera
+
+
+# ===================== TIMEOUTS ADAPTATIVOS =====================
+
+class _History:
+    """Duraciones (ms) de las últimas WINDOW esperas cumplidas, por nombre. Un JSON por sitio."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._files = {}   # sitio -> {nombre: [ms, ...]}
+        self._dirty = set()
+        self._registered = False
+
+    def _site(self, name: str) -> dict:
+        site = name.split("/", 1)[0] or "default"
+        data = self._files.get(site)
+        if data is None:
+            data = {}
+            path = WAIT_STATE_DIR / f"{site}.json"
+            if path.exists():
+                try:
+                    data = json.loads(path.read_text(encoding="utf-8"))
+                except Exception as e:
+                    print(f"[WAIT][WARN] historial {path} ilegible ({e}), se parte de cero", flush=True)
+            self._files[site] = data
+        return data
+
+    def budget(self, name: str, max_ms: int, floor_ms: int = 0) -> int:
+        if not ADAPTIVE:
+            return max_ms
+        with self._lock:
+            samples = list(self._site(name).get(name) or ())
+        if len(samples) < ADAPT_MIN_SAMPLES:
+            return max_ms
+        p95 = sorted(samples)[min(len(samples) - 1, int(0.95 * len(samples)))]
+        return int(min(max_ms, max(ADAPT_MIN_MS, floor_ms, p95 * ADAPT_FACTOR)))
+
+    def add(self, name: str, ms: float):
+        with self._lock:
+            runs = self._site(name).setdefault(name, [])
+            runs.append(int(ms))
+            del runs[:-WINDOW]
+            self._touch(name)
+
+    def reset(self, name: str):
+        """El timeout acortado quedó corto: se vuelve al máximo hasta juntar muestras de nuevo."""
+        with self._lock:
+            self._site(name).pop(name, None)
+            self._touch(name)
+
+    def _touch(self, name: str):
+        self._dirty.add(name.split("/", 1)[0] or "default")
+        if not self._registered:
+            self._registered = True
+            atexit.register(self.save)
+
+    def save(self):
+        with self._lock:
+            for site in sorted(self._dirty):
+                try:
+                    WAIT_STATE_DIR.mkdir(parents=True, exist_ok=True)
+                    path = WAIT_STATE_DIR / f"{site}.json"
+                    tmp = path.with_suffix(".tmp")
+                    tmp.write_text(json.dumps(self._files[site], indent=1), encoding="utf-8")
+                    os.replace(tmp, path)
+                except Exception as e:
+                    print(f"[WAIT][WARN] no pude guardar historial de {site}: {e}", flush=True)
+            self._dirty.clear()
+
+
+history = _History()
+
+
+# ===================== PERFIL =====================
+
+_stats_lock = threading.Lock()
+
+
+def _stats() -> dict:
+    # del job en curso (_jobscope): nombre -> {"kind", "calls", "blocked_sec", "budget_sec", "dead_sec", "timeouts"}
+    return _jobscope.current().get("waits", dict)
+
+# esperas cuyo timeout solo significa "seguir"; son las únicas que se acortan
+ADAPTIVE_KINDS = ("dom_quiet", "load")
+
+
+def _record(name: str, kind: str, blocked_sec: float, budget_ms: float, met: bool):
+    """
+    Tiempo muerto = lo bloqueado sin que pasara nada: todo el sleep fijo, o la espera
+    entera cuando terminó por timeout. Una espera cumplida no suma tiempo muerto.
+    """
+    dead = blocked_sec if (kind == "sleep" or not met) else 0.0
+    with _stats_lock:
+        stats = _stats()
+        s = stats.get(name)
+        if s is None:
+            s = stats[name] = {"kind": kind, "calls": 0, "blocked_sec": 0.0, "budget_sec": 0.0,
+                                "dead_sec": 0.0, "timeouts": 0}
+        s["calls"] += 1
+        s["blocked_sec"] += blocked_sec
+        s["budget_sec"] += budget_ms / 1000
+        s["dead_sec"] += dead
+        s["timeouts"] += 0 if met else 1
+    if met and kind in ADAPTIVE_KINDS:
+        history.add(name, blocked_sec * 1000)
+
+
+def summary() -> dict:
+    """Totales + detalle por espera (ordenado por tiempo muerto) para run_stats."""
+    with _stats_lock:
+        stats = _stats()
+        if not stats:
+            return {}
+        waits = {k: dict(v) for k, v in stats.items()}
+    for v in waits.values():
+        for k in ("blocked_sec", "budget_sec", "dead_sec"):
+            v[k] = round(v[k], 2)
+    return {
+        "wait_calls": sum(v["calls"] for v in waits.values()),
+        "wait_blocked_sec": round(sum(v["blocked_sec"] for v in waits.values()), 2),
+        "wait_budget_sec": round(sum(v["budget_sec"] for v in waits.values()), 2),
+        "wait_dead_sec": round(sum(v["dead_sec"] for v in waits.values()), 2),
+        "wait_timeouts": sum(v["timeouts"] for v in waits.values()),
+        "waits": dict(sorted(waits.items(), key=lambda kv: -kv[1]["dead_sec"])),
+    }
+
+
+def _is_timeout(e: Exception) -> bool:
+    return type(e).__name__ == "TimeoutError"
+
+
+# ===================== JS =====================
+
+# resuelve true cuando el DOM pasa `quiet` ms sin mutaciones, false si se cumple `max` antes
+_QUIET_FN = """
+const quietFor = (quiet, max) => new Promise(resolve => {
+    const t0 = performance.now();
+    let last = t0;
+    const obs = new MutationObserver(() => { last = performance.now(); });
+    obs.observe(document.documentElement || document, {subtree: true, childList: true, attributes: true, characterData: true});
+    const tick = () => {
+        const now = performance.now();
+        if (now - last >= quiet) { obs.disconnect(); resolve(true); return; }
+        if (now - t0 >= max) { obs.disconnect(); resolve(false); return; }
+        setTimeout(tick, Math.min(50, quiet));
+    };
+    setTimeout(tick, Math.min(50, quiet));
+});
+"""
+
+_DOM_QUIET_JS = "async ([quiet, max]) => {" + _QUIET_FN + "return await quietFor(quiet, max); }"
+
+# [cantidad, cumplido]: cantidad >= min y sin cambios durante `stable` ms
+_COUNT_STABLE_JS = """
+([sel, stable, max, min]) => new Promise(resolve => {
+    const t0 = performance.now();
+    let last = -1, since = t0;
+    const tick = () => {
+        let n;
+        try { n = document.querySelectorAll(sel).length; } catch (e) { resolve([-1, false]); return; }
+        const now = performance.now();
+        if (n !== last) { last = n; since = now; }
+        if (n >= min && now - since >= stable) { resolve([n, true]); return; }
+        if (now - t0 >= max) { resolve([n, false]); return; }
+        setTimeout(tick, 100);
+    };
+    tick();
+})
+"""
+
+# firma del contenido de `sel`: cantidad + hash del texto (null si el selector es inválido)
+_SIGNATURE_FN = """
+const signature = (sel) => {
+    let els;
+    try { els = document.querySelectorAll(sel); } catch (e) { return null; }
+    let h = 0;
+    for (const el of els) {
+        const t = el.textContent || "";
+        for (let i = 0; i < t.length; i++) h = (h * 31 + t.charCodeAt(i)) | 0;
+    }
+    return els.length + ":" + h;
+};
+"""
+
+_SIGNATURE_JS = "(sel) => {" + _SIGNATURE_FN + "return signature(sel); }"
+
+# [firma, cumplido]: firma distinta de `before` y sin cambios durante `settle` ms
+_CHANGED_JS = """
+([sel, before, settle, max]) => new Promise(resolve => {""" + _SIGNATURE_FN + """
+    const t0 = performance.now();
+    let last = before, since = t0;
+    const tick = () => {
+        const s = signature(sel);
+        const now = performance.now();
+        if (s !== last) { last = s; since = now; }
+        if (s !== before && now - since >= settle) { resolve([s, true]); return; }
+        if (now - t0 >= max) { resolve([s, false]); return; }
+        setTimeout(tick, 50);
+    };
+    tick();
+})
+"""
+
+# un paso de scroll: espera DOM quieto (tope stepMax) en vez de una pausa fija y devuelve
+# [altura, cantidad de `sel`] para decidir si la página sigue creciendo
+_STEP_JS = """
+async ([sel, quiet, stepMax]) => {""" + _QUIET_FN + """
+    await quietFor(quiet, stepMax);
+    let n = 0;
+    try { n = sel ? document.querySelectorAll(sel).length : 0; } catch (e) {}
+    return [document.body ? document.body.scrollHeight : 0, n];
+}
+"""
+
+
+# ===================== ESPERAS (sync_api) =====================
+
+def sleep(seconds: float, name: str):
+    """Pausa fija que se mantiene a propósito (ej. cortesía con el sitio), pero queda en el perfil."""
+    t0 = time.perf_counter()
+    time.sleep(seconds)
+    _record(name, "sleep", time.perf_counter() - t0, seconds * 1000, True)
+
+
+def _evaluate(page, name, kind, budget, js, args, met_of):
+    t0 = time.perf_counter()
+    try:
+        result = page.evaluate(js, args)
+    except Exception as e:
+        # la página navegó o se cerró en medio de la espera: no es un error del scraper
+        print(f"[WAIT][WARN] {name}: {str(e).splitlines()[0]}", flush=True)
+        result = None
+    _record(name, kind, time.perf_counter() - t0, budget, result is not None and met_of(result))
+    return result
+
+
+def _load_state(page, name, budget, state) -> bool:
+    t0 = time.perf_counter()
+    try:
+        page.wait_for_load_state(state, timeout=budget)
+        met = True
+    except Exception as e:
+        if not _is_timeout(e):
+            raise
+        met = False
+    _record(name, "load", time.perf_counter() - t0, budget, met)
+    return met
+
+
+def dom_quiet(page, name: str, quiet_ms: int = 250, max_ms: int = 3000) -> bool:
+    """
+    True cuando el DOM lleva quiet_ms sin mutaciones; para asentar después de un goto. Después de
+    un click que pide datos usar changed() (o response()): el DOM puede quedar quieto antes de la respuesta.
+    """
+    budget = history.budget(name, max_ms, quiet_ms * 2)
+    r = _evaluate(page, name, "dom_quiet", budget, _DOM_QUIET_JS, [quiet_ms, budget], bool)
+    if r is False and budget < max_ms:
+        history.reset(name)
+        r = _evaluate(page, name, "dom_quiet", max_ms, _DOM_QUIET_JS, [quiet_ms, max_ms], bool)
+    return bool(r)
+
+
+def count_stable(page, selector: str, name: str, stable_ms: int = 400, max_ms: int = 8000, min_count: int = 1) -> int:
+    """
+    Cantidad de `selector` cuando deja de cambiar (>= min_count); la última vista si se cumplió
+    el tope. Siempre espera hasta max_ms: un corte antes dejaría la lista a medias.
+    """
+    r = _evaluate(page, name, "count_stable", max_ms, _COUNT_STABLE_JS,
+                  [selector, stable_ms, max_ms, min_count], lambda r: r[1])
+    return max(0, r[0]) if r else 0
+
+
+def signature(page, selector: str) -> str | None:
+    """Firma del contenido de `selector` para changed(); tomarla antes del click."""
+    try:
+        return page.evaluate(_SIGNATURE_JS, selector)
+    except Exception:
+        return None
+
+
+def changed(page, selector: str, name: str, before: str | None, settle_ms: int = 200, max_ms: int = 8000) -> bool:
+    """
+    True cuando el contenido de `selector` ya no es `before` (signature() de antes de la acción)
+    y lleva settle_ms sin cambiar. Para después de un click que pide datos: dom_quiet puede
+    cumplirse en la pausa antes de que llegue la respuesta y se leería la grilla vieja.
+    """
+    r = _evaluate(page, name, "changed", max_ms, _CHANGED_JS, [selector, before, settle_ms, max_ms],
+                  lambda r: r[1])
+    return bool(r and r[1])
+
+
+def scroll_until_stable(page, name: str, selector: str | None = None, step: int = 1200, rounds: int = 40,
+                        idle_rounds: int = 4, quiet_ms: int = 250, step_max_ms: int = 1500,
+                        back_to_top: bool = False, wheel: bool = False) -> int:
+    """
+    Scroll por pasos esperando DOM quieto en cada uno (tope step_max_ms, no una pausa fija).
+    Con idle_rounds > 0 corta cuando altura y cantidad de `selector` no cambian en idle_rounds
+    pasos seguidos; idle_rounds=0 hace exactamente `rounds` pasos (scroll para disparar lazy-load).
+    wheel=True scrollea con page.mouse.wheel (para sitios cuyo lazy-load escucha eventos wheel).
+    Devuelve la cantidad final de `selector` (0 sin selector).
+    """
+    budget_ms = rounds * step_max_ms
+    t0 = time.perf_counter()
+    n, stable, done = 0, idle_rounds <= 0, 0
+    try:
+        last, still = None, 0
+        for done in range(1, rounds + 1):
+            if wheel:
+                page.mouse.wheel(0, step)
+            else:
+                page.evaluate("(y) => window.scrollBy(0, y)", step)
+            h, n = page.evaluate(_STEP_JS, [selector, quiet_ms, step_max_ms])
+            if (h, n) == last:
+                still += 1
+                if idle_rounds > 0 and still >= idle_rounds:
+                    stable = True
+                    break
+            else:
+                last, still = (h, n), 0
+        if back_to_top:
+            if wheel:
+                page.mouse.wheel(0, -step * done)
+            else:
+                page.evaluate("window.scrollTo(0, 0)")
+            page.evaluate(_STEP_JS, [selector, min(quiet_ms, 150), step_max_ms])
+    except Exception as e:
+        print(f"[WAIT][WARN] {name}: {str(e).splitlines()[0]}", flush=True)
+        stable = False
+    _record(name, "scroll", time.perf_counter() - t0, budget_ms, stable)
+    return n
+
+
+def selector_ready(page, css: str, name: str, max_ms: int = 15000, state: str = "attached") -> bool:
+    """wait_for_selector perfilado; False (sin excepción) si no aparece en max_ms."""
+    t0 = time.perf_counter()
+    try:
+        page.wait_for_selector(css, state=state, timeout=max_ms)
+        met = True
+    except Exception as e:
+        if not _is_timeout(e):
+            raise
+        met = False
+    _record(name, "selector", time.perf_counter() - t0, max_ms, met)
+    return met
+
+
+def load_idle(page, name: str, max_ms: int = 6000, state: str = "networkidle") -> bool:
+    """wait_for_load_state con timeout adaptativo; los networkidle de 25s pasan a durar lo que suele tardar el sitio."""
+    budget = history.budget(name, max_ms)
+    met = _load_state(page, name, budget, state)
+    if not met and budget < max_ms:
+        history.reset(name)
+        met = _load_state(page, name, max_ms, state)
+    return met
+
+
+class ResponseWait:
+    """Lo que devuelven response()/response_async(): .met y .response cuando salió del with."""
+
+    __slots__ = ("met", "response")
+
+    def __init__(self):
+        self.met = False
+        self.response = None
+
+
+def _matcher(pattern: str):
+    rx = re.compile(pattern)
+    return lambda r: rx.search(r.url) is not None and 200 <= r.status < 400
+
+
+@contextmanager
+def response(page, pattern: str, name: str, max_ms: int = 10000):
+    """
+    Espera la respuesta de red cuya URL calza con `pattern`, disparada dentro del with:
+
+        with response(page, r"/api/precios", "mercedes/precios") as w:
+            select.select_option(value)
+        if w.met: data = w.response.json()
+
+    Se mide solo lo que bloquea al salir del with, no la acción de adentro.
+    """
+    out = ResponseWait()
+    cm = page.expect_response(_matcher(pattern), timeout=max_ms)
+    info = cm.__enter__()
+    try:
+        yield out
+    except BaseException as e:
+        try:
+            cm.__exit__(type(e), e, e.__traceback__)
+        except Exception:
+            pass
+        raise
+    t0 = time.perf_counter()
+    try:
+        cm.__exit__(None, None, None)
+        out.response = info.value
+        out.met = True
+    except Exception as e:
+        if not _is_timeout(e):
+            raise
+    _record(name, "response", time.perf_counter() - t0, max_ms, out.met)
+
+
+# ===================== ESPERAS (async_api) =====================
+
+async def sleep_async(seconds: float, name: str):
+    t0 = time.perf_counter()
+    await asyncio.sleep(seconds)
+    _record(name, "sleep", time.perf_counter() - t0, seconds * 1000, True)
+
+
+async def _evaluate_async(page, name, kind, budget, js, args, met_of):
+    t0 = time.perf_counter()
+    try:
+        result = await page.evaluate(js, args)
+    except Exception as e:
+        print(f"[WAIT][WARN] {name}: {str(e).splitlines()[0]}", flush=True)
+        result = None
+    _record(name, kind, time.perf_counter() - t0, budget, result is not None and met_of(result))
+    return result
+
+
+async def _load_state_async(page, name, budget, state) -> bool:
+    t0 = time.perf_counter()
+    try:
+        await page.wait_for_load_state(state, timeout=budget)
+        met = True
+    except Exception as e:
+        if not _is_timeout(e):
+            raise
+        met = False
+    _record(name, "load", time.perf_counter() - t0, budget, met)
+    return met
+
+
+async def dom_quiet_async(page, name: str, quiet_ms: int = 250, max_ms: int = 3000) -> bool:
+    budget = history.budget(name, max_ms, quiet_ms * 2)
+    r = await _evaluate_async(page, name, "dom_quiet", budget, _DOM_QUIET_JS, [quiet_ms, budget], bool)
+    if r is False and budget < max_ms:
+        history.reset(name)
+        r = await _evaluate_async(page, name, "dom_quiet", max_ms, _DOM_QUIET_JS, [quiet_ms, max_ms], bool)
+    return bool(r)
+
+
+async def count_stable_async(page, selector: str, name: str, stable_ms: int = 400, max_ms: int = 8000,
+                             min_count: int = 1) -> int:
+    r = await _evaluate_async(page, name, "count_stable", max_ms, _COUNT_STABLE_JS,
+                              [selector, stable_ms, max_ms, min_count], lambda r: r[1])
+    return max(0, r[0]) if r else 0
+
+
+async def signature_async(page, selector: str) -> str | None:
+    try:
+        return await page.evaluate(_SIGNATURE_JS, selector)
+    except Exception:
+        return None
+
+
+async def changed_async(page, selector: str, name: str, before: str | None, settle_ms: int = 200,
+                        max_ms: int = 8000) -> bool:
+    r = await _evaluate_async(page, name, "changed", max_ms, _CHANGED_JS, [selector, before, settle_ms, max_ms],
+                              lambda r: r[1])
+    return bool(r and r[1])
+
+
+async def scroll_until_stable_async(page, name: str, selector: str | None = None, step: int = 1200,
+                                    rounds: int = 40, idle_rounds: int = 4, quiet_ms: int = 250,
+                                    step_max_ms: int = 1500, back_to_top: bool = False, wheel: bool = False) -> int:
+    budget_ms = rounds * step_max_ms
+    t0 = time.perf_counter()
+    n, stable, done = 0, idle_rounds <= 0, 0
+    try:
+        last, still = None, 0
+        for done in range(1, rounds + 1):
+            if wheel:
+                await page.mouse.wheel(0, step)
+            else:
+                await page.evaluate("(y) => window.scrollBy(0, y)", step)
+            h, n = await page.evaluate(_STEP_JS, [selector, quiet_ms, step_max_ms])
+            if (h, n) == last:
+                still += 1
+                if idle_rounds > 0 and still >= idle_rounds:
+                    stable = True
+                    break
+            else:
+                last, still = (h, n), 0
+        if back_to_top:
+            if wheel:
+                await page.mouse.wheel(0, -step * done)
+            else:
+                await page.evaluate("window.scrollTo(0, 0)")
+            await page.evaluate(_STEP_JS, [selector, min(quiet_ms, 150), step_max_ms])
+    except Exception as e:
+        print(f"[WAIT][WARN] {name}: {str(e).splitlines()[0]}", flush=True)
+        stable = False
+    _record(name, "scroll", time.perf_counter() - t0, budget_ms, stable)
+    return n
+
+
+async def selector_ready_async(page, css: str, name: str, max_ms: int = 15000, state: str = "attached") -> bool:
+    t0 = time.perf_counter()
+    try:
+        await page.wait_for_selector(css, state=state, timeout=max_ms)
+        met = True
+    except Exception as e:
+        if not _is_timeout(e):
+            raise
+        met = False
+    _record(name, "selector", time.perf_counter() - t0, max_ms, met)
+    return met
+
+
+async def load_idle_async(page, name: str, max_ms: int = 6000, state: str = "networkidle") -> bool:
+    budget = history.budget(name, max_ms)
+    met = await _load_state_async(page, name, budget, state)
+    if not met and budget < max_ms:
+        history.reset(name)
+        met = await _load_state_async(page, name, max_ms, state)
+    return met
+
+
+@asynccontextmanager
+async def response_async(page, pattern: str, name: str, max_ms: int = 10000):
+    out = ResponseWait()
+    cm = page.expect_response(_matcher(pattern), timeout=max_ms)
+    info = await cm.__aenter__()
+    try:
+        yield out
+    except BaseException as e:
+        try:
+            await cm.__aexit__(type(e), e, e.__traceback__)
+        except Exception:
+            pass
+        raise
+    t0 = time.perf_counter()
+    try:
+        await cm.__aexit__(None, None, None)
+        out.response = await info.value
+        out.met = True
+    except Exception as e:
+        if not _is_timeout(e):
+            raise
+    _record(name, "response", time.perf_counter() - t0, max_ms, out.met)
@@ -0,0 +1,164 @@
+import atexit
+import contextvars
+import threading
+import time
+
+import _jobscope
+from _storage import FIRESTORE_BATCH_LIMIT
+
+
+class BufferedWriter:
+    """
+    Acumula escrituras (collection, doc_id, data, merge) y las envía al storage en lotes.
+
+    - flush por tamaño: al llegar a `batch_size` filas pendientes
+    - flush por tiempo: a lo más `flush_interval` segundos después de la primera fila pendiente
+    - flush al salir del proceso (atexit)
+    - el commit real (WriteBatch, BulkWriter, sqlite) lo hace storage.commit(rows)
+    - con `journal`, cada fila se anota antes de enviarse y se confirma después del ack
+    - las métricas (summary) son por job (_jobscope): cada fila recuerda el job que la encoló,
+      porque un mismo lote puede llevar filas de varios jobs y lo puede enviar cualquier hilo
+    - set(..., on_commit=cb): cb(ok) después del commit de esa fila, en el contexto de quien la
+      encoló; lo que cb encole (ej. el índice de huellas) sale en el mismo flush. Cuando flush()
+      retorna ya corrieron los cb de todo lo encolado antes (aunque el lote lo haya tomado el timer)
+    """
+
+    def __init__(self, storage, batch_size: int = 400, flush_interval: float = 5.0, verbose: bool = True, journal=None):
+        self.storage = storage
+        self.journal = journal
+        self.batch_size = max(1, min(int(batch_size), FIRESTORE_BATCH_LIMIT))
+        self.flush_interval = float(flush_interval)
+        self.verbose = verbose
+
+        self._pending = []
+        self._lock = threading.Lock()        # protege _pending, _timer y los contadores
+        self._flush_lock = threading.RLock()  # serializa commits + callbacks; un cb puede volver a flush()
+        self._timer = None
+        self._closed = False
+        self._flushes = 0  # del proceso, para el log
+        self._failed = 0
+
+        atexit.register(self.close)
+
+    def _stats(self, scope=None) -> dict:
+        return (scope or _jobscope.current()).get(self, lambda: {
+            "enqueued": 0,
+            "written": 0,
+            "failed": 0,
+            "flushes": 0,
+            "flush_ms": [],
+        })
+
+    # ===================== API =====================
+
+    def set(self, collection: str, doc_id: str, data: dict, merge: bool = False, on_commit=None):
+        seq = self.journal.append(collection, doc_id, data, merge) if self.journal else None
+        scope = _jobscope.current()
+        if on_commit is not None:
+            on_commit = (contextvars.copy_context(), on_commit)
+        with self._lock:
+            self._pending.append((seq, (collection, doc_id, data, merge), scope, on_commit))
+            self._stats(scope)["enqueued"] += 1
+            full = len(self._pending) >= self.batch_size
+            if not full and self._timer is None and not self._closed:
+                self._timer = threading.Timer(self.flush_interval, self._on_timer)
+                self._timer.daemon = True
+                self._timer.start()
+
+        if full:
+            self.flush()
+
+    def flush(self) -> int:
+        total = 0
+        # los callbacks corren con _flush_lock tomado: otro flush() (ej. el de run_stats mientras
+        # el timer envía un lote) espera a que terminen y ve los contadores ya actualizados
+        with self._flush_lock:
+            while True:
+                written, callbacks = self._flush_once()
+                total += written
+                if not callbacks:
+                    return total
+                for (ctx, cb), ok in callbacks:
+                    try:
+                        ctx.run(cb, ok)
+                    except Exception as e:
+                        print(f"[WRITER][ERROR] on_commit falló: {e}", flush=True)
+
+    def _flush_once(self):
+        with self._flush_lock:
+            with self._lock:
+                rows = self._pending
+                self._pending = []
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+
+            if not rows:
+                return 0, []
+
+            if self.journal:
+                self.journal.sync()
+
+            t0 = time.perf_counter()
+            try:
+                ok = self.storage.commit([row for _, row, _, _ in rows])
+            except Exception as e:
+                # el journal las conserva para replay; los on_commit tienen que enterarse igual
+                print(f"[WRITER][ERROR] commit falló: {e}", flush=True)
+                ok = [False] * len(rows)
+            ms = round((time.perf_counter() - t0) * 1000, 1)
+
+            written = sum(1 for x in ok if x)
+            failed = len(rows) - written
+            if self.journal:
+                self.journal.ack(seq for (seq, _, _, _), x in zip(rows, ok) if x)
+
+            with self._lock:
+                self._flushes += 1
+                self._failed += failed
+                flush_n = self._flushes
+                touched = set()
+                for (_, _, scope, _), x in zip(rows, ok):
+                    stats = self._stats(scope)
+                    stats["written" if x else "failed"] += 1
+                    if scope not in touched:
+                        touched.add(scope)
+                        stats["flushes"] += 1
+                        stats["flush_ms"].append(ms)
+
+            if self.verbose:
+                print(f"[WRITER] flush #{flush_n} rows={len(rows)} ok={written} err={failed} {ms} ms", flush=True)
+
+            return written, [(cb, x) for (_, _, _, cb), x in zip(rows, ok) if cb is not None]
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+        self.flush()
+        if self.journal:
+            self.journal.close()
+            if self._failed:
+                print(f"[WRITER] {self._failed} filas sin confirmar en {self.journal.path} → python replay_journal.py", flush=True)
+
+    def summary(self) -> dict:
+        with self._lock:
+            stats = self._stats()
+            lat = list(stats["flush_ms"])
+            return {
+                "writer_enqueued": stats["enqueued"],
+                "writer_written": stats["written"],
+                "writer_failed": stats["failed"],
+                "writer_flushes": stats["flushes"],
+                "writer_flush_ms_avg": round(sum(lat) / len(lat), 1) if lat else 0.0,
+                "writer_flush_ms_max": max(lat) if lat else 0.0,
+            }
+
+    # ===================== INTERNOS =====================
+
+    def _on_timer(self):
+        with self._lock:
+            self._timer = None
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"[WRITER][ERROR] flush por tiempo falló: {e}", flush=True)
@@ -0,0 +1,119 @@
+"""
+Micro-benchmark de normalización de texto: implementación anterior de utils vs _text.
+
+    python bench_text.py [--n 200000]
+
+Verifica además que ambas den exactamente el mismo resultado.
+"""
+
+import argparse
+import random
+import re
+import time
+import unicodedata
+
+import _text
+
+
+# ===================== IMPLEMENTACIÓN ANTERIOR =====================
+
+def legacy_normalize_text(text: str) -> str:
+    if not text:
+        return ""
+    text = text.lower()
+    text = unicodedata.normalize("NFD", text)
+    text = "".join(c for c in text if unicodedata.category(c) != "Mn")
+    text = re.sub(r"[\/\-\_]", " ", text)
+    text = re.sub(r"[^a-z0-9\s]", " ", text)
+    text = re.sub(r"\s+", " ", text).strip()
+    return text
+
+
+def legacy_tokenize(text: str, min_len: int = 2) -> list[str]:
+    norm = legacy_normalize_text(text)
+    tokens = [t for t in norm.split(" ") if len(t) >= min_len and not t.isdigit()]
+    return sorted(set(tokens))
+
+
+def legacy_build_model_search_fields(model, model_detail=None) -> dict:
+    combined = f"{model or ''} {model_detail or ''}".strip()
+    return {"model_norm": legacy_normalize_text(combined), "model_tokens": legacy_tokenize(combined)}
+
+
+# ===================== DATOS =====================
+
+SAMPLE = [
+    ("Tiggo 7 Pro", "1.5T CVT Luxury"),
+    ("CX-5", "2.5 GT AWD Automático"),
+    ("Sportage", "2.0 EX 4x2 6AT/Diésel"),
+    ("Ñandú", "Edición Única — híbrido"),
+    ("Mercedes-Benz Clase C", "C 200 AMG_Line"),
+    ("BT-50", "3.2 SDX 4WD 6MT Cabina Doble"),
+    ("MX-5", "2.0 RF Grand Touring"),
+    ("Grand Cherokee", "Limited 4xe  (PHEV)"),
+    ("Série 3", "320i M Sport"),
+    ("Ōmoda 5", "1.6 TGDI DCT Élite"),
+]
+
+
+def make_inputs(n: int, seed: int = 7) -> list[tuple]:
+    rng = random.Random(seed)
+    # las corridas reales repiten mucho el mismo modelo/versión
+    return [rng.choice(SAMPLE) for _ in range(n)]
+
+
+def fuzz_equal(n: int = 20000, seed: int = 11) -> int:
+    rng = random.Random(seed)
+    alphabet = "abcXYZ019 -_/.,áéíóúñÑüÜçÇ \t́ßøÅİ€ạỹ"
+    bad = 0
+    for _ in range(n):
+        s = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 24)))
+        if legacy_normalize_text(s) != _text.normalize_text(s) or legacy_tokenize(s) != _text.tokenize(s):
+            bad += 1
+            print(f"[DIFF] {s!r}: {legacy_normalize_text(s)!r} != {_text.normalize_text(s)!r}")
+    return bad
+
+
+def bench(fn, inputs) -> float:
+    t0 = time.perf_counter()
+    for m, d in inputs:
+        fn(m, d)
+    return time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=200000)
+    args = ap.parse_args()
+
+    bad = fuzz_equal()
+    print(f"[CHECK] diferencias legacy vs _text: {bad}")
+
+    inputs = make_inputs(args.n)
+    t_old = bench(legacy_build_model_search_fields, inputs)
+
+    _text.normalize_text.cache_clear()
+    t_new = bench(_text.build_model_search_fields, inputs)
+
+    _text.normalize_text.cache_clear()
+    t0 = time.perf_counter()
+    _text.build_model_search_fields_many(inputs)
+    t_batch = time.perf_counter() - t0
+
+    # sin LRU: solo patrones precompilados + translate
+    raw = _text.normalize_text.__wrapped__
+    t_nocache = bench(lambda m, d: raw(f"{m} {d}"), inputs)
+    t_old_norm = bench(lambda m, d: legacy_normalize_text(f"{m} {d}"), inputs)
+
+    print(f"build_model_search_fields x{args.n}")
+    print(f"  legacy : {t_old:.3f} s")
+    print(f"  _text  : {t_new:.3f} s  ({t_old / t_new:.1f}x)")
+    print(f"  batch  : {t_batch:.3f} s  ({t_old / t_batch:.1f}x)")
+    print(f"normalize_text sin cache x{args.n}")
+    print(f"  legacy : {t_old_norm:.3f} s")
+    print(f"  _text  : {t_nocache:.3f} s  ({t_old_norm / t_nocache:.1f}x)")
+    return 1 if bad else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
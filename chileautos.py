@@ -7,6 +7,7 @@ from pathlib import Path
 from typing import Optional, Tuple, Dict, Any, List
 
 from utils import guarda_usado
+from _network import block_resources_async
 from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
 
 HOME_URL = "https://www.chileautos.cl"
@@ -237,21 +238,6 @@ async def safe_apply_stealth(page):
             print(f"[WARN] No pude aplicar stealth: {e}", flush=True)
 
 
-async def route_handler(route):
-    try:
-        req = route.request
-        resource_type = req.resource_type
-        if resource_type in {"image", "media", "font"}:
-            await route.abort()
-            return
-        await route.continue_()
-    except Exception:
-        try:
-            await route.continue_()
-        except Exception:
-            pass
-
-
 async def is_blocked(page) -> bool:
     for sel in BLOCK_SELECTORS:
         try:
@@ -581,10 +567,7 @@ async def scrape_all_pages_with_details_resume(
             ],
         )
 
-        try:
-            await context.route("**/*", route_handler)
-        except Exception as e:
-            print(f"[WARN] No pude registrar route handler: {e}", flush=True)
+        await block_resources_async(context, "chileautos")
 
         if context.pages:
             page = context.pages[0]
@@ -0,0 +1,148 @@
+"""
+Consultas sobre los logs de corridas (runs/logs, ver _runlogs.py).
+
+    python logs.py list [--job orq_mazda] [--since 2026-10-01]       # intentos con conteo de errores
+    python logs.py grep "timeout" [--job bmw] [--severity error]      # busca sin descomprimir todo
+    python logs.py errors [--job bmw] [--since 2026-10-01]            # líneas de error desde el índice
+    python logs.py show runs/logs/bmw-20261001-030000-attempt1.log.gz [--tail 50]
+    python logs.py prune [--days 30] [--dry-run] [--plain]            # --plain: también los .log planos de antes
+"""
+
+import argparse
+import re
+import sys
+from collections import deque
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from _runlogs import LOG_DIR, RETENTION_DAYS, list_logs, prune, severity
+
+
+def _date(value):
+    # "2026-10-01", "2026-10-01 03:00" o "7d" (hace 7 días)
+    if value.endswith("d") and value[:-1].isdigit():
+        return datetime.now() - timedelta(days=int(value[:-1]))
+    return datetime.fromisoformat(value)
+
+
+def _entries(args):
+    return list_logs(args.dir, job=args.job, since=args.since, until=args.until)
+
+
+def cmd_list(args):
+    entries = _entries(args)
+    for e in entries:
+        idx = e.index or {}
+        counts = idx.get("counts") or {}
+        size = e.path.stat().st_size
+        ratio = f"{idx['raw_bytes'] / size:.1f}x" if idx.get("raw_bytes") and size else "plano"
+        print(
+            f"{e.started:%Y-%m-%d %H:%M:%S}  {e.job:<20} #{e.attempt}  rc={idx.get('return_code', '?')!s:<4} "
+            f"lines={idx.get('lines', '?')!s:<7} err={counts.get('error', '?')!s:<4} warn={counts.get('warn', '?')!s:<4} "
+            f"{size / 1024:>8.1f} KB ({ratio})  {e.path.name}"
+            + ("  (sin cerrar)" if e.index is not None and e.index.get("finished_at") is None else "")
+        )
+    print(f"[LOGS] {len(entries)} log(s)")
+    return 0
+
+
+def cmd_grep(args):
+    flags = re.IGNORECASE if args.ignore_case else 0
+    pattern = re.compile(args.pattern if args.regex else re.escape(args.pattern), flags)
+    hits = 0
+    for e in _entries(args):
+        # con --severity solo se descomprimen los bloques marcados en el índice
+        for n, line in e.iter_lines(only_severity=args.severity):
+            if args.severity and severity(line) != args.severity:
+                continue
+            if pattern.search(line):
+                hits += 1
+                print(f"{e.path.name}:{n}: {line}")
+                if args.max and hits >= args.max:
+                    return 0
+    return 0 if hits else 1
+
+
+def cmd_errors(args):
+    shown = 0
+    for e in _entries(args):
+        if e.index is None:
+            lines = [(n, l) for n, l in e.iter_lines() if severity(l) == "error"]
+        else:
+            lines = e.index.get("errors") or []
+        for n, line in lines:
+            shown += 1
+            print(f"{e.started:%Y-%m-%d %H:%M} {e.job} #{e.attempt} L{n}: {line}")
+    if not shown:
+        print("✅ Sin errores en los logs seleccionados")
+    return 0
+
+
+def cmd_show(args):
+    path = Path(args.file)
+    if not path.exists():
+        path = Path(args.dir) / args.file
+    entry = next((e for e in list_logs(path.parent) if e.path.name == path.name), None)
+    if entry is None:
+        print(f"[ERROR] No existe el log (o no tiene índice): {args.file}")
+        return 1
+    lines = entry.iter_lines()
+    if args.tail:
+        lines = deque(lines, maxlen=args.tail)
+    for _, line in lines:
+        print(line)
+    return 0
+
+
+def cmd_prune(args):
+    removed = prune(args.dir, args.days, dry_run=args.dry_run, plain=args.plain)
+    for p in removed:
+        print(("[DRY-RUN] " if args.dry_run else "🗑️  ") + str(p))
+    print(f"[LOGS] {len(removed)} archivo(s) de más de {args.days} días")
+    return 0
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Logs de corridas")
+    ap.add_argument("--dir", default=str(LOG_DIR))
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    def filters(p):
+        p.add_argument("--job")
+        p.add_argument("--since", type=_date, help="fecha ISO o Nd (ej. 7d)")
+        p.add_argument("--until", type=_date)
+
+    l = sub.add_parser("list", help="intentos registrados")
+    filters(l)
+    l.set_defaults(fn=cmd_list)
+
+    g = sub.add_parser("grep", help="buscar texto en los logs")
+    g.add_argument("pattern")
+    filters(g)
+    g.add_argument("--severity", choices=["error", "warn"])
+    g.add_argument("-E", "--regex", action="store_true")
+    g.add_argument("-i", "--ignore-case", action="store_true")
+    g.add_argument("--max", type=int, default=0, help="cortar tras N coincidencias")
+    g.set_defaults(fn=cmd_grep)
+
+    e = sub.add_parser("errors", help="líneas de error (desde el índice)")
+    filters(e)
+    e.set_defaults(fn=cmd_errors)
+
+    s = sub.add_parser("show", help="imprimir un log")
+    s.add_argument("file")
+    s.add_argument("--tail", type=int, default=0)
+    s.set_defaults(fn=cmd_show)
+
+    p = sub.add_parser("prune", help="borrar logs viejos")
+    p.add_argument("--days", type=int, default=RETENTION_DAYS)
+    p.add_argument("--dry-run", action="store_true")
+    p.add_argument("--plain", action="store_true", help="incluir los .log planos de antes (algunos están en git)")
+    p.set_defaults(fn=cmd_prune)
+
+    args = ap.parse_args()
+    return args.fn(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,17 @@
 import subprocess
 import json
+import os
+import sys
 import time
-from datetime import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from _browser import BrowserPool, CDP_ENV
+from _journal import new_run_id
+from _runlogs import RETENTION_DAYS, RunLog, prune
+from _schedule import JobHistory, order_jobs, predict_makespan
+from _telemetry import OutputScanner, record_all
 
 # ===================== CONFIG =====================
 
@@ -27,50 +37,75 @@ SCRIPTS = [
 
 PYTHON_CMD = "python3"
 
+# Cantidad de scripts en paralelo (1 = secuencial, como antes)
+MAX_JOBS = int(os.getenv("ORQ_MAX_JOBS", "1"))
+
+# Chromium compartidos (CDP) para todos los scripts; 0 = cada script lanza el suyo
+BROWSER_POOL = int(os.getenv("ORQ_BROWSER_POOL", "0"))
+BROWSER_HEADLESS = os.getenv("ORQ_BROWSER_HEADLESS", "true").lower() != "false"
+
+# "list" = orden de SCRIPTS (default); "lpt" = más largos primero según historial (state/job_history.json)
+SCHEDULE = os.getenv("ORQ_SCHEDULE", "list").lower()
+
+_print_lock = threading.Lock()
+
+
+def emit(line, prefix=None):
+    # con varios hijos a la vez, cada línea sale completa y con el nombre del script
+    with _print_lock:
+        if prefix:
+            print(f"[{prefix}] {line}", flush=True)
+        else:
+            print(line, flush=True)
+
 # ===================== EJECUTOR =====================
 
-def run_script(script_name):
-    print(f"\n🚀 Ejecutando: {script_name}")
+def run_script(script_name, prefix=False, browser_pool=None):
+    tag = script_name.removesuffix(".py") if prefix else None
+    if tag:
+        emit(f"🚀 Ejecutando: {script_name}", tag)
+    else:
+        emit(f"\n🚀 Ejecutando: {script_name}")
     start = time.time()
 
+    env = {**os.environ, "PYTHONUNBUFFERED": "1"}
+    if browser_pool is not None:
+        env[CDP_ENV] = browser_pool.endpoint()
+
     process = subprocess.Popen(
         [PYTHON_CMD, script_name],
         stdout=subprocess.PIPE,
         stderr=subprocess.STDOUT,
         text=True,
-        bufsize=1
+        bufsize=1,
+        # sin buffer en el hijo para que las líneas lleguen a medida que se imprimen
+        env=env,
     )
 
-    output_lines = []
-    run_ok = False
-    summary_json = None
+    # RUN_OK, JSON summary y __RESULT__= (ver _telemetry.OutputScanner); la salida no se
+    # guarda en memoria: va directo al log comprimido de runs/logs (ver logs.py)
+    scanner = OutputScanner()
+    runlog = RunLog(script_name.removesuffix(".py"))
 
     for line in process.stdout:
-        print(line.strip())
-        output_lines.append(line)
-
-        if "RUN_OK" in line:
-            run_ok = True
-
-        # intentar parsear JSON summary
-        try:
-            parsed = json.loads(line.strip())
-            if isinstance(parsed, dict) and "status" in parsed:
-                summary_json = parsed
-        except:
-            pass
+        emit(line.strip(), tag)
+        runlog.write_line(line)
+        scanner.feed(line)
 
     process.wait()
     end = time.time()
+    runlog.close(return_code=process.returncode, duration_sec=round(end - start, 2))
 
-    success = run_ok and process.returncode == 0
+    success = scanner.run_ok and process.returncode == 0
 
     result = {
         "script": script_name,
         "success": success,
         "duration_sec": round(end - start, 2),
         "return_code": process.returncode,
-        "summary": summary_json
+        "summary": scanner.summary,
+        "result": scanner.result,
+        "log": str(runlog.path),
     }
 
     return result
@@ -78,21 +113,79 @@ def run_script(script_name):
 
 # ===================== MAIN =====================
 
+def parse_int_flag(argv, flag, default):
+    # python orchestrator.py [--jobs N] [--browsers N]
+    if flag in argv:
+        i = argv.index(flag)
+        if i + 1 < len(argv):
+            return int(argv[i + 1])
+    return default
+
+
+def parse_max_jobs(argv):
+    return max(1, parse_int_flag(argv, "--jobs", MAX_JOBS))
+
+
 def main():
     print("\n==============================")
     print("🔥 ORQUESTADOR SCRAPERS AUTOS")
     print("==============================\n")
 
-    global_start = time.time()
+    max_jobs = parse_max_jobs(sys.argv[1:])
+    n_browsers = max(0, parse_int_flag(sys.argv[1:], "--browsers", BROWSER_POOL))
+    print(f"Paralelismo: {max_jobs} job(s) | Chromium compartidos: {n_browsers or 'no'}")
 
-    results = []
+    # retención de runs/logs comprimidos (LOG_RETENTION_DAYS, 0 = no borrar); los .log planos de antes no se tocan
+    pruned = prune(keep_days=RETENTION_DAYS)
+    if pruned:
+        print(f"[LOGS] {len(pruned)} archivo(s) de más de {RETENTION_DAYS} días borrados")
 
-    for script in SCRIPTS:
-        res = run_script(script)
-        results.append(res)
+    history = JobHistory()
+    scripts = order_jobs(SCRIPTS, history) if SCHEDULE == "lpt" else list(SCRIPTS)
+    predicted_sec = round(predict_makespan([history.expected_cost(s) for s in scripts], max_jobs), 1)
+    predicted_finish = datetime.now() + timedelta(seconds=predicted_sec)
+    print(f"Orden ({SCHEDULE}): {', '.join(s.removesuffix('.py') for s in scripts)}")
+    print(f"⏱️  Fin estimado: {predicted_finish:%H:%M:%S} (~{predicted_sec / 60:.1f} min)")
+
+    global_start = time.time()
+
+    pool = None
+    if n_browsers:
+        try:
+            pool = BrowserPool(n_browsers, headless=BROWSER_HEADLESS).start()
+        except Exception as e:
+            # sin pool cada script lanza su propio Chromium, como antes
+            print(f"[WARN] No se pudo levantar el Chromium compartido: {e}")
+            pool = None
+
+    try:
+        if max_jobs <= 1:
+            results = [run_script(script, browser_pool=pool) for script in scripts]
+        else:
+            # ex.map reparte en el orden de `scripts` y mantiene ese orden en los resultados
+            with ThreadPoolExecutor(max_workers=max_jobs) as ex:
+                results = list(ex.map(lambda s: run_script(s, prefix=True, browser_pool=pool), scripts))
+    finally:
+        browser_summary = pool.summary() if pool else {}
+        if pool:
+            pool.close()
 
     global_end = time.time()
 
+    for r in results:
+        history.record(r["script"], r["duration_sec"], r["success"])
+    history.save()
+    record_all("orchestrator", results, new_run_id())
+
+    actual_sec = round(global_end - global_start, 2)
+    schedule = {
+        "mode": SCHEDULE,
+        "order": scripts,
+        "predicted_sec": predicted_sec,
+        "actual_sec": actual_sec,
+        "error_sec": round(actual_sec - predicted_sec, 1),
+    }
+
     # ===================== RESUMEN =====================
 
     total = len(results)
@@ -102,9 +195,12 @@ def main():
     final_summary = {
         "timestamp": datetime.now().isoformat(),
         "total_scripts": total,
+        "max_jobs": max_jobs,
+        **browser_summary,
         "success": success,
         "failed": failed,
-        "duration_total_sec": round(global_end - global_start, 2),
+        "duration_total_sec": actual_sec,
+        "schedule": schedule,
         "details": results
     }
 
@@ -113,6 +209,7 @@ def main():
     print("==============================")
 
     print(json.dumps(final_summary, indent=2, ensure_ascii=False))
+    print(f"\n⏱️  Estimado {predicted_sec / 60:.1f} min vs real {actual_sec / 60:.1f} min")
 
     # guardar log
     with open("orquestador_resultado.json", "w", encoding="utf-8") as f:
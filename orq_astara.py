@@ -7,8 +7,10 @@ from dataclasses import dataclass
 from typing import List, Optional, Dict
 from urllib.parse import urljoin
 
-from utils import saveCar
+from utils import saveCar, count_saved, run_stats
 from playwright.sync_api import sync_playwright, Page
+from _browser import launch_chromium
+from _network import block_resources
 
 # ==========================
 # CONFIG: agrega aquí marcas
@@ -364,7 +366,7 @@ def main(headless: bool = True):
 
     try:
         with sync_playwright() as p:
-            browser = p.chromium.launch(
+            browser = launch_chromium(p,
                 headless=headless,
                 args=[
                     "--disable-blink-features=AutomationControlled",
@@ -384,6 +386,7 @@ def main(headless: bool = True):
             )
 
             page = context.new_page()
+            block_resources(context, "astara")
             page.set_default_timeout(30000)
             page.set_default_navigation_timeout(45000)
 
@@ -472,8 +475,7 @@ def main(headless: bool = True):
                     print(datos)
                     print("-" * 50)
 
-                    saveCar(r["marca"], datos, "astararetail.cl")
-                    stats["saved_ok"] += 1
+                    saveCar(r["marca"], datos, "astararetail.cl", on_commit=count_saved(stats))
 
                 except Exception as e:
                     stats["save_errors"] += 1
@@ -500,7 +502,8 @@ def main(headless: bool = True):
         "status": "success",
         "source": "astararetail.cl",
         "output_file": output,
-        **stats
+        **run_stats(),
+        **stats,
     }
 
     if not results:
@@ -8,7 +8,11 @@ from pathlib import Path
 from urllib.parse import urljoin
 
 from playwright.async_api import async_playwright, TimeoutError as PWTimeoutError
-from utils import saveCar
+from _browser import launch_chromium_async
+from _network import block_resources_async
+from _pages import PagePool
+from _waits import dom_quiet_async, selector_ready_async
+from utils import saveCar, count_saved, run_stats
 from utils import to_title_custom
 
 BASE = "https://www.bmw.cl"
@@ -68,7 +72,7 @@ async def try_close_cookie_banner(page):
             btn = page.locator(sel)
             if await btn.count():
                 await btn.first.click(timeout=1500)
-                await page.wait_for_timeout(800)
+                await dom_quiet_async(page, "bmw/cookies", quiet_ms=200, max_ms=800)
                 break
         except Exception:
             pass
@@ -160,10 +164,9 @@ async def get_categories_locator(page):
 
 async def scrape_categories_and_models(page):
     await page.goto(BASE, wait_until="domcontentloaded", timeout=45000)
-    await page.wait_for_timeout(3000)
+    await dom_quiet_async(page, "bmw/home", quiet_ms=400, max_ms=4500)
 
     await try_close_cookie_banner(page)
-    await page.wait_for_timeout(1500)
 
     cats, used_selector = await get_categories_locator(page)
 
@@ -283,13 +286,10 @@ async def get_versions_with_prices(page, model_url: str):
         await save_debug(page, f"bmw_model_goto_timeout_{safe_name}")
         raise
 
-    await page.wait_for_timeout(2500)
+    await dom_quiet_async(page, "bmw/modelo", quiet_ms=400, max_ms=3700)
     await try_close_cookie_banner(page)
-    await page.wait_for_timeout(1200)
 
-    try:
-        await page.wait_for_selector("nav.cont-tabs", state="attached", timeout=20000)
-    except PWTimeoutError:
+    if not await selector_ready_async(page, "nav.cont-tabs", "bmw/tabs", max_ms=20000):
         safe_name = re.sub(r"[^a-zA-Z0-9_-]", "_", model_url.split("/")[-1] or "no_tabs")
         await save_debug(page, f"bmw_model_no_tabs_{safe_name}")
         return []
@@ -339,7 +339,6 @@ async def get_versions_with_prices(page, model_url: str):
 
         try:
             await click_force(btn)
-            await page.wait_for_timeout(800)
 
             await page.wait_for_function(
                 f"""
@@ -352,6 +351,8 @@ async def get_versions_with_prices(page, model_url: str):
                 """,
                 timeout=8000,
             )
+            # la pestaña activa no garantiza que su precio ya esté: esperar el número, no un DOM quieto
+            await selector_ready_async(page, f"#model-{val} div.price p.number", "bmw/tab_precio", max_ms=4000)
 
             prices = await extract_prices_for_version(page, val)
 
@@ -396,7 +397,7 @@ async def main():
             # BMW por defecto visible
             headless = os.getenv("HEADLESS", "false").lower() == "true"
 
-            browser = await p.chromium.launch(
+            browser = await launch_chromium_async(p,
                 headless=headless,
                 args=["--disable-blink-features=AutomationControlled"]
             )
@@ -408,36 +409,48 @@ async def main():
             )
 
             page = await context.new_page()
+            await block_resources_async(context, "bmw")
             page.set_default_timeout(30000)
             page.set_default_navigation_timeout(45000)
 
             categories = await scrape_categories_and_models(page)
             stats["categories_found"] = len(categories)
 
+            pendientes = []
             for cat in categories:
                 stats["models_found"] += len(cat["models"])
 
                 for m in cat["models"]:
-                    url = m.get("modelos_url")
-                    if not url:
-                        m["versions"] = []
-                        continue
-
-                    try:
-                        versions = await get_versions_with_prices(page, url)
-                        m["versions"] = versions
-                        stats["models_processed"] += 1
-                        stats["versions_found"] += len(versions)
-
-                        for v in versions:
-                            if v.get("precio_lista") is not None:
-                                stats["versions_with_price"] += 1
-
-                    except Exception as e:
-                        stats["model_errors"] += 1
-                        m["versions"] = []
-                        print(f"[WARN] Error procesando modelo {m.get('model_name')} ({url}): {e}")
-                        traceback.print_exc()
+                    m["versions"] = []
+                    if m.get("modelos_url"):
+                        pendientes.append(m)
+
+            async def preparar(tab):
+                tab.set_default_timeout(30000)
+                tab.set_default_navigation_timeout(45000)
+
+            # cada modelo es una URL independiente: varias pestañas a la vez, resultados en orden
+            async with PagePool(context, setup=preparar, first_page=page) as pool:
+                por_modelo = await pool.map(
+                    lambda tab, m: get_versions_with_prices(tab, m["modelos_url"]),
+                    pendientes,
+                    url=lambda m: m["modelos_url"],
+                )
+
+            for m, versions in zip(pendientes, por_modelo):
+                if isinstance(versions, Exception):
+                    stats["model_errors"] += 1
+                    print(f"[WARN] Error procesando modelo {m.get('model_name')} ({m['modelos_url']}): {versions}")
+                    traceback.print_exception(versions)
+                    continue
+
+                m["versions"] = versions
+                stats["models_processed"] += 1
+                stats["versions_found"] += len(versions)
+
+                for v in versions:
+                    if v.get("precio_lista") is not None:
+                        stats["versions_with_price"] += 1
 
             with open(out_path, "w", encoding="utf-8") as f:
                 json.dump(categories, f, ensure_ascii=False, indent=2)
@@ -470,8 +483,7 @@ async def main():
                             }
 
                             print(datos)
-                            saveCar("BMW", datos, "www.bmw.cl")
-                            stats["saved_ok"] += 1
+                            saveCar("BMW", datos, "www.bmw.cl", on_commit=count_saved(stats))
 
                         except Exception as e:
                             stats["save_errors"] += 1
@@ -495,7 +507,8 @@ async def main():
         "status": "success",
         "source": "www.bmw.cl",
         "output_file": out_path,
-        **stats
+        **run_stats(),
+        **stats,
     }
 
     total_versions = stats["versions_found"]
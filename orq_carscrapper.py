@@ -8,7 +8,7 @@ from datetime import datetime
 from pathlib import Path
 from utils import quitar_palabra
 from utils import to_title_custom
-from utils import saveCar
+from utils import saveCar, count_saved, run_stats
 from utils import saveCarDate
 from bs4 import BeautifulSoup
 import unicodedata
@@ -219,7 +219,7 @@ def extract_versions_from_model_page(driver):
     return items
 
 
-def save_model_doc(firestore_db, brand_id: int, brand_name: str, item: dict):
+def save_model_doc(firestore_db, brand_id: int, brand_name: str, item: dict, on_commit=None):
     #doc_ref = firestore_db.collection("modelos").document()
     #doc_id = doc_ref.id
     modelo = normalizar_texto(item["model"])
@@ -247,7 +247,7 @@ def save_model_doc(firestore_db, brand_id: int, brand_name: str, item: dict):
                     'precio': item["precio"]
                 }
     print(datos)
-    saveCar(brand_name[0].upper() + brand_name[1:],datos,'https://www.brunofritsch.cl/')
+    saveCar(brand_name[0].upper() + brand_name[1:],datos,'https://www.brunofritsch.cl/', on_commit=on_commit)
 
 
 def bruno(driver, firestore_db):
@@ -311,8 +311,7 @@ def bruno(driver, firestore_db):
 
                 for item in version_items:
                     try:
-                        save_model_doc(firestore_db, idx, brand_name, item)
-                        stats["saved_ok"] += 1
+                        save_model_doc(firestore_db, idx, brand_name, item, on_commit=count_saved(stats))
                         print(item["model"], item["modelDetail"], idx)
                         print("-" * 100)
                     except Exception as e:
@@ -360,6 +359,7 @@ def main():
     summary = {
         "status": "success",
         "source": SOURCE_NAME,
+        **run_stats(),
         **stats,
     }
 
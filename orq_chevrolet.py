@@ -5,8 +5,10 @@ import sys
 import traceback
 from urllib.parse import urljoin, urlparse
 
-from utils import saveCar, to_title_custom
+from utils import saveCar, count_saved, to_title_custom, run_stats
 from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+from _browser import launch_chromium_async
+from _network import block_resources_async
 
 
 BASE = "https://www.coseche.com"
@@ -190,9 +192,10 @@ async def scrape():
     all_rows = []
 
     async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
+        browser = await launch_chromium_async(p, headless=True)
         context = await browser.new_context(viewport={"width": 1400, "height": 900})
         page = await context.new_page()
+        await block_resources_async(context, "chevrolet")
 
         models = await get_models_from_listing(page)
         stats["models_found"] = len(models)
@@ -264,8 +267,7 @@ def main():
                 }
 
                 if datos['precio'][3] is not None:
-                    saveCar("Chevrolet", datos, 'www.coseche.com')
-                    stats["saved_ok"] += 1
+                    saveCar("Chevrolet", datos, 'www.coseche.com', on_commit=count_saved(stats))
                 else:
                     stats["save_errors"] += 1
 
@@ -276,7 +278,8 @@ def main():
         summary = {
             "status": "success",
             "source": "www.coseche.com",
-            **stats
+            **run_stats(),
+            **stats,
         }
 
         # VALIDACIONES
@@ -13,7 +13,11 @@ import traceback
 from typing import List, Dict, Optional
 
 from playwright.sync_api import sync_playwright, TimeoutError as PWTimeoutError
-from utils import saveCar
+from _browser import launch_chromium
+from _network import block_resources
+from utils import saveCar, count_saved, writer, run_stats
+from _reports import ReportTimer, instrument
+from _checkpoint import Checkpoint
 
 # =============== CONFIG ===============
 URL = "https://www.dercocenter.cl/busqueda"
@@ -564,6 +568,10 @@ def build_savecar_payload(row: Dict) -> Optional[Dict]:
     }
 
 
+# tiempos por helper en el __RESULT__
+instrument(globals(), "saveCar", "close_cookies_modal", "select_only_brand", "click_model_in_collapse", "extract_cards_from_grid", "wait_grid_refresh")
+
+
 # =============== MAIN ===============
 def main():
     os.makedirs("out", exist_ok=True)
@@ -580,6 +588,12 @@ def main():
         "save_errors": 0,
     }
 
+    timer = ReportTimer("derco")
+    timer.print_on_exit(stats)
+
+    # unidades: "Marca/modelo" (extraído) y "Marca" (extraída y guardada)
+    cp = Checkpoint("derco")
+
     all_data = {}
     all_rows: List[Dict] = []
 
@@ -588,9 +602,10 @@ def main():
 
     try:
         with sync_playwright() as pw:
-            browser = pw.chromium.launch(headless=HEADLESS, slow_mo=SLOWMO_MS)
+            browser = launch_chromium(pw, headless=HEADLESS, slow_mo=SLOWMO_MS)
             ctx = browser.new_context(viewport=VIEWPORT)
             page = ctx.new_page()
+            block_resources(ctx, "derco")
 
             page.add_init_script("""
               try {
@@ -608,6 +623,18 @@ def main():
             close_cookies_modal(page)
 
             for brand in BRANDS:
+                if cp.done(brand):
+                    prev_rows = cp.rows(brand)
+                    all_data[brand] = prev_rows
+                    all_rows.extend(prev_rows)
+                    stats["brands_processed"] += 1
+                    prev_models = len({r.get("modelo_filtro") for r in prev_rows})
+                    stats["models_found"] += prev_models
+                    stats["models_processed"] += prev_models
+                    stats["rows_extracted"] += len(prev_rows)
+                    print(f"\n[SKIP] {brand}: extraída y guardada en un intento anterior ({len(prev_rows)} filas)")
+                    continue
+
                 close_cookies_modal(page)
                 print(f"\n=== MARCA: {brand} ===")
                 brand_rows: List[Dict] = []
@@ -631,6 +658,16 @@ def main():
                     continue
 
                 for mv in modelos:
+                    unit = f"{brand}/{mv}"
+                    if cp.done(unit):
+                        prev_rows = cp.rows(unit)
+                        brand_rows.extend(prev_rows)
+                        all_rows.extend(prev_rows)
+                        stats["models_processed"] += 1
+                        stats["rows_extracted"] += len(prev_rows)
+                        print(f"[SKIP] {unit}: ya extraído ({len(prev_rows)} filas)")
+                        continue
+
                     print(f"[RUN] {brand} -> modelo: {mv}")
 
                     try:
@@ -659,6 +696,7 @@ def main():
                         stats["models_processed"] += 1
                         stats["rows_extracted"] += len(cards)
                         stats["row_errors"] += sum(1 for r in cards if r.get("_error"))
+                        cp.mark_done(unit, cards)
 
                         print(f"[OK] Tarjetas extraídas (post filtro marca): {len(cards)}")
 
@@ -677,6 +715,7 @@ def main():
                 save_json(json_path, brand_rows)
                 save_csv(csv_path, brand_rows)
 
+                save_errors_before = stats["save_errors"]
                 for row in brand_rows:
                     try:
                         payload = build_savecar_payload(row)
@@ -689,14 +728,19 @@ def main():
                             continue
 
                         print(payload)
-                        saveCar(payload["marca"], payload, "www.dercocenter.cl")
-                        stats["saved_ok"] += 1
+                        saveCar(payload["marca"], payload, "www.dercocenter.cl", on_commit=count_saved(stats))
 
                     except Exception as e:
                         stats["save_errors"] += 1
                         print(f"[ERROR] saveCar falló para fila {row}: {e}")
                         traceback.print_exc()
 
+                # la marca queda hecha recién con sus filas confirmadas por el writer: si un commit
+                # falla, el reintento la vuelve a extraer y guardar
+                writer.flush()
+                if stats["save_errors"] == save_errors_before:
+                    cp.mark_done(brand, brand_rows)
+
                 print(f"→ Guardado {json_path} y {csv_path} ({len(brand_rows)} filas)")
 
             save_json(os.path.join("out", "plp_all.json"), all_rows)
@@ -722,7 +766,9 @@ def main():
     summary = {
         "status": "success",
         "source": "www.dercocenter.cl",
-        **stats
+        **run_stats(),
+        **stats,
+        **cp.summary(),
     }
 
     if stats["brands_processed"] == 0:
@@ -749,7 +795,7 @@ def main():
         print("[ERROR] No se extrajeron filas")
         sys.exit(1)
 
-    if stats["saved_ok"] == 0:
+    if stats["saved_ok"] == 0 and not cp.resumed:
         summary["status"] = "error"
         print(json.dumps(summary, ensure_ascii=False))
         print("[ERROR] No se guardó ningún registro en Firebase")
@@ -767,6 +813,7 @@ def main():
 
     print(json.dumps(summary, ensure_ascii=False))
     print(f"\n✅ Total global: {len(all_rows)} (out/plp_all.json & out/plp_all.csv)")
+    cp.clear()
     print("RUN_OK")
     sys.exit(0)
 
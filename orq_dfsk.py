@@ -10,7 +10,9 @@ import traceback
 from urllib.parse import urljoin, urlparse, parse_qs
 
 from playwright.async_api import async_playwright, TimeoutError as PWTimeoutError
-from utils import saveCar
+from _browser import launch_chromium_async
+from _network import block_resources_async
+from utils import saveCar, count_saved, run_stats
 
 START_URL = "https://www.dfsk.cl/product-list-page"
 BASE_URL = "https://www.dfsk.cl"
@@ -338,7 +340,7 @@ async def scrape():
 
     try:
         async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=HEADLESS)
+            browser = await launch_chromium_async(p, headless=HEADLESS)
 
             context = await browser.new_context(
                 viewport={"width": 1440, "height": 900},
@@ -351,6 +353,7 @@ async def scrape():
             )
 
             page = await context.new_page()
+            await block_resources_async(context, "dfsk")
             page.set_default_timeout(30000)
 
             print(f"Abriendo: {START_URL}")
@@ -454,8 +457,7 @@ def main():
                 }
 
                 if datos["marca"] and datos["modelo"]:
-                    saveCar('DFSK', datos, "https://www.dfsk.cl/product-list-page")
-                    stats["saved_ok"] += 1
+                    saveCar('DFSK', datos, "https://www.dfsk.cl/product-list-page", on_commit=count_saved(stats))
                 else:
                     stats["save_errors"] += 1
 
@@ -470,7 +472,8 @@ def main():
         summary = {
             "status": "success",
             "source": "https://www.dfsk.cl/product-list-page",
-            **stats
+            **run_stats(),
+            **stats,
         }
 
         if stats["models_found"] == 0:
@@ -2,13 +2,16 @@
 import os
 import re
 import json
-import time
 import sys
 import traceback
 from urllib.parse import urljoin
 
 from playwright.sync_api import sync_playwright, TimeoutError as PWTimeout
-from utils import saveCar
+from _browser import launch_chromium
+from _network import block_resources
+from _http import TEXT_JS, HttpFirst
+from _waits import changed, dom_quiet, scroll_until_stable, signature, sleep
+from utils import saveCar, count_saved, writer, run_stats
 
 marcas_difor = [
     {"brand": "Ford", "url": "https://www.difor.cl/ford-chile"},
@@ -52,11 +55,11 @@ def to_int_num(txt: str):
 
 
 def scroll_suave(page, pasos=4, pausa=0.35):
-    for i in range(1, pasos + 1):
-        page.evaluate("(y)=>window.scrollTo(0,y)", i * 800)
-        time.sleep(pausa)
-    page.evaluate("window.scrollTo(0,0)")
-    time.sleep(0.15)
+    # `pausa` es el tope por paso: cada paso sigue apenas el DOM queda quieto
+    scroll_until_stable(
+        page, "difor/scroll", step=800, rounds=pasos, idle_rounds=0,
+        quiet_ms=150, step_max_ms=int(pausa * 1000), back_to_top=True,
+    )
 
 
 def ensure_dir():
@@ -64,10 +67,12 @@ def ensure_dir():
 
 
 def safe_text(locator, timeout=1500):
+    # mismo texto que card.text_of() en versiones_desde_html: inner_text deja saltos de línea
+    # que Node.text() colapsa y la versión (modelDetail) cambiaba según el camino
     try:
         if locator.count() == 0:
             return ""
-        return locator.first.inner_text(timeout=timeout).strip()
+        return locator.first.evaluate(TEXT_JS, timeout=timeout) or ""
     except Exception:
         return ""
 
@@ -117,24 +122,29 @@ def parse_item_values(card):
     for i in range(filas.count()):
         fila = filas.nth(i)
         try:
-            label = safe_text(fila.locator(".css-17fd5p")).lower()
+            label = safe_text(fila.locator(".css-17fd5p"))
             val = safe_text(fila.locator(".css-uztjiy"))
-            val_int = precio_a_int(val)
-
-            if "inteligente" in label:
-                valores["precio_credito_inteligente_int"] = val_int
-            elif "convencional" in label:
-                valores["precio_credito_convencional_int"] = val_int
-            elif "todo medio" in label:
-                valores["precio_todo_medio_pago_int"] = val_int
-            elif "lista" in label:
-                valores["precio_lista_int"] = val_int
+            clasificar_item_value(valores, label, val)
         except Exception:
             pass
 
     return valores
 
 
+def clasificar_item_value(valores, label, val):
+    label = label.lower()
+    val_int = precio_a_int(val)
+
+    if "inteligente" in label:
+        valores["precio_credito_inteligente_int"] = val_int
+    elif "convencional" in label:
+        valores["precio_credito_convencional_int"] = val_int
+    elif "todo medio" in label:
+        valores["precio_todo_medio_pago_int"] = val_int
+    elif "lista" in label:
+        valores["precio_lista_int"] = val_int
+
+
 def parse_highlights(card):
     datos = {
         "cc": None,
@@ -146,20 +156,22 @@ def parse_highlights(card):
     props = card.locator(".highlight-properties-container .highlight-property")
 
     for i in range(props.count()):
-        txt = safe_text(props.nth(i).locator("p"))
-
-        if "cc" in txt.lower():
-            datos["cc"] = to_int_num(txt)
-        elif any(k in txt.lower() for k in ["gasolina", "diesel", "híbr", "electr"]):
-            datos["combustible"] = txt
-        elif any(k in txt.lower() for k in ["automática", "manual", "cvt", "dct"]):
-            datos["transmision"] = txt
-        elif "hp" in txt.lower():
-            datos["potencia_hp"] = to_int_num(txt)
+        clasificar_highlight(datos, safe_text(props.nth(i).locator("p")))
 
     return datos
 
 
+def clasificar_highlight(datos, txt):
+    if "cc" in txt.lower():
+        datos["cc"] = to_int_num(txt)
+    elif any(k in txt.lower() for k in ["gasolina", "diesel", "híbr", "electr"]):
+        datos["combustible"] = txt
+    elif any(k in txt.lower() for k in ["automática", "manual", "cvt", "dct"]):
+        datos["transmision"] = txt
+    elif "hp" in txt.lower():
+        datos["potencia_hp"] = to_int_num(txt)
+
+
 def extraer_versiones(page, modelo, marca):
     versiones = []
 
@@ -186,25 +198,12 @@ def extraer_versiones(page, modelo, marca):
             if card.locator(".MuiCardActions-root a[href]").count():
                 href = card.locator(".MuiCardActions-root a[href]").first.get_attribute("href") or ""
 
-            url_version = urljoin(page.url, href) if href else ""
-
             if not version and precio_card_int is None and not href:
                 continue
 
-            versiones.append({
-                "marca": marca,
-                "modelo": modelo,
-                "version": version,
-                "precio_card_int": precio_card_int,
-                "bono_int": bono_int,
-                "precio_credito_inteligente_int": precios.get("precio_credito_inteligente_int"),
-                "precio_credito_convencional_int": precios.get("precio_credito_convencional_int"),
-                "precio_todo_medio_pago_int": precios.get("precio_todo_medio_pago_int"),
-                "precio_lista_int": precios.get("precio_lista_int"),
-                **highlights,
-                "url_modelo": page.url,
-                "url_version": url_version
-            })
+            versiones.append(armar_version(
+                marca, modelo, version, precio_card_int, bono_int, precios, highlights, page.url, href
+            ))
 
         except Exception as e:
             versiones.append({
@@ -217,6 +216,58 @@ def extraer_versiones(page, modelo, marca):
     return versiones
 
 
+def armar_version(marca, modelo, version, precio_card_int, bono_int, precios, highlights, url_modelo, href):
+    return {
+        "marca": marca,
+        "modelo": modelo,
+        "version": version,
+        "precio_card_int": precio_card_int,
+        "bono_int": bono_int,
+        "precio_credito_inteligente_int": precios.get("precio_credito_inteligente_int"),
+        "precio_credito_convencional_int": precios.get("precio_credito_convencional_int"),
+        "precio_todo_medio_pago_int": precios.get("precio_todo_medio_pago_int"),
+        "precio_lista_int": precios.get("precio_lista_int"),
+        **highlights,
+        "url_modelo": url_modelo,
+        "url_version": urljoin(url_modelo, href) if href else ""
+    }
+
+
+def versiones_desde_html(doc, modelo, marca):
+    """Mismo recorrido que extraer_versiones() sobre el HTML servido (camino HTTP)."""
+    versiones = []
+
+    # el slider renderiza todas las cards en el HTML; el scroll solo dispara imágenes
+    for card in doc.select(".splide__list li.splide__slide [id=new-car-version-card]"):
+        version = card.text_of(".MuiCardHeader-content .css-wp624j")
+        precio_card_int = precio_a_int(card.text_of(".card-price-title"))
+        bono_int = precio_a_int(card.text_of(".css-ycodjm"))
+
+        precios = {}
+        for fila in card.select(".MuiGrid-container.item-value"):
+            clasificar_item_value(precios, fila.text_of(".css-17fd5p"), fila.text_of(".css-uztjiy"))
+
+        highlights = {"cc": None, "combustible": "", "transmision": "", "potencia_hp": None}
+        for prop in card.select(".highlight-properties-container .highlight-property"):
+            clasificar_highlight(highlights, prop.text_of("p"))
+
+        href = card.attr_of(".MuiCardActions-root a[href]", "href")
+
+        if not version and precio_card_int is None and not href:
+            continue
+
+        versiones.append(armar_version(
+            marca, modelo, version, precio_card_int, bono_int, precios, highlights, doc.url, href
+        ))
+
+    return versiones
+
+
+def versiones_completas(versiones):
+    # sin nombre o sin precio en alguna card = el HTML llegó sin hidratar
+    return bool(versiones) and all(v["version"] and v["precio_card_int"] is not None for v in versiones)
+
+
 # ============ MAIN HELPERS ============
 def close_cookies_if_any(page):
     candidates = [
@@ -232,17 +283,29 @@ def close_cookies_if_any(page):
         try:
             if page.locator(sel).first.is_visible():
                 page.locator(sel).first.click(timeout=800)
-                time.sleep(0.2)
+                sleep(0.2, "difor/cookies")
         except Exception:
             pass
 
 
+GRID = "#listing-collections"
+
+
+def click_tab(page, tab, name, timeout):
+    # la pestaña pide otra grilla: se espera a que la grilla cambie (si la pestaña ya estaba
+    # activa no cambia nada y no hay que esperar)
+    activa = tab.get_attribute("aria-selected") == "true"
+    before = signature(page, GRID)
+    tab.click(timeout=timeout)
+    if not activa:
+        changed(page, GRID, name, before, max_ms=8000)
+
+
 def click_tab_by_text(page, text):
     try:
         tab = page.locator(f"button[role='tab']:has-text('{text}')").first
         if tab.count() > 0 and tab.is_visible():
-            tab.click(timeout=1500)
-            time.sleep(0.8)
+            click_tab(page, tab, "difor/tab", timeout=1500)
             return True
     except Exception:
         pass
@@ -254,8 +317,7 @@ def click_tab_todos_generico(page):
     try:
         todos = page.locator("[id$='-todos-chile']")
         if todos.count() > 0 and todos.first.is_visible():
-            todos.first.click(timeout=1200)
-            time.sleep(0.2)
+            click_tab(page, todos.first, "difor/tab_todos", timeout=1200)
             return
     except Exception:
         pass
@@ -263,8 +325,7 @@ def click_tab_todos_generico(page):
     try:
         btn = page.locator("button[role='tab']:has-text('Todos')")
         if btn.count() > 0 and btn.first.is_visible():
-            btn.first.click(timeout=1200)
-            time.sleep(0.2)
+            click_tab(page, btn.first, "difor/tab_todos", timeout=1200)
             return
     except Exception:
         pass
@@ -274,8 +335,7 @@ def click_tab_todos_generico(page):
         for i in range(min(6, tabs.count())):
             t = tabs.nth(i)
             if t.is_visible():
-                t.click(timeout=1000)
-                time.sleep(0.2)
+                click_tab(page, t, "difor/tab_todos", timeout=1000)
     except Exception:
         pass
 
@@ -289,7 +349,7 @@ def wait_grid_with_scroll(page, max_tries=8):
             return True
 
         page.evaluate("(y)=>window.scrollTo(0,y)", (i + 1) * 800)
-        time.sleep(0.5)
+        dom_quiet(page, "difor/grilla", quiet_ms=200, max_ms=500)
 
     return page.locator('#listing-collections a#collection-card').count() > 0
 
@@ -387,9 +447,12 @@ def scrape_brand_flat_json(brand_url, nombre_marca="marca", headless=False):
     }
 
     all_versions = []
+    # el listado necesita el navegador (tabs + grilla con scroll); las fichas de modelo se
+    # intentan primero por HTTP
+    web = HttpFirst("difor")
 
     with sync_playwright() as p:
-        browser = p.chromium.launch(
+        browser = launch_chromium(p,
             headless=headless,
             args=["--window-size=1366,900"]
         )
@@ -405,6 +468,7 @@ def scrape_brand_flat_json(brand_url, nombre_marca="marca", headless=False):
         )
 
         page = ctx.new_page()
+        block_resources(ctx, "difor")
 
         page.goto(brand_url, wait_until="domcontentloaded", timeout=45000)
         close_cookies_if_any(page)
@@ -419,10 +483,10 @@ def scrape_brand_flat_json(brand_url, nombre_marca="marca", headless=False):
             if not ok:
                 for _ in range(3):
                     page.mouse.wheel(0, 1000)
-                    time.sleep(0.3)
+                    sleep(0.3, "difor/grilla_rueda")
 
                 page.mouse.wheel(0, -3000)
-                time.sleep(0.3)
+                sleep(0.3, "difor/grilla_rueda")
 
             modelos = extraer_modelos(page)
 
@@ -439,11 +503,18 @@ def scrape_brand_flat_json(brand_url, nombre_marca="marca", headless=False):
             try:
                 print(f"[RUN] {nombre_marca} - {m.get('modelo')}")
 
-                page.goto(m["url_modelo"], wait_until="domcontentloaded", timeout=45000)
-                scroll_suave(page)
-                close_cookies_if_any(page)
+                vers = web.extract(
+                    "modelo", m["url_modelo"],
+                    parse=lambda doc: versiones_desde_html(doc, m["modelo"], nombre_marca),
+                    complete=versiones_completas,
+                )
+
+                if vers is None:
+                    page.goto(m["url_modelo"], wait_until="domcontentloaded", timeout=45000)
+                    scroll_suave(page)
+                    close_cookies_if_any(page)
 
-                vers = extraer_versiones(page, m["modelo"], nombre_marca)
+                    vers = extraer_versiones(page, m["modelo"], nombre_marca)
 
                 stats["models_processed"] += 1
                 stats["versions_found"] += len([v for v in vers if not v.get("_error")])
@@ -460,6 +531,7 @@ def scrape_brand_flat_json(brand_url, nombre_marca="marca", headless=False):
 
         ctx.close()
         browser.close()
+    web.close()
 
     path = os.path.join("salida_modelos", f"{nombre_marca}_versiones.json")
 
@@ -472,8 +544,7 @@ def scrape_brand_flat_json(brand_url, nombre_marca="marca", headless=False):
             datos = build_savecar_payload(a)
 
             if datos["marca"] and datos["modelo"]:
-                saveCar(a['marca'], datos, 'www.difor.cl')
-                stats["saved_ok"] += 1
+                saveCar(a['marca'], datos, 'www.difor.cl', on_commit=count_saved(stats))
                 print(datos)
                 print("-" * 100)
             else:
@@ -484,6 +555,8 @@ def scrape_brand_flat_json(brand_url, nombre_marca="marca", headless=False):
             print(f"[ERROR] saveCar falló para {a}: {e}")
             traceback.print_exc()
 
+    writer.flush()  # los on_commit de esta marca corren acá, antes de devolver stats
+
     with open(path, "w", encoding="utf-8") as f:
         json.dump(all_versions, f, ensure_ascii=False, indent=2)
 
@@ -549,7 +622,8 @@ def main():
         summary = {
             "status": "success",
             "source": "www.difor.cl",
-            **global_stats
+            **run_stats(),
+            **global_stats,
         }
 
         if global_stats["brands_processed"] == 0:
@@ -11,7 +11,9 @@ from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 from playwright.async_api import async_playwright, TimeoutError as PWTimeout
-from utils import to_title_custom, saveCar
+from _browser import launch_chromium_async
+from _network import block_resources_async
+from utils import to_title_custom, saveCar, count_saved, run_stats
 
 URL_LISTA_MODELOS = "https://geely.cl/modelos/"
 MODELOS_JSON = Path("geely_modelos.json")
@@ -257,7 +259,7 @@ async def scrape():
     versiones_formato: List[Dict[str, Any]] = []
 
     async with async_playwright() as pw:
-        browser = await pw.chromium.launch(headless=HEADLESS)
+        browser = await launch_chromium_async(pw, headless=HEADLESS)
         ctx = await browser.new_context(
             locale="es-CL",
             user_agent=(
@@ -268,13 +270,7 @@ async def scrape():
             viewport={"width": 1366, "height": 900},
         )
 
-        async def route_handler(route):
-            url = route.request.url
-            if any(x in url for x in ["google-analytics", "gtm", "hotjar", "doubleclick"]):
-                return await route.abort()
-            return await route.continue_()
-
-        await ctx.route("**/*", route_handler)
+        await block_resources_async(ctx, "geely")
 
         try:
             if MODELOS_JSON.exists():
@@ -353,8 +349,7 @@ def main():
                 }
 
                 if datos["marca"] and datos["modelo"] and datos["modelDetail"]:
-                    saveCar('Geely', datos, 'https://geely.cl')
-                    stats["saved_ok"] += 1
+                    saveCar('Geely', datos, 'https://geely.cl', on_commit=count_saved(stats))
                 else:
                     stats["save_errors"] += 1
 
@@ -366,7 +361,8 @@ def main():
         summary = {
             "status": "success",
             "source": "https://geely.cl",
-            **stats
+            **run_stats(),
+            **stats,
         }
 
         if stats["models_found"] == 0:
@@ -6,7 +6,9 @@ import traceback
 from urllib.parse import urljoin
 
 from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
-from utils import saveCar
+from _browser import launch_chromium
+from _network import block_resources
+from utils import saveCar, count_saved, run_stats
 
 BASE_URL = "https://www.jacautoschile.cl/modelos/"
 HEADLESS = os.getenv("HEADLESS", "true").lower() == "true"
@@ -309,13 +311,14 @@ def scrapear_jac_versiones(headless=True):
     }
 
     with sync_playwright() as p:
-        browser = p.chromium.launch(headless=headless)
+        browser = launch_chromium(p, headless=headless)
         context = browser.new_context(
             viewport={"width": 1440, "height": 2200},
             locale="es-CL"
         )
 
         page_listado = context.new_page()
+        block_resources(context, "jac")
         modelos = listar_modelos_jac(page_listado)
         stats["models_found"] = len(modelos)
 
@@ -390,8 +393,7 @@ def main():
 
                 if datos["marca"] and datos["modelo"] and datos["modelDetail"]:
                     print(datos)
-                    saveCar('JAC', datos, 'www.jacautoschile.cl')
-                    stats["saved_ok"] += 1
+                    saveCar('JAC', datos, 'www.jacautoschile.cl', on_commit=count_saved(stats))
                 else:
                     stats["save_errors"] += 1
 
@@ -403,7 +405,8 @@ def main():
         summary = {
             "status": "success",
             "source": "www.jacautoschile.cl",
-            **stats
+            **run_stats(),
+            **stats,
         }
 
         if stats["models_found"] == 0:
@@ -6,13 +6,20 @@ import sys
 import traceback
 from urllib.parse import urljoin, urlparse
 
-from utils import saveCar
+from utils import saveCar, writer, run_stats
 from utils import to_title_custom
+from _pipeline import SavePipeline
 from playwright.async_api import async_playwright
+from _browser import launch_chromium_async
+from _network import block_resources_async
+from _capture import ResponseCapture, count_rows
+from _pages import PagePool
+from _waits import count_stable_async, scroll_until_stable_async
 
 
 BASE_URL = "https://www.kia.cl"
 HEADLESS = os.getenv("HEADLESS", "true").lower() == "true"
+SAVE_WORKERS = int(os.getenv("SAVE_WORKERS", "4"))
 
 
 def precio_a_int(texto: str | None) -> int | None:
@@ -128,24 +135,127 @@ async def extraer_modelos_desde_menu(page) -> list[dict]:
     return list(dedup.values())
 
 
-async def extraer_versiones_de_modelo(page, detalle_url: str, model_name: str) -> list[dict]:
-    await page.goto(detalle_url, wait_until="domcontentloaded", timeout=60000)
-    await page.wait_for_timeout(2000)
-
+def dataset_desde_html(html: str | None) -> list | None:
+    # mismo parseo que hace el JS de abajo, pero sobre el HTML capturado (sin tocar el DOM)
+    m = re.search(r"VersionPrecioPreciosModelo\s*=\s*'([\s\S]*?)';", html or "")
+    if not m:
+        return None
+    decoded = re.sub(r"\\x([0-9A-Fa-f]{2})", lambda h: chr(int(h.group(1), 16)), m.group(1))
     try:
-        for _ in range(3):
-            await page.mouse.wheel(0, 1200)
-            await page.wait_for_timeout(300)
-    except Exception:
-        pass
+        data = json.loads(decoded)
+    except ValueError:
+        return None
+    return data if isinstance(data, list) and data else None
 
-    try:
-        await page.wait_for_selector(".kia-cmp__version-precio, .card-version, .kia-cmp__version-precio__content", timeout=15000)
-    except Exception:
-        pass
 
+def versiones_desde_dataset(dataset: list, detalle_url: str, model_name: str, slug: str | None) -> list[dict]:
+    versiones = []
+    for row in dataset:
+        try:
+            row_model = (row.get("modelo") or "").strip()
+            ok_model = row_model.lower() == (model_name or "").strip().lower()
+
+            if not ok_model and row_model and model_name:
+                a = set(row_model.lower().split())
+                b = set(model_name.lower().split())
+                ok_model = len(a & b) >= 1
+
+            if not ok_model and row_model:
+                continue
+
+            sap = row.get("SAPCode")
+            version = row.get("version")
+
+            precio_lista_texto = row.get("precioLista")
+            bono_directo_texto = row.get("bonoDirecto")
+            bono_forum_texto = row.get("bonoForum")
+
+            precio_desde_texto = row.get("precioBonoDirectoBonoForum") or row.get("precioConBonoDirecto")
+            precio_desde = row.get("orderPrice")
+            if precio_desde is None:
+                precio_desde = precio_a_int(precio_desde_texto)
+
+            iv_texto = row.get("greenTaxDiscount") or row.get("greenTax")
+
+            versiones.append(
+                {
+                    "brand": "KIA",
+                    "model": model_name,
+                    "model_url": detalle_url,
+                    "sap_code": str(sap) if sap is not None else None,
+                    "version": (version or "").strip() or None,
+                    "precio_desde_texto": precio_desde_texto,
+                    "precio_desde": precio_desde,
+                    "precio_lista_texto": precio_lista_texto,
+                    "precio_lista": precio_a_int(precio_lista_texto),
+                    "bono_directo_texto": bono_directo_texto,
+                    "bono_directo": precio_a_int(bono_directo_texto),
+                    "bono_financiamiento_texto": bono_forum_texto,
+                    "bono_financiamiento": precio_a_int(bono_forum_texto),
+                    "impuesto_verde_texto": iv_texto,
+                    "impuesto_verde": precio_a_int(iv_texto),
+                    "cotizar_url": urljoin(BASE_URL, f"/quiero-un-kia/cotiza-tu-kia.html?modelo={slug}") if slug else None,
+                    "modelo_filtro": f"KIA {model_name}".upper(),
+                }
+            )
+        except Exception as e:
+            versiones.append({
+                "_error": str(e),
+                "brand": "KIA",
+                "model": model_name,
+                "model_url": detalle_url,
+                "modelo_filtro": f"KIA {model_name}".upper(),
+            })
+    return versiones
+
+
+def dedupe_versiones(versiones: list[dict]) -> list[dict]:
+    seen = set()
+    uniq = []
+    for v in versiones:
+        if v.get("_error"):
+            uniq.append(v)
+            continue
+
+        key = (v.get("sap_code") or "").strip() or (v.get("version") or "").strip()
+        if not key:
+            continue
+        if key in seen:
+            continue
+        seen.add(key)
+        uniq.append(v)
+
+    return uniq
+
+
+async def extraer_versiones_de_modelo(page, detalle_url: str, model_name: str, cap: ResponseCapture | None = None) -> list[dict]:
+    if cap:
+        cap.clear()
+    await page.goto(detalle_url, wait_until="domcontentloaded", timeout=60000)
     slug = slug_from_model_url(detalle_url)
 
+    # el dataset viene en el HTML del documento: si está, no hace falta esperar ni leer el DOM
+    if cap:
+        await cap.settle()
+        dataset = None
+        for doc in reversed(cap.matching()):
+            dataset = dataset_desde_html(doc.text)
+            if dataset:
+                break
+        if dataset:
+            versiones = dedupe_versiones(versiones_desde_dataset(dataset, detalle_url, model_name, slug))
+            if versiones:
+                count_rows(len(versiones))
+                return versiones
+        count_rows(0, fallback=True)
+
+    # camino DOM: 3 pasos de scroll para el lazy-load y esperar a que la cantidad de cards se estabilice
+    await scroll_until_stable_async(page, "kia/scroll", step=1200, rounds=3, idle_rounds=0, step_max_ms=300, wheel=True)
+    await count_stable_async(
+        page, ".kia-cmp__version-precio, .card-version, .kia-cmp__version-precio__content",
+        "kia/versiones", stable_ms=500, max_ms=15000,
+    )
+
     data = await page.evaluate(
         """
         () => {
@@ -194,62 +304,7 @@ async def extraer_versiones_de_modelo(page, detalle_url: str, model_name: str) -
     versiones = []
 
     if data.get("dataset"):
-        for row in data["dataset"]:
-            try:
-                row_model = (row.get("modelo") or "").strip()
-                ok_model = row_model.lower() == (model_name or "").strip().lower()
-
-                if not ok_model and row_model and model_name:
-                    a = set(row_model.lower().split())
-                    b = set(model_name.lower().split())
-                    ok_model = len(a & b) >= 1
-
-                if not ok_model and row_model:
-                    continue
-
-                sap = row.get("SAPCode")
-                version = row.get("version")
-
-                precio_lista_texto = row.get("precioLista")
-                bono_directo_texto = row.get("bonoDirecto")
-                bono_forum_texto = row.get("bonoForum")
-
-                precio_desde_texto = row.get("precioBonoDirectoBonoForum") or row.get("precioConBonoDirecto")
-                precio_desde = row.get("orderPrice")
-                if precio_desde is None:
-                    precio_desde = precio_a_int(precio_desde_texto)
-
-                iv_texto = row.get("greenTaxDiscount") or row.get("greenTax")
-
-                versiones.append(
-                    {
-                        "brand": "KIA",
-                        "model": model_name,
-                        "model_url": detalle_url,
-                        "sap_code": str(sap) if sap is not None else None,
-                        "version": (version or "").strip() or None,
-                        "precio_desde_texto": precio_desde_texto,
-                        "precio_desde": precio_desde,
-                        "precio_lista_texto": precio_lista_texto,
-                        "precio_lista": precio_a_int(precio_lista_texto),
-                        "bono_directo_texto": bono_directo_texto,
-                        "bono_directo": precio_a_int(bono_directo_texto),
-                        "bono_financiamiento_texto": bono_forum_texto,
-                        "bono_financiamiento": precio_a_int(bono_forum_texto),
-                        "impuesto_verde_texto": iv_texto,
-                        "impuesto_verde": precio_a_int(iv_texto),
-                        "cotizar_url": urljoin(BASE_URL, f"/quiero-un-kia/cotiza-tu-kia.html?modelo={slug}") if slug else None,
-                        "modelo_filtro": f"KIA {model_name}".upper(),
-                    }
-                )
-            except Exception as e:
-                versiones.append({
-                    "_error": str(e),
-                    "brand": "KIA",
-                    "model": model_name,
-                    "model_url": detalle_url,
-                    "modelo_filtro": f"KIA {model_name}".upper(),
-                })
+        versiones = versiones_desde_dataset(data["dataset"], detalle_url, model_name, slug)
 
     if not versiones:
         for c in data.get("cards", []):
@@ -293,22 +348,46 @@ async def extraer_versiones_de_modelo(page, detalle_url: str, model_name: str) -
                     "modelo_filtro": f"KIA {model_name}".upper(),
                 })
 
-    seen = set()
-    uniq = []
-    for v in versiones:
-        if v.get("_error"):
-            uniq.append(v)
-            continue
+    return dedupe_versiones(versiones)
 
-        key = (v.get("sap_code") or "").strip() or (v.get("version") or "").strip()
-        if not key:
-            continue
-        if key in seen:
-            continue
-        seen.add(key)
-        uniq.append(v)
 
-    return uniq
+def fila_a_datos(r: dict) -> dict | None:
+    precio_desde = r.get("precio_desde")
+    precio_lista = r.get("precio_lista")
+
+    # Mantengo tu lógica base: CI y Convencional usan precio_desde
+    # si no hay precio_lista, caen a precio_desde para no romper
+    precio_final_lista = precio_lista if precio_lista is not None else precio_desde
+
+    precio = [
+        precio_desde,
+        precio_desde,
+        precio_final_lista,
+        precio_final_lista
+    ]
+
+    datos = {
+        'modelo': r.get('model'),
+        'marca': 'KIA',
+        'modelDetail': r.get('version'),
+        'tiposprecio': ['Crédito inteligente', 'Crédito convencional', 'Todo medio de pago', 'Precio de lista'],
+        'precio': precio
+    }
+
+    if datos["marca"] and datos["modelo"] and datos["modelDetail"]:
+        return datos
+    return None
+
+
+async def encolar_versiones(pipe: SavePipeline, versiones: list[dict]):
+    for r in versiones:
+        datos = None if r.get("_error") else fila_a_datos(r)
+        if datos is None:
+            pipe.mark_error()
+            continue
+        print(datos)
+        # submit bloquea si la cola está llena; se hace fuera del event loop
+        await asyncio.to_thread(pipe.submit, 'Kia', datos, "www.kia.cl")
 
 
 async def scrape():
@@ -322,64 +401,85 @@ async def scrape():
         "save_errors": 0,
     }
 
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=HEADLESS)
-        context = await browser.new_context(locale="es-CL")
-        page = await context.new_page()
-
-        await page.goto(BASE_URL, wait_until="domcontentloaded", timeout=60000)
+    # saveCar corre en background mientras se siguen recorriendo modelos
+    pipe = SavePipeline(saveCar, stats, workers=SAVE_WORKERS, flush=writer.flush)
 
-        for sel in [
-            "button:has-text('Aceptar')",
-            "button:has-text('Acepto')",
-            "button:has-text('Aceptar todo')",
-            "button:has-text('Aceptar todas')",
-        ]:
-            try:
-                if await page.locator(sel).first.is_visible(timeout=1500):
-                    await page.locator(sel).first.click()
-                    break
-            except Exception:
-                pass
-
-        modelos = await extraer_modelos_desde_menu(page)
-        stats["models_found"] = len(modelos)
-        print(f"Modelos encontrados: {len(modelos)}")
-
-        all_versions = []
-        errors = []
-
-        for i, m in enumerate(modelos, 1):
-            detalle_url = m["detalle_url"]
-            model_name = m["model"]
-            print(f"\n[{i}/{len(modelos)}] Entrando a: {model_name} -> {detalle_url}")
-
-            try:
-                versiones = await extraer_versiones_de_modelo(page, detalle_url, model_name)
+    try:
+        async with async_playwright() as p:
+            browser = await launch_chromium_async(p, headless=HEADLESS)
+            context = await browser.new_context(locale="es-CL")
+            page = await context.new_page()
+            await block_resources_async(context, "kia")
+            cap = await ResponseCapture("kia", [r"kia\.cl/"], types={"document"}).attach_async(page)
+
+            await page.goto(BASE_URL, wait_until="domcontentloaded", timeout=60000)
+
+            for sel in [
+                "button:has-text('Aceptar')",
+                "button:has-text('Acepto')",
+                "button:has-text('Aceptar todo')",
+                "button:has-text('Aceptar todas')",
+            ]:
+                try:
+                    if await page.locator(sel).first.is_visible(timeout=1500):
+                        await page.locator(sel).first.click()
+                        break
+                except Exception:
+                    pass
+
+            modelos = await extraer_modelos_desde_menu(page)
+            stats["models_found"] = len(modelos)
+            print(f"Modelos encontrados: {len(modelos)}")
+
+            all_versions = []
+            errors = []
+
+            # cada pestaña del pool con su propia captura del documento
+            caps = {page: cap}
+
+            async def preparar(tab):
+                if tab not in caps:
+                    caps[tab] = await ResponseCapture("kia", [r"kia\.cl/"], types={"document"}).attach_async(tab)
+
+            async def procesar(tab, item):
+                i, m = item
+                print(f"\n[{i}/{len(modelos)}] Entrando a: {m['model']} -> {m['detalle_url']}")
+                versiones = await extraer_versiones_de_modelo(tab, m["detalle_url"], m["model"], caps[tab])
+                print(f"   [{m['model']}] versiones: {len(versiones)}")
+                await encolar_versiones(pipe, versiones)
+                return versiones
+
+            # los modelos son URLs independientes: varias pestañas a la vez, resultados en orden
+            async with PagePool(context, setup=preparar, first_page=page) as pool:
+                por_modelo = await pool.map(procesar, list(enumerate(modelos, 1)), url=lambda it: it[1]["detalle_url"])
+
+            for m, versiones in zip(modelos, por_modelo):
+                if isinstance(versiones, Exception):
+                    stats["model_errors"] += 1
+                    errors.append({"model": m["model"], "url": m["detalle_url"], "error": str(versiones)})
+                    print(f"   ❌ error en {m['model']}: {versiones}")
+                    continue
                 stats["models_processed"] += 1
                 stats["versions_found"] += len([v for v in versiones if not v.get("_error")])
                 stats["version_errors"] += len([v for v in versiones if v.get("_error")])
-                print(f"   versiones: {len(versiones)}")
                 all_versions.extend(versiones)
-            except Exception as e:
-                stats["model_errors"] += 1
-                errors.append({"model": model_name, "url": detalle_url, "error": str(e)})
-                print(f"   ❌ error: {e}")
-
-        payload = {
-            "brand": "KIA",
-            "start_url": BASE_URL,
-            "total_models": len(modelos),
-            "total_versions": len(all_versions),
-            "items": all_versions,
-            "errors": errors,
-        }
 
-        with open("kia_versiones.json", "w", encoding="utf-8") as f:
-            json.dump(payload, f, ensure_ascii=False, indent=2)
+            payload = {
+                "brand": "KIA",
+                "start_url": BASE_URL,
+                "total_models": len(modelos),
+                "total_versions": len(all_versions),
+                "items": all_versions,
+                "errors": errors,
+            }
+
+            with open("kia_versiones.json", "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False, indent=2)
 
-        await context.close()
-        await browser.close()
+            await context.close()
+            await browser.close()
+    finally:
+        pipe.close()
 
     return payload, stats
 
@@ -388,50 +488,11 @@ def main():
     try:
         payload, stats = asyncio.run(scrape())
 
-        for r in payload["items"]:
-            try:
-                if r.get("_error"):
-                    stats["save_errors"] += 1
-                    continue
-
-                precio_desde = r.get("precio_desde")
-                precio_lista = r.get("precio_lista")
-
-                # Mantengo tu lógica base: CI y Convencional usan precio_desde
-                # si no hay precio_lista, caen a precio_desde para no romper
-                precio_final_lista = precio_lista if precio_lista is not None else precio_desde
-
-                precio = [
-                    precio_desde,
-                    precio_desde,
-                    precio_final_lista,
-                    precio_final_lista
-                ]
-
-                datos = {
-                    'modelo': r.get('model'),
-                    'marca': 'KIA',
-                    'modelDetail': r.get('version'),
-                    'tiposprecio': ['Crédito inteligente', 'Crédito convencional', 'Todo medio de pago', 'Precio de lista'],
-                    'precio': precio
-                }
-
-                if datos["marca"] and datos["modelo"] and datos["modelDetail"]:
-                    print(datos)
-                    saveCar('Kia', datos, "www.kia.cl")
-                    stats["saved_ok"] += 1
-                else:
-                    stats["save_errors"] += 1
-
-            except Exception as e:
-                stats["save_errors"] += 1
-                print(f"[ERROR] saveCar falló para fila {r}: {e}")
-                traceback.print_exc()
-
         summary = {
             "status": "success",
             "source": "www.kia.cl",
-            **stats
+            **stats,
+            **run_stats(),
         }
 
         if stats["models_found"] == 0:
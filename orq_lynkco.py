@@ -1,4 +1,6 @@
 from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
+from _browser import launch_chromium
+from _network import block_resources
 from urllib.parse import urljoin
 import re
 import json
@@ -6,7 +8,7 @@ import os
 import sys
 import traceback
 
-from utils import saveCar
+from utils import saveCar, count_saved, run_stats
 from utils import to_title_custom
 
 BASE_URL = "https://www.lynkco.cl"
@@ -185,8 +187,9 @@ def scrap_lynkco():
     }
 
     with sync_playwright() as p:
-        browser = p.chromium.launch(headless=HEADLESS)
+        browser = launch_chromium(p, headless=HEADLESS)
         page = browser.new_page()
+        block_resources(page, "lynkco")
 
         modelos = obtener_modelos(page)
 
@@ -266,12 +269,12 @@ def main():
                     "precio": precio
                 }
 
-                saveCar("Lynk & Co", datos, 'www.lynkco.cl')
-                stats["saved_ok"] += 1
+                saveCar("Lynk & Co", datos, 'www.lynkco.cl', on_commit=count_saved(stats))
 
             except Exception:
                 stats["save_errors"] += 1
 
+        stats.update(run_stats())
         print("RUN_OK")
         print(json.dumps(stats, ensure_ascii=False))
 
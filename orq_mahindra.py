@@ -6,7 +6,9 @@ import traceback
 from urllib.parse import urljoin
 
 from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
-from utils import saveCar
+from _browser import launch_chromium
+from _network import block_resources
+from utils import saveCar, count_saved, run_stats
 
 DETAIL_URL = "https://www.mahindra.cl/modelos/suv/xuv-3xo/#versiones"
 BASE_URL = "https://www.mahindra.cl"
@@ -182,7 +184,7 @@ def main():
 
     try:
         with sync_playwright() as p:
-            browser = p.chromium.launch(
+            browser = launch_chromium(p,
                 headless=HEADLESS,
                 args=[
                     "--disable-blink-features=AutomationControlled",
@@ -191,6 +193,7 @@ def main():
             )
 
             page = browser.new_page(viewport={"width": 1440, "height": 2200})
+            block_resources(page, "mahindra")
             page.set_default_timeout(60000)
 
             data = scrapear_versiones_mahindra(page)
@@ -244,8 +247,7 @@ def main():
 
                     if datos["marca"] and datos["modelo"] and datos["modelDetail"]:
                         print(datos)
-                        saveCar('Mahindra', datos, 'www.mahindra.cl')
-                        stats["saved_ok"] += 1
+                        saveCar('Mahindra', datos, 'www.mahindra.cl', on_commit=count_saved(stats))
                     else:
                         stats["save_errors"] += 1
 
@@ -288,7 +290,8 @@ def main():
     summary = {
         "status": "success",
         "source": "www.mahindra.cl",
-        **stats
+        **run_stats(),
+        **stats,
     }
 
     if stats["models_found"] == 0:
@@ -20,14 +20,20 @@ from typing import List, Dict, Optional
 from urllib.parse import urlparse, parse_qs
 from collections import Counter
 from playwright.sync_api import sync_playwright, TimeoutError as PWTimeoutError
+from _browser import launch_chromium
+from _network import block_resources
 
-from utils import saveCar, to_title_custom
+from utils import saveCar, to_title_custom, writer as db_writer, run_stats
+from _pipeline import SavePipeline
+from _reports import ReportTimer, span, timed
+from _checkpoint import Checkpoint
 
 # ===================== CONFIG =====================
 URL = "https://www.mazda.cl/busqueda"
 # Mantengo comportamiento del script original: visible por defecto
 HEADLESS = os.getenv("HEADLESS", "false").lower() == "true"
 SLOWMO_MS = 0
+SAVE_WORKERS = int(os.getenv("SAVE_WORKERS", "4"))
 VIEWPORT = {"width": 1400, "height": 1000}
 
 # ===================== SELECTORES =================
@@ -99,6 +105,7 @@ def wait_grid_update(page, previous_hash: Optional[str] = None, timeout_ms: int
     return str(hash(page.locator(SEL_ARTICLE).first.inner_html()))
 
 
+@timed("overlays")
 def close_overlays(page) -> bool:
     """
     Cierra u oculta overlays/modales que puedan interceptar clicks.
@@ -245,6 +252,7 @@ def _scroll_to_li_by_value(page, container, value: str):
         return False
 
 # ===================== MODELOS =================
+@timed("models/list")
 def get_all_models(page) -> List[Dict]:
     expand_modelos_if_needed(page)
     scroll_sweep_filter(page)
@@ -275,6 +283,7 @@ def get_all_models(page) -> List[Dict]:
 
     return out
 
+@timed("filters/uncheck")
 def uncheck_all_models(page):
     expand_modelos_if_needed(page)
     checked = page.locator(f"{SEL_UL} input.plp_input__checkbox:checked")
@@ -309,6 +318,7 @@ def _locate_by_value(page, modelo_value: str):
         return (lab2 if lab2.count() else None), inp
     return None, None
 
+@timed("filters/click_model")
 def click_model_by_value(page, modelo_value: str, wait_grid: bool = True, prev_hash: Optional[str] = None) -> bool:
     """
     Marca el modelo en el filtro.
@@ -411,6 +421,7 @@ def click_model_by_value(page, modelo_value: str, wait_grid: bool = True, prev_h
     return True
 
 # ===================== EXTRACCIÓN DE CARDS =================
+@timed("extract_cards")
 def extract_cards(page, base_url: str) -> List[Dict]:
     cards = page.locator(SEL_CARD)
     out: List[Dict] = []
@@ -470,6 +481,37 @@ def pick_target_id_model(modelo_label: str, cards: List[Dict]) -> Optional[str]:
 
     return counts.most_common(1)[0][0]
 
+# ===================== GUARDADO =================
+def fila_a_datos(r: Dict) -> Dict:
+    precio = [r.get('precio_desde'), r.get('precio_desde'), r.get('precio_lista'), r.get('precio_lista')]
+    tiposprecio = ['Crédito inteligente', 'Crédito convencional', 'Todo medio de pago', 'Precio de lista']
+    return {
+        'modelo': to_title_custom(r.get('model')),
+        'marca': to_title_custom(r.get('brand')),
+        'modelDetail': r.get('version'),
+        'tiposprecio': tiposprecio,
+        'precio': precio
+    }
+
+def encolar_filas(pipe: SavePipeline, rows: List[Dict], unit: Optional[str] = None) -> int:
+    """Encola los saves; devuelve cuántas filas se descartaron antes de encolar."""
+    descartadas = 0
+    for r in rows:
+        if r.get("_error"):
+            pipe.mark_error()
+            descartadas += 1
+            continue
+        try:
+            datos = fila_a_datos(r)
+        except Exception as e:
+            pipe.mark_error()
+            descartadas += 1
+            print(f"[ERROR] fila inválida {r}: {e}")
+            continue
+        print(datos)
+        pipe.submit('Mazda', datos, 'www.mazda.cl', unit=unit)
+    return descartadas
+
 # ===================== MAIN =====================
 def main():
     stats = {
@@ -482,20 +524,31 @@ def main():
         "save_errors": 0,
     }
 
+    # tiempos por fase en el __RESULT__ (navegación, filtros, extracción, saveCar)
+    timer = ReportTimer("mazda")
+    timer.print_on_exit(stats)
+
+    # modelos ya guardados por un intento anterior (run_jobs reintenta con la misma CHECKPOINT_KEY)
+    cp = Checkpoint("mazda")
+
     browser = None
     ctx = None
+    # saveCar corre en background mientras se siguen marcando modelos
+    pipe = SavePipeline(timed("saveCar")(saveCar), stats, workers=SAVE_WORKERS, flush=db_writer.flush)
 
     try:
         with sync_playwright() as pw:
-            browser = pw.chromium.launch(headless=HEADLESS, slow_mo=SLOWMO_MS)
+            browser = launch_chromium(pw, headless=HEADLESS, slow_mo=SLOWMO_MS)
             ctx = browser.new_context(viewport=VIEWPORT)
             page = ctx.new_page()
-            page.goto(URL, wait_until="domcontentloaded")
+            block_resources(ctx, "mazda")
+            with span("navigation"):
+                page.goto(URL, wait_until="domcontentloaded")
 
-            try:
-                page.wait_for_load_state("networkidle", timeout=7000)
-            except PWTimeoutError:
-                pass
+                try:
+                    page.wait_for_load_state("networkidle", timeout=7000)
+                except PWTimeoutError:
+                    pass
 
             close_overlays(page)
 
@@ -513,6 +566,14 @@ def main():
 
                 print(f"\n[RUN] Procesando modelo: {modelo_label} (value={modelo_value})")
 
+                if cp.done(modelo_value):
+                    prev = cp.rows(modelo_value)
+                    stats["models_processed"] += 1
+                    stats["rows_extracted"] += len(prev)
+                    results.extend(prev)
+                    print(f"[SKIP] '{modelo_label}' ya guardado en un intento anterior ({len(prev)} filas)")
+                    continue
+
                 try:
                     uncheck_all_models(page)
                     ok = click_model_by_value(page, modelo_value, wait_grid=True, prev_hash=article_hash)
@@ -549,6 +610,11 @@ def main():
 
                     print(f"[OK] {len(filtered)}/{len(cards)} tarjetas válidas para '{modelo_label}' (target_id_model={target_id})")
                     results.extend(filtered)
+                    descartadas = encolar_filas(pipe, filtered, unit=modelo_value)
+                    if not descartadas:
+                        # checkpoint recién cuando todos los saves del modelo terminaron sin error
+                        pipe.seal(modelo_value, lambda errores, u=modelo_value, rows=filtered:
+                                  cp.mark_done(u, rows) if errores == 0 else None)
 
                 except Exception as e:
                     stats["model_errors"] += 1
@@ -561,30 +627,8 @@ def main():
             with open("mazda_modelos.json", "w", encoding="utf-8") as f:
                 json.dump(results, f, ensure_ascii=False, indent=2)
 
-            for r in results:
-                try:
-                    if r.get("_error"):
-                        stats["save_errors"] += 1
-                        continue
-
-                    precio = [r.get('precio_desde'), r.get('precio_desde'), r.get('precio_lista'), r.get('precio_lista')]
-                    tiposprecio = ['Crédito inteligente', 'Crédito convencional', 'Todo medio de pago', 'Precio de lista']
-                    datos = {
-                        'modelo': to_title_custom(r.get('model')),
-                        'marca': to_title_custom(r.get('brand')),
-                        'modelDetail': r.get('version'),
-                        'tiposprecio': tiposprecio,
-                        'precio': precio
-                    }
-
-                    print(datos)
-                    saveCar('Mazda', datos, 'www.mazda.cl')
-                    stats["saved_ok"] += 1
-
-                except Exception as e:
-                    stats["save_errors"] += 1
-                    print(f"[ERROR] saveCar falló para fila {r}: {e}")
-                    traceback.print_exc()
+            # esperar a que el pipeline termine de guardar lo encolado
+            pipe.close()
 
             if results:
                 cols = [
@@ -613,6 +657,7 @@ def main():
         sys.exit(1)
 
     finally:
+        pipe.close()
         if ctx:
             try:
                 ctx.close()
@@ -627,7 +672,9 @@ def main():
     summary = {
         "status": "success",
         "source": "www.mazda.cl",
-        **stats
+        **stats,
+        **run_stats(),
+        **cp.summary(),
     }
 
     if stats["models_found"] == 0:
@@ -645,7 +692,7 @@ def main():
         print(json.dumps(summary, ensure_ascii=False))
         sys.exit(1)
 
-    if stats["saved_ok"] == 0:
+    if stats["saved_ok"] == 0 and not cp.resumed:
         summary["status"] = "error"
         print(json.dumps(summary, ensure_ascii=False))
         sys.exit(1)
@@ -659,6 +706,7 @@ def main():
             print(json.dumps(summary, ensure_ascii=False))
             sys.exit(1)
 
+    cp.clear()
     print("→ Guardado: mazda_modelos.json")
     print("RUN_OK")
     print(json.dumps(summary, ensure_ascii=False))
@@ -6,7 +6,12 @@ import sys
 import traceback
 from urllib.parse import urljoin
 from playwright.async_api import async_playwright
-from utils import saveCar
+from _browser import launch_chromium_async
+from _network import block_resources_async
+from _capture import ResponseCapture, count_rows, find_records, get_ci
+from _pages import PagePool
+from _waits import changed_async, dom_quiet_async, signature_async, sleep_async
+from utils import saveCar, count_saved, run_stats
 from utils import to_title_custom
 
 LIST_URL = "https://www.kaufmann.cl/automoviles/mercedes-benz/nuestros-vehiculos"
@@ -119,10 +124,19 @@ async def extraer_versiones(page):
     return versiones
 
 
+PRECIO_ITEMS = (
+    ".accordion-item:has(.accordion-header:has-text('Precio')) "
+    ".caracteristicas-accordion_body__item"
+)
+# CSS puro para signature / changed (corren con querySelectorAll, sin :has-text)
+PRECIO_BODY = ".accordion-item .caracteristicas-accordion_body__item"
+
+
 async def seleccionar_version(page, value: str):
     prev_href = None
     if await page.locator("#btnDescargarFicha").count() > 0:
         prev_href = await page.locator("#btnDescargarFicha").get_attribute("href")
+    before = await signature_async(page, PRECIO_BODY)
 
     await page.select_option("#contentSelector", value=value)
 
@@ -137,9 +151,10 @@ async def seleccionar_version(page, value: str):
                 timeout=7000,
             )
         except Exception:
-            await page.wait_for_timeout(600)
+            await changed_async(page, PRECIO_BODY, "mercedes/version", before, max_ms=7000)
     else:
-        await page.wait_for_timeout(600)
+        # sin link de ficha: esperar a que lleguen los precios de la versión nueva
+        await changed_async(page, PRECIO_BODY, "mercedes/version", before, max_ms=7000)
 
 
 # -------------------------
@@ -155,7 +170,7 @@ async def abrir_precio_accordion_si_corresponde(page):
 
     try:
         await precio_btn.scroll_into_view_if_needed(timeout=5000)
-        await page.wait_for_timeout(150)
+        await sleep_async(0.15, "mercedes/scroll_precio")
     except Exception:
         pass
 
@@ -165,7 +180,7 @@ async def abrir_precio_accordion_si_corresponde(page):
 
     try:
         await precio_btn.click(force=True, timeout=5000)
-        await page.wait_for_timeout(250)
+        await sleep_async(0.25, "mercedes/accordion")
     except Exception:
         pass
 
@@ -183,7 +198,7 @@ async def abrir_precio_accordion_si_corresponde(page):
         }
         """
         )
-        await page.wait_for_timeout(300)
+        await sleep_async(0.3, "mercedes/accordion")
     except Exception:
         pass
 
@@ -196,14 +211,13 @@ async def extraer_precios_version_actual(page):
 
     try:
         await page.locator(".caracteristicas_body--content, .accordion").first.scroll_into_view_if_needed(timeout=5000)
-        await page.wait_for_timeout(250)
+        await sleep_async(0.25, "mercedes/scroll_precio")
     except Exception:
         pass
 
     try:
         await page.wait_for_selector(
-            ".accordion-item:has(.accordion-header:has-text('Precio')) "
-            ".caracteristicas-accordion_body__item",
+            PRECIO_ITEMS,
             state="attached",
             timeout=7000,
         )
@@ -215,10 +229,7 @@ async def extraer_precios_version_actual(page):
             "precio_lista_usd": None,
         }
 
-    items = page.locator(
-        ".accordion-item:has(.accordion-header:has-text('Precio')) "
-        ".caracteristicas-accordion_body__item"
-    )
+    items = page.locator(PRECIO_ITEMS)
     n = await items.count()
 
     precio_desde_texto = None
@@ -246,6 +257,58 @@ async def extraer_precios_version_actual(page):
     }
 
 
+# -------------------------
+# Precios desde las respuestas JSON (XHR) de la página
+# -------------------------
+API_PATTERNS = [r"kaufmann\.cl/.*(api|ajax|json|precio|price|version)"]
+API_NAME_KEYS = ("version", "nombreVersion", "nombre", "name", "descripcion", "title")
+API_ID_KEYS = ("id", "codigo", "code", "value", "sku")
+API_DESDE_KEYS = ("precioOportunidad", "precioDesde", "oportunidad", "priceFrom", "precioBono", "precio")
+API_LISTA_KEYS = ("precioLista", "listPrice", "precio_lista", "precioListaUsd")
+
+
+def _norm(s) -> str:
+    return " ".join(str(s or "").lower().split())
+
+
+def _monto(valor, parser):
+    if isinstance(valor, (int, float)):
+        return int(valor)
+    if isinstance(valor, str):
+        return parser(valor) or (int(re.sub(r"\D", "", valor)) if re.search(r"\d", valor) else None)
+    return None
+
+
+def precios_desde_api(cap: ResponseCapture, versiones: list[dict]) -> int:
+    """
+    Busca en los JSON capturados registros con nombre/código de versión y algún precio, y
+    completa v["precios"] de las versiones que calzan con el <select>. Lo que no calza
+    sigue por el DOM. Devuelve cuántas versiones se resolvieron así.
+    """
+    por_nombre = {_norm(v["version"]): v for v in versiones if v.get("value")}
+    por_id = {_norm(v["value"]): v for v in versiones if v.get("value")}
+    resueltas = 0
+    for payload in cap.payloads():
+        for rec in find_records(payload, (), API_DESDE_KEYS + API_LISTA_KEYS):
+            v = por_id.get(_norm(get_ci(rec, *API_ID_KEYS))) or por_nombre.get(_norm(get_ci(rec, *API_NAME_KEYS)))
+            if v is None or v.get("precios"):
+                continue
+            desde = get_ci(rec, *API_DESDE_KEYS)
+            lista = get_ci(rec, *API_LISTA_KEYS)
+            precio_desde = _monto(desde, parse_clp)
+            if precio_desde is None:
+                continue
+            v["precios"] = {
+                "precio_desde_texto": str(desde),
+                "precio_desde": precio_desde,
+                "precio_lista_texto": str(lista) if lista is not None else None,
+                "precio_lista_usd": _monto(lista, parse_usd),
+                "fuente": "api",
+            }
+            resueltas += 1
+    return resueltas
+
+
 # -------------------------
 # Main scrape
 # -------------------------
@@ -261,7 +324,7 @@ async def scrape():
     }
 
     async with async_playwright() as p:
-        browser = await p.chromium.launch(
+        browser = await launch_chromium_async(p,
             headless=HEADLESS,
             args=["--disable-blink-features=AutomationControlled"],
         )
@@ -274,57 +337,83 @@ async def scrape():
             ),
         )
         page = await context.new_page()
+        await block_resources_async(context, "mercedes")
+        cap = await ResponseCapture("mercedes", API_PATTERNS).attach_async(page)
 
         print("Abriendo listado:", LIST_URL)
         modelos = await extraer_modelos_desde_listado(page)
         stats["models_found"] = len(modelos)
         print("Modelos encontrados:", len(modelos))
 
-        resultados = []
+        # una captura por pestaña: cada una ve solo los XHR de su modelo
+        caps = {page: cap}
+
+        async def preparar(tab):
+            if tab not in caps:
+                caps[tab] = await ResponseCapture("mercedes", API_PATTERNS).attach_async(tab)
 
-        for i, m in enumerate(modelos, start=1):
+        async def procesar_modelo(tab, item):
+            i, m = item
+            tab_cap = caps[tab]
             print(f"[{i}/{len(modelos)}] {m['model']} -> {m['detalle_url']}")
 
-            try:
-                await page.goto(m["detalle_url"], wait_until="domcontentloaded")
-                await page.wait_for_timeout(700)
+            tab_cap.clear()
+            await tab.goto(m["detalle_url"], wait_until="domcontentloaded")
+            await dom_quiet_async(tab, "mercedes/modelo", quiet_ms=250, max_ms=700)
+
+            versiones = await extraer_versiones(tab)
+            print(f"   [{m['model']}] versiones detectadas: {len(versiones)}")
 
-                versiones = await extraer_versiones(page)
-                print(f"   versiones detectadas: {len(versiones)}")
+            # primero lo que ya llegó por XHR; el DOM (select + accordion) solo para lo que falte
+            await tab_cap.settle()
+            desde_api = precios_desde_api(tab_cap, versiones)
+            if desde_api:
+                count_rows(desde_api)
+                print(f"   [{m['model']}] precios desde API: {desde_api}")
+            if desde_api < len([v for v in versiones if v.get("value")]):
+                count_rows(0, fallback=True)
 
-                if not versiones:
-                    precio_base = await extraer_precios_version_actual(page)
-                    resultados.append({**m, "versions": [], "precio_base": precio_base})
-                    stats["models_processed"] += 1
+            if not versiones:
+                precio_base = await extraer_precios_version_actual(tab)
+                return {**m, "versions": [], "precio_base": precio_base}
+
+            for v in versiones:
+                if v.get("precios"):
+                    continue
+                if not v.get("value"):
+                    v["precios"] = {
+                        "precio_desde_texto": None,
+                        "precio_desde": None,
+                        "precio_lista_texto": None,
+                        "precio_lista_usd": None,
+                    }
                     continue
 
-                for v in versiones:
-                    if not v.get("value"):
-                        v["precios"] = {
-                            "precio_desde_texto": None,
-                            "precio_desde": None,
-                            "precio_lista_texto": None,
-                            "precio_lista_usd": None,
-                        }
-                        continue
+                await seleccionar_version(tab, v["value"])
 
-                    await seleccionar_version(page, v["value"])
+                try:
+                    await tab.locator(".caracteristicas-select__right, .caracteristicas_body--content, .accordion").first.scroll_into_view_if_needed(timeout=5000)
+                    await sleep_async(0.2, "mercedes/scroll_precio")
+                except Exception:
+                    pass
 
-                    try:
-                        await page.locator(".caracteristicas-select__right, .caracteristicas_body--content, .accordion").first.scroll_into_view_if_needed(timeout=5000)
-                        await page.wait_for_timeout(200)
-                    except Exception:
-                        pass
+                v["precios"] = await extraer_precios_version_actual(tab)
 
-                    v["precios"] = await extraer_precios_version_actual(page)
+            return {**m, "versions": versiones}
 
-                resultados.append({**m, "versions": versiones})
-                stats["models_processed"] += 1
-                stats["versions_found"] += len(versiones)
+        # cada modelo es una URL independiente: varias pestañas a la vez, resultados en orden
+        async with PagePool(context, setup=preparar, first_page=page) as pool:
+            por_modelo = await pool.map(procesar_modelo, list(enumerate(modelos, start=1)), url=lambda it: it[1]["detalle_url"])
 
-            except Exception as e:
+        resultados = []
+        for m, r in zip(modelos, por_modelo):
+            if isinstance(r, Exception):
                 stats["model_errors"] += 1
-                print(f"   ❌ error: {e}")
+                print(f"   ❌ error en {m['model']}: {r}")
+                continue
+            resultados.append(r)
+            stats["models_processed"] += 1
+            stats["versions_found"] += len(r["versions"])
 
         out_file = "mercedes_modelos_versiones_precios.json"
         with open(out_file, "w", encoding="utf-8") as f:
@@ -359,8 +448,7 @@ def main():
                     }
 
                     print(datos)
-                    saveCar('Mercedes Benz', datos, 'https://www.kaufmann.cl/automoviles/mercedes-benz/nuestros-vehiculos')
-                    stats["saved_ok"] += 1
+                    saveCar('Mercedes Benz', datos, 'https://www.kaufmann.cl/automoviles/mercedes-benz/nuestros-vehiculos', on_commit=count_saved(stats))
 
                 except Exception as e:
                     stats["save_errors"] += 1
@@ -370,7 +458,8 @@ def main():
         summary = {
             "status": "success",
             "source": "https://www.kaufmann.cl/automoviles/mercedes-benz/nuestros-vehiculos",
-            **stats
+            **run_stats(),
+            **stats,
         }
 
         if stats["models_found"] == 0:
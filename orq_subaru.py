@@ -12,7 +12,11 @@ import sys
 import traceback
 from typing import List, Dict, Optional, Tuple
 from playwright.sync_api import sync_playwright, TimeoutError as PWTimeoutError
-from utils import saveCar
+from _browser import launch_chromium
+from _network import block_resources
+from utils import saveCar, count_saved, run_stats
+from _reports import ReportTimer, instrument
+from _checkpoint import Checkpoint
 from utils import to_title_custom
 
 # ===================== CONFIG =====================
@@ -461,6 +465,10 @@ def dedupe_rows(rows: List[Dict], selected_value: str) -> List[Dict]:
     return out
 
 
+# tiempos por helper en el __RESULT__
+instrument(globals(), "saveCar", "uncheck_all_models", "click_model_by_value", "extract_cards", "safe_click_aplicar")
+
+
 # ===================== MAIN =====================
 def main():
     stats = {
@@ -473,14 +481,21 @@ def main():
         "save_errors": 0,
     }
 
+    timer = ReportTimer("subaru")
+    timer.print_on_exit(stats)
+
+    # modelos ya extraídos por un intento anterior; sus filas se vuelven a guardar al final
+    cp = Checkpoint("subaru")
+
     browser = None
     ctx = None
 
     try:
         with sync_playwright() as pw:
-            browser = pw.chromium.launch(headless=HEADLESS, slow_mo=SLOWMO_MS)
+            browser = launch_chromium(pw, headless=HEADLESS, slow_mo=SLOWMO_MS)
             ctx = browser.new_context(viewport=VIEWPORT)
             page = ctx.new_page()
+            block_resources(ctx, "subaru")
             page.goto(URL, wait_until="domcontentloaded")
 
             try:
@@ -496,6 +511,14 @@ def main():
             article_hash: Optional[str] = None
 
             for mv in model_values:
+                if cp.done(mv):
+                    prev = cp.rows(mv)
+                    stats["models_processed"] += 1
+                    stats["rows_extracted"] += len(prev)
+                    results.extend(prev)
+                    print(f"[SKIP] {mv}: ya extraído en un intento anterior ({len(prev)} filas)")
+                    continue
+
                 print(f"\n[RUN] {mv}: limpiando y aplicando filtro…")
                 try:
                     uncheck_all_models(page)
@@ -521,6 +544,7 @@ def main():
 
                     print(f"[OK] {len(deduped)} tarjetas válidas para '{mv}' (raw {len(raw_cards)})")
                     results.extend(deduped)
+                    cp.mark_done(mv, deduped)
 
                 except Exception as e:
                     stats["model_errors"] += 1
@@ -576,8 +600,7 @@ def main():
                     }
                     print(f"Datos a guardar {datos}")
                     print("-" * 100)
-                    saveCar('Subaru', datos, 'www.subaru.cl')
-                    stats["saved_ok"] += 1
+                    saveCar('Subaru', datos, 'www.subaru.cl', on_commit=count_saved(stats))
 
                 except Exception as e:
                     stats["save_errors"] += 1
@@ -628,7 +651,9 @@ def main():
     summary = {
         "status": "success",
         "source": "www.subaru.cl",
-        **stats
+        **run_stats(),
+        **stats,
+        **cp.summary(),
     }
 
     if stats["models_found"] == 0:
@@ -661,6 +686,7 @@ def main():
             sys.exit(1)
 
     print("→ Guardado: subaru_modelos.json")
+    cp.clear()
     print("RUN_OK")
     print(json.dumps(summary, ensure_ascii=False))
     sys.exit(0)
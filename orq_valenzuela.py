@@ -5,10 +5,14 @@ import json
 import sys
 import traceback
 from dataclasses import dataclass
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from urllib.parse import urljoin, urlparse
-from playwright.sync_api import sync_playwright, Page, TimeoutError as PWTimeout
-from utils import saveCar
+from playwright.sync_api import sync_playwright, Page
+from _browser import launch_chromium
+from _network import block_resources
+from _http import TEXT_JS, HttpFirst
+from _waits import count_stable, load_idle, scroll_until_stable, selector_ready, sleep
+from utils import saveCar, count_saved, run_stats
 
 BASE = "https://www.valenzueladelarze.cl"
 START = f"{BASE}/honda/"
@@ -30,6 +34,13 @@ def money_to_int(text: Optional[str]) -> Optional[int]:
     return val if val > 0 else None
 
 
+def dom_text(locator, timeout: int = 1200) -> str:
+    """Texto como _http.Node.text() / text_of(): "" si el elemento no está, sin esperar el timeout de Playwright."""
+    if not locator.count():
+        return ""
+    return locator.first.evaluate(TEXT_JS, timeout=timeout) or ""
+
+
 def fix_model_casing(name: str) -> str:
     t = name.strip()
     repl = {
@@ -67,13 +78,20 @@ def model_from_version_text(version_text: str) -> Optional[str]:
     return fix_model_casing(model)
 
 
+HEADING_SELECTORS = ["h1.entry-title", "h1.et_pb_module_header", "h2.entry-title", "h1", "h2"]
+
+
 def model_from_heading(page: Page, fallback_title: str) -> Optional[str]:
     head = None
-    for sel in ["h1.entry-title", "h1.et_pb_module_header", "h2.entry-title", "h1", "h2"]:
-        el = page.locator(sel).first
+    for sel in HEADING_SELECTORS:
+        el = page.locator(sel)
         if el.count():
-            head = norm(el.inner_text())
+            head = norm(dom_text(el))
             break
+    return model_from_head_text(head, fallback_title)
+
+
+def model_from_head_text(head: Optional[str], fallback_title: str) -> Optional[str]:
     if not head:
         head = norm(fallback_title)
 
@@ -119,7 +137,7 @@ def try_dismiss_overlays(page: Page):
             btn = page.locator(sel).first
             if btn.count() and btn.is_visible():
                 btn.click()
-                page.wait_for_timeout(200)
+                sleep(0.2, "valenzuela/overlay")
         except Exception:
             pass
 
@@ -133,28 +151,15 @@ def wait_listing(page: Page):
 
 
 def auto_scroll_until_stable(page: Page, step=1200, idle_rounds=4, hard_cap=40):
-    last_h = -1
-    last_count = -1
-    stagnant = 0
-    for _ in range(hard_cap):
-        page.evaluate(f"window.scrollBy(0, {step});")
-        page.wait_for_timeout(250)
-        h = page.evaluate("document.body.scrollHeight")
-        try:
-            count = page.locator(".et_pb_salvattore_content article.et_pb_post").count()
-        except Exception:
-            count = 0
-        if h == last_h and count == last_count:
-            stagnant += 1
-            if stagnant >= idle_rounds:
-                break
-        else:
-            stagnant = 0
-            last_h = h
-            last_count = count
+    # cada paso espera a que el DOM quede quieto (tope 250ms, como la pausa de antes); corta
+    # cuando altura y cantidad de posts no cambian en idle_rounds pasos seguidos
+    scroll_until_stable(
+        page, "valenzuela/listado", selector=".et_pb_salvattore_content article.et_pb_post",
+        step=step, rounds=hard_cap, idle_rounds=idle_rounds, quiet_ms=150, step_max_ms=250,
+    )
     try:
         page.mouse.wheel(0, -2000)
-        page.wait_for_timeout(200)
+        sleep(0.2, "valenzuela/listado_arriba")
     except Exception:
         pass
 
@@ -188,16 +193,12 @@ def collect_model_links(page: Page) -> List[Card]:
 
 def wait_detail(page: Page, timeout_ms=20000):
     page.wait_for_load_state("domcontentloaded")
-    try:
-        page.wait_for_load_state("networkidle", timeout=6000)
-    except Exception:
-        pass
+    load_idle(page, "valenzuela/detalle_idle", max_ms=6000)
     try_dismiss_overlays(page)
-    try:
-        page.wait_for_selector("#ajax_get_car_prices_call_sample_id", timeout=timeout_ms, state="attached")
-    except PWTimeout:
-        pass
-    page.wait_for_timeout(400)
+    if selector_ready(page, "#ajax_get_car_prices_call_sample_id", "valenzuela/caja_precios", max_ms=timeout_ms):
+        # las versiones llegan por AJAX a la caja: esperar a que dejen de aparecer
+        count_stable(page, "#ajax_get_car_prices_call_sample_id .box-version", "valenzuela/versiones",
+                     stable_ms=300, max_ms=4000)
 
 
 def read_versions_from_detail(page: Page, model_title_fallback: str) -> List[Dict]:
@@ -214,47 +215,90 @@ def read_versions_from_detail(page: Page, model_title_fallback: str) -> List[Dic
     for i in range(n):
         b = boxes.nth(i)
         try:
-            ver_txt = norm(b.locator(".get-car-prices-modelo").first.inner_text())
-            modelo = model_from_version_text(ver_txt)
-            if not modelo:
-                modelo = model_from_head or None
-            if not modelo:
-                modelo = model_from_url(page.url)
-
-            precio_lista = money_to_int(b.locator(".get-car-prices-precio").first.inner_text())
-            precio_all = money_to_int(b.locator(".get-car-prices-precio-all").first.inner_text())
-            precio_conv = money_to_int(b.locator(".get-car-prices-precio-convencional").first.inner_text())
-            precio_int = money_to_int(b.locator(".get-car-prices-precio-inteligente").first.inner_text())
-
-            if not any([precio_lista, precio_all, precio_conv, precio_int]):
-                continue
-
-            row = {
-                "marca": "Honda",
-                "modelo": modelo,
-                "version": ver_txt or None,
-                "precio_lista_int": precio_lista,
-                "precio_todo_medio_pago_int": precio_all,
-                "precio_credito_convencional_int": precio_conv,
-                "precio_credito_inteligente_int": precio_int,
-                "precio_card_int": None,
-                "bono_int": None,
-                "cc": None,
-                "combustible": None,
-                "transmision": None,
-                "potencia_hp": None,
-                "url_modelo": page.url,
-                "url_version": page.url,
-            }
-            results.append(row)
+            # mismo texto y mismo precio None (caja sin ese precio) que versions_from_html
+            ver_txt = norm(dom_text(b.locator(".get-car-prices-modelo")))
+            precios = [money_to_int(dom_text(b.locator(sel))) for sel in PRECIO_SELECTORS]
+            row = version_row(ver_txt, precios, model_from_head, page.url)
+            if row:
+                results.append(row)
         except Exception:
             continue
 
-    valid = [v for v in results if v["modelo"] and any([
+    return filtrar_validas(results)
+
+
+# orden: lista, todo medio de pago, crédito convencional, crédito inteligente
+PRECIO_SELECTORS = [
+    ".get-car-prices-precio",
+    ".get-car-prices-precio-all",
+    ".get-car-prices-precio-convencional",
+    ".get-car-prices-precio-inteligente",
+]
+
+
+def version_row(ver_txt: str, precios: List[Optional[int]], model_from_head: str, url: str) -> Optional[Dict]:
+    precio_lista, precio_all, precio_conv, precio_int = precios
+    if not any(precios):
+        return None
+
+    modelo = model_from_version_text(ver_txt)
+    if not modelo:
+        modelo = model_from_head or None
+    if not modelo:
+        modelo = model_from_url(url)
+
+    return {
+        "marca": "Honda",
+        "modelo": modelo,
+        "version": ver_txt or None,
+        "precio_lista_int": precio_lista,
+        "precio_todo_medio_pago_int": precio_all,
+        "precio_credito_convencional_int": precio_conv,
+        "precio_credito_inteligente_int": precio_int,
+        "precio_card_int": None,
+        "bono_int": None,
+        "cc": None,
+        "combustible": None,
+        "transmision": None,
+        "potencia_hp": None,
+        "url_modelo": url,
+        "url_version": url,
+    }
+
+
+def filtrar_validas(results: List[Dict]) -> List[Dict]:
+    return [v for v in results if v["modelo"] and any([
         v["precio_lista_int"], v["precio_todo_medio_pago_int"],
         v["precio_credito_convencional_int"], v["precio_credito_inteligente_int"]
     ])]
-    return valid
+
+
+def versions_from_html(doc, model_title_fallback: str) -> Tuple[List[Dict], int]:
+    """read_versions_from_detail() sobre el HTML servido (camino HTTP, sin navegador): (versiones, cajas en el HTML)."""
+    head = ""
+    for sel in HEADING_SELECTORS:
+        el = doc.select_one(sel)
+        if el is not None:
+            head = norm(el.text())
+            break
+    model_from_head = model_from_head_text(head, model_title_fallback) or ""
+
+    results: List[Dict] = []
+    cajas = doc.select("[id=ajax_get_car_prices_call_sample_id] .box-version")
+    for b in cajas:
+        ver_txt = norm(b.text_of(".get-car-prices-modelo"))
+        precios = [money_to_int(b.text_of(sel)) for sel in PRECIO_SELECTORS]
+        row = version_row(ver_txt, precios, model_from_head, doc.url)
+        if row:
+            results.append(row)
+    # si la caja de precios se llena por AJAX el HTML no trae filas: [] = escalar al navegador
+    return filtrar_validas(results), len(cajas)
+
+
+def versiones_completas(parsed) -> bool:
+    # por HTTP solo vale si cada caja del HTML dio una versión válida; alguna sin precio = AJAX a medias
+    vers, n_cajas = parsed
+    return bool(vers) and len(vers) == n_cajas
 
 
 def main(headless: bool = True):
@@ -271,19 +315,19 @@ def main(headless: bool = True):
     results: List[Dict] = []
     browser = None
     context = None
+    # el listado usa scroll infinito (navegador); cada detalle se intenta primero por HTTP
+    web = HttpFirst("valenzuela")
 
     try:
         with sync_playwright() as p:
-            browser = p.chromium.launch(headless=headless, args=["--disable-blink-features=AutomationControlled"])
+            browser = launch_chromium(p, headless=headless, args=["--disable-blink-features=AutomationControlled"])
             context = browser.new_context(locale="es-CL")
             page = context.new_page()
+            block_resources(context, "valenzuela")
             page.set_default_timeout(22000)
 
             page.goto(START, wait_until="domcontentloaded")
-            try:
-                page.wait_for_load_state("networkidle", timeout=6000)
-            except Exception:
-                pass
+            load_idle(page, "valenzuela/listado_idle", max_ms=6000)
 
             cards = collect_model_links(page)
             stats["models_found"] = len(cards)
@@ -292,9 +336,15 @@ def main(headless: bool = True):
             for idx, c in enumerate(cards, 1):
                 try:
                     print(f"[{idx}/{len(cards)}] {c.title} → {c.href}")
-                    page.goto(c.href, wait_until="domcontentloaded")
-                    page.wait_for_timeout(400)
-                    vers = read_versions_from_detail(page, model_title_fallback=c.title)
+                    parsed = web.extract(
+                        "detalle", c.href,
+                        parse=lambda doc: versions_from_html(doc, model_title_fallback=c.title),
+                        complete=versiones_completas,
+                    )
+                    vers = parsed[0] if parsed is not None else None
+                    if vers is None:
+                        page.goto(c.href, wait_until="domcontentloaded")
+                        vers = read_versions_from_detail(page, model_title_fallback=c.title)
                     if not vers:
                         print(f"[WARN] sin versiones o precios válidos en {c.href}")
                         continue
@@ -320,6 +370,7 @@ def main(headless: bool = True):
         sys.exit(1)
 
     finally:
+        web.close()
         if context:
             try:
                 context.close()
@@ -352,8 +403,7 @@ def main(headless: bool = True):
             }
 
             if datos["marca"] and datos["modelo"] and datos["modelDetail"]:
-                saveCar("Honda", datos, "www.valenzueladelarze.cl")
-                stats["saved_ok"] += 1
+                saveCar("Honda", datos, "www.valenzueladelarze.cl", on_commit=count_saved(stats))
             else:
                 stats["save_errors"] += 1
 
@@ -365,7 +415,8 @@ def main(headless: bool = True):
     summary = {
         "status": "success",
         "source": "www.valenzueladelarze.cl",
-        **stats
+        **run_stats(),
+        **stats,
     }
 
     if stats["models_found"] == 0:
@@ -7,8 +7,12 @@ import traceback
 from urllib.parse import urljoin
 
 from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+from _browser import launch_chromium_async
+from _network import block_resources_async
+from _pages import PagePool
+from _waits import changed_async, count_stable_async, load_idle_async, signature_async, sleep_async
 
-from utils import saveCar
+from utils import saveCar, count_saved, run_stats
 from utils import to_title_custom
 
 BASE = "https://www.salazarisrael.cl"
@@ -38,6 +42,10 @@ def money_to_int(text: str):
         return None
 
 
+# items de la grilla en CSS puro (el selector de los links usa :has-text, que querySelectorAll no entiende)
+GRID_ITEMS_CSS = "ul.grid > li"
+
+
 async def scroll_until_stable(page, selector: str, max_rounds: int = 30, wait_ms: int = 900):
     stable_rounds = 0
     last_count = -1
@@ -53,8 +61,12 @@ async def scroll_until_stable(page, selector: str, max_rounds: int = 30, wait_ms
         if stable_rounds >= 2:
             break
 
+        grid_count = await page.locator(GRID_ITEMS_CSS).count()
         await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-        await page.wait_for_timeout(wait_ms)
+        # sigue apenas llega el siguiente bloque de la grilla; si no llega nada espera wait_ms
+        # completo como antes (un DOM quieto no basta: el XHR del lazy-load puede tardar más)
+        await count_stable_async(page, GRID_ITEMS_CSS, "volvo/scroll", stable_ms=200, max_ms=wait_ms,
+                                 min_count=grid_count + 1)
 
 
 async def maybe_close_popups(page):
@@ -74,7 +86,7 @@ async def maybe_close_popups(page):
             btn = page.locator(sel).first
             if await btn.count() > 0 and await btn.is_visible():
                 await btn.click(timeout=1200)
-                await page.wait_for_timeout(250)
+                await sleep_async(0.25, "volvo/popup")
                 break
         except Exception:
             pass
@@ -222,10 +234,7 @@ async def _pick_best_price_section(page):
 
 
 async def capturar_precios_y_cotizar(page):
-    try:
-        await page.wait_for_load_state("networkidle", timeout=25000)
-    except PlaywrightTimeoutError:
-        pass
+    await load_idle_async(page, "volvo/precios_idle", max_ms=25000)
 
     await maybe_close_popups(page)
 
@@ -262,8 +271,9 @@ async def capturar_precios_y_cotizar(page):
         if await toggle.evaluate("(t) => !!t"):
             txt = await toggle.evaluate("(t) => (t.innerText || '').toLowerCase()")
             if "ver más" in txt and "opciones de pago" in txt:
+                before = await signature_async(page, ".payment-options li")
                 await toggle.click()
-                await page.wait_for_timeout(400)
+                await changed_async(page, ".payment-options li", "volvo/opciones_pago", before, max_ms=4000)
     except Exception:
         pass
 
@@ -339,8 +349,10 @@ async def scrape():
     }
 
     async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=HEADLESS)
-        page = await browser.new_page()
+        browser = await launch_chromium_async(p, headless=HEADLESS)
+        context = await browser.new_context()
+        page = await context.new_page()
+        await block_resources_async(context, "volvo")
 
         print("Abriendo START_URL:", START_URL)
         await page.goto(START_URL, wait_until="domcontentloaded")
@@ -350,70 +362,71 @@ async def scrape():
         stats["models_found"] = len(modelos)
         print("Modelos encontrados:", len(modelos))
 
-        resultados = []
+        async def versiones_de_modelo(tab, m):
+            await tab.goto(m["url"], wait_until="domcontentloaded")
+            await maybe_close_popups(tab)
+            versiones = await listar_versiones_en_detalle_modelo(tab)
+            print(f"  [{m['model']}] Versiones encontradas:", len(versiones))
+            return versiones
 
-        for i, m in enumerate(modelos, 1):
-            print(f"\n[{i}/{len(modelos)}] Modelo:", m["model"], "->", m["url"])
+        async def precios_de_version(tab, mv):
+            m, v = mv
+            print(f"    [{m['model']}] Version:", v["version"], "->", v["url"])
+            await tab.goto(v["url"], wait_until="domcontentloaded")
+            await maybe_close_popups(tab)
 
-            try:
-                await page.goto(m["url"], wait_until="domcontentloaded")
-                await maybe_close_popups(page)
+            info = await capturar_precios_y_cotizar(tab)
 
-                try:
-                    versiones = await listar_versiones_en_detalle_modelo(page)
-                    print("  Versiones encontradas:", len(versiones))
-                except Exception as e:
-                    stats["model_errors"] += 1
-                    print("  ERROR listando versiones:", repr(e))
-                    continue
+            precio_desde_texto = info["precio_desde_texto"]
+            precio_desde = money_to_int(precio_desde_texto)
 
-                stats["models_processed"] += 1
+            precio_credito = money_to_int(info["credito_inteligente_texto"])
+            precio_lista = money_to_int(info["todo_medio_texto"])
 
-                for j, v in enumerate(versiones, 1):
-                    print(f"    [{j}/{len(versiones)}] Version:", v["version"], "->", v["url"])
+            bono_financiamiento = None
+            if precio_lista is not None and precio_credito is not None:
+                bono_financiamiento = max(precio_lista - precio_credito, 0)
 
-                    try:
-                        await page.goto(v["url"], wait_until="domcontentloaded")
-                        await maybe_close_popups(page)
-
-                        info = await capturar_precios_y_cotizar(page)
-
-                        precio_desde_texto = info["precio_desde_texto"]
-                        precio_desde = money_to_int(precio_desde_texto)
+            item = {
+                "brand": BRAND,
+                "model": m["model"],
+                "version": v["version"],
+                "precio_desde_texto": precio_desde_texto,
+                "precio_desde": precio_desde,
+                "precio_lista": precio_lista,
+                "bono_directo": None,
+                "bono_financiamiento": bono_financiamiento,
+                "cotizar_url": info["cotizar_url"],
+                "modelo_filtro": f"{BRAND} {m['model']}".strip()
+            }
 
-                        precio_credito = money_to_int(info["credito_inteligente_texto"])
-                        precio_lista = money_to_int(info["todo_medio_texto"])
+            print("      precio_desde:", item["precio_desde"], "| precio_lista:", item["precio_lista"])
+            return item
 
-                        bono_financiamiento = None
-                        if precio_lista is not None and precio_credito is not None:
-                            bono_financiamiento = max(precio_lista - precio_credito, 0)
+        resultados = []
 
-                        item = {
-                            "brand": BRAND,
-                            "model": m["model"],
-                            "version": v["version"],
-                            "precio_desde_texto": precio_desde_texto,
-                            "precio_desde": precio_desde,
-                            "precio_lista": precio_lista,
-                            "bono_directo": None,
-                            "bono_financiamiento": bono_financiamiento,
-                            "cotizar_url": info["cotizar_url"],
-                            "modelo_filtro": f"{BRAND} {m['model']}".strip()
-                        }
+        # modelos y versiones son URLs independientes: varias pestañas, resultados en el orden original
+        async with PagePool(context, first_page=page) as pool:
+            por_modelo = await pool.map(versiones_de_modelo, modelos, url=lambda m: m["url"])
 
-                        print("      precio_desde:", item["precio_desde"], "| precio_lista:", item["precio_lista"])
-                        resultados.append(item)
-                        stats["versions_found"] += 1
+            trabajos = []
+            for m, versiones in zip(modelos, por_modelo):
+                if isinstance(versiones, Exception):
+                    stats["model_errors"] += 1
+                    print(f"  ERROR listando versiones de {m['model']}:", repr(versiones))
+                    continue
+                stats["models_processed"] += 1
+                trabajos.extend((m, v) for v in versiones)
 
-                    except Exception as e:
-                        stats["version_errors"] += 1
-                        print("      ERROR capturando precios:", repr(e))
-                        continue
+            por_version = await pool.map(precios_de_version, trabajos, url=lambda mv: mv[1]["url"])
 
-            except Exception as e:
-                stats["model_errors"] += 1
-                print("  ERROR entrando al modelo:", repr(e))
+        for (m, v), item in zip(trabajos, por_version):
+            if isinstance(item, Exception):
+                stats["version_errors"] += 1
+                print(f"      ERROR capturando precios de {m['model']} {v['version']}:", repr(item))
                 continue
+            resultados.append(item)
+            stats["versions_found"] += 1
 
         await browser.close()
 
@@ -442,8 +455,7 @@ def main():
                     'precio': precio
                 }
 
-                saveCar('Volvo', datos, 'https://www.salazarisrael.cl/')
-                stats["saved_ok"] += 1
+                saveCar('Volvo', datos, 'https://www.salazarisrael.cl/', on_commit=count_saved(stats))
 
             except Exception as e:
                 stats["save_errors"] += 1
@@ -453,7 +465,8 @@ def main():
         summary = {
             "status": "success",
             "source": "https://www.salazarisrael.cl/",
-            **stats
+            **run_stats(),
+            **stats,
         }
 
         if stats["models_found"] == 0:
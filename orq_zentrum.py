@@ -2,13 +2,14 @@
 import os
 import re
 import json
-import time
 import hashlib
 import sys
 import traceback
 from urllib.parse import urlparse, parse_qs
-from playwright.sync_api import sync_playwright
-from utils import saveCar
+from _browser import LazyPage
+from _http import TEXT_JS, HttpFirst
+from _waits import scroll_until_stable, sleep
+from utils import saveCar, count_saved, writer, run_stats
 
 # ===================== utilidades =====================
 PRECIO_RE = re.compile(r"\$[\d\.\s]+")
@@ -27,11 +28,12 @@ def ensure_outdir():
     os.makedirs("salida_modelos/debug", exist_ok=True)
 
 def scroll_carga(page, barridos=8, pausa=0.25):
-    for _ in range(barridos):
-        page.mouse.wheel(0, 1600)
-        time.sleep(pausa)
-    page.mouse.wheel(0, -5000)
-    time.sleep(0.1)
+    # `pausa` es el tope por barrido: cada uno sigue apenas el DOM queda quieto.
+    # Con rueda del mouse como antes: el lazy-load del sitio escucha eventos wheel
+    scroll_until_stable(
+        page, "zentrum/scroll", step=1600, rounds=barridos, idle_rounds=0,
+        quiet_ms=150, step_max_ms=int(pausa * 1000), back_to_top=True, wheel=True,
+    )
 
 def close_cookies_if_any(page):
     for sel in [
@@ -44,14 +46,15 @@ def close_cookies_if_any(page):
             loc = page.locator(sel)
             if loc.count() and loc.first.is_visible():
                 loc.first.click(timeout=800)
-                time.sleep(0.2)
+                sleep(0.2, "zentrum/cookies")
         except Exception:
             pass
 
 def safe_text(locator, timeout=1200, default=""):
+    # mismo texto que _http.Node.text(): así el camino HTTP y el navegador dan el mismo modelo / versión
     try:
         if locator.count():
-            return (locator.first.text_content(timeout=timeout) or "").strip()
+            return locator.first.evaluate(TEXT_JS, timeout=timeout) or ""
     except Exception:
         pass
     return default
@@ -168,12 +171,74 @@ def extraer_modelos_zentrum(page):
     return modelos
 
 # ===================== extracción versiones =====================
+def fila_a_version(idx, row, info_modelo):
+    """Una fila de la tabla de precios (ya como lista de textos) -> registro; None si no sirve."""
+    if not any(row):
+        return None
+
+    def val(key):
+        for pos in idx.get(key, []):
+            if pos < len(row):
+                return (row[pos] or "").strip()
+        return ""
+
+    version_txt = val("version")
+    if not version_txt:
+        return None
+
+    return {
+        "marca": info_modelo["marca"],
+        "modelo": info_modelo["modelo"],
+        "version": version_txt,
+        "precio_card_int": info_modelo.get("precio_desde_card_int"),
+        "bono_int": precio_a_int(val("bono_int")) or precio_a_int(val("bono directo")),
+        "precio_credito_inteligente_int": precio_a_int(val("precio_credito_inteligente_int")) or precio_a_int(val("precio final con smart credit")),
+        "precio_credito_convencional_int": precio_a_int(val("precio_con_fin_auto_credit_int")) or precio_a_int(val("precio con financiamiento auto credit")),
+        "precio_todo_medio_pago_int": precio_a_int(val("precio_con_bono_directo_int")) or precio_a_int(val("precio con bono directo")),
+        "precio_lista_int": precio_a_int(val("precio_lista_int")) or precio_a_int(val("precio lista sugerido")),
+        "cc": None,
+        "combustible": "",
+        "transmision": "",
+        "potencia_hp": None,
+        "url_modelo": info_modelo["url_modelo"],
+        "url_version": f'{info_modelo["url_modelo"]}#{slugify(version_txt)}'
+    }
+
+def versiones_desde_tabla(headers, rows, info_modelo):
+    """Cabeceras + filas (textos de TEXT_JS / Node.text()) -> registros. Lo comparten el DOM y el HTML."""
+    headers_norm = [normaliza_header(h) for h in headers]
+    if not headers_norm or "version" not in set(headers_norm):
+        return []
+
+    idx = {}
+    for i, h in enumerate(headers_norm):
+        idx.setdefault(h, []).append(i)
+
+    versiones = []
+    for row in rows:
+        reg = fila_a_version(idx, row, info_modelo)
+        if reg:
+            versiones.append(reg)
+    return versiones
+
+# cabecera y filas de una tabla, con el mismo recorrido que versiones_desde_html()
+TABLA_JS = """
+(t) => {
+    const txt = """ + TEXT_JS + """;
+    const filas = Array.from(t.querySelectorAll("tr"));
+    if (!filas.length) return null;
+    const n_head = Math.max(t.querySelectorAll("thead tr").length, 1);
+    const cells = (tr) => Array.from(tr.querySelectorAll("th, td")).map((c) => txt(c));
+    return {headers: cells(filas[0]), rows: filas.slice(n_head).map(cells)};
+}
+"""
+
 def extraer_versiones_en_modelo(page, info_modelo):
     try:
         tit = page.locator(".titular-sect h4:has-text('Precios y bonos')")
         if tit.count():
             tit.first.scroll_into_view_if_needed()
-            time.sleep(0.2)
+            sleep(0.2, "zentrum/precios")
     except Exception:
         pass
 
@@ -182,59 +247,39 @@ def extraer_versiones_en_modelo(page, info_modelo):
     tablas = page.locator("table")
 
     for t_i in range(tablas.count()):
-        t = tablas.nth(t_i)
-        head = t.locator("thead tr")
-        if head.count() == 0:
-            head = t.locator("tr").first
-        ths = head.locator("th, td")
-        headers = [(ths.nth(j).text_content() or "").strip() for j in range(ths.count())]
-        headers_norm = [normaliza_header(h) for h in headers]
-        if not headers_norm or "version" not in set(headers_norm):
-            continue
-
-        idx = {}
-        for i, h in enumerate(headers_norm):
-            idx.setdefault(h, []).append(i)
-
-        body_trs = t.locator("tbody tr") if t.locator("tbody tr").count() else t.locator("tr").locator("xpath=./following-sibling::tr")
-        for r_i in range(body_trs.count()):
-            tr = body_trs.nth(r_i)
-            tds = tr.locator("th, td")
-            row = [(tds.nth(k).text_content() or "").strip() for k in range(tds.count())]
-            if not any(row):
-                continue
+        tabla = tablas.nth(t_i).evaluate(TABLA_JS)
+        if tabla:
+            versiones.extend(versiones_desde_tabla(tabla["headers"], tabla["rows"], info_modelo))
 
-            def val(key):
-                for pos in idx.get(key, []):
-                    if pos < len(row):
-                        return (row[pos] or "").strip()
-                return ""
-
-            version_txt = val("version")
-            if not version_txt:
-                continue
+    return versiones
 
-            reg = {
-                "marca": info_modelo["marca"],
-                "modelo": info_modelo["modelo"],
-                "version": version_txt,
-                "precio_card_int": info_modelo.get("precio_desde_card_int"),
-                "bono_int": precio_a_int(val("bono_int")) or precio_a_int(val("bono directo")),
-                "precio_credito_inteligente_int": precio_a_int(val("precio_credito_inteligente_int")) or precio_a_int(val("precio final con smart credit")),
-                "precio_credito_convencional_int": precio_a_int(val("precio_con_fin_auto_credit_int")) or precio_a_int(val("precio con financiamiento auto credit")),
-                "precio_todo_medio_pago_int": precio_a_int(val("precio_con_bono_directo_int")) or precio_a_int(val("precio con bono directo")),
-                "precio_lista_int": precio_a_int(val("precio_lista_int")) or precio_a_int(val("precio lista sugerido")),
-                "cc": None,
-                "combustible": "",
-                "transmision": "",
-                "potencia_hp": None,
-                "url_modelo": info_modelo["url_modelo"],
-                "url_version": f'{info_modelo["url_modelo"]}#{slugify(version_txt)}'
-            }
-            versiones.append(reg)
+# ===================== camino HTTP (mismo esquema, sin navegador) =====================
+def versiones_desde_html(doc, info_modelo):
+    if not info_modelo["modelo"]:
+        info_modelo["modelo"] = doc.text_of("h1", "title")
 
+    versiones = []
+    for t in doc.select("table"):
+        filas = t.select("tr")
+        if not filas:
+            continue
+        # cabecera = primera fila; cuerpo = lo que sigue al thead. No se usa "tbody tr": el
+        # navegador (y lexbor) insertan <tbody> implícito y lxml / bs4 no
+        n_head = max(len(t.select("thead tr")), 1)
+        versiones.extend(versiones_desde_tabla(
+            [c.text() for c in filas[0].select("th, td")],
+            [[c.text() for c in tr.select("th, td")] for tr in filas[n_head:]],
+            info_modelo,
+        ))
     return versiones
 
+def versiones_completas(versiones):
+    # por HTTP solo vale si cada versión trae al menos un precio; si no, que lo resuelva el navegador
+    return bool(versiones) and all(
+        any(v.get(k) for k in ("precio_lista_int", "precio_todo_medio_pago_int", "precio_credito_inteligente_int", "precio_credito_convencional_int"))
+        for v in versiones
+    )
+
 def titulo_modelo(page):
     t = safe_text(page.locator("h1"))
     if t:
@@ -244,6 +289,33 @@ def titulo_modelo(page):
     except Exception:
         return ""
 
+def versiones_con_navegador(page, m):
+    try:
+        page.goto(m["url_modelo"], wait_until="domcontentloaded", timeout=45000)
+    except Exception:
+        page.goto(m["url_modelo"], wait_until="commit", timeout=45000)
+
+    close_cookies_if_any(page)
+    scroll_carga(page, barridos=6)
+
+    if not m["modelo"]:
+        m["modelo"] = titulo_modelo(page)
+
+    versiones = extraer_versiones_en_modelo(page, m)
+    if not versiones:
+        scroll_carga(page, barridos=8)
+        versiones = extraer_versiones_en_modelo(page, m)
+
+    if not versiones:
+        s = slugify(m["url_modelo"])
+        try:
+            page.screenshot(path=f"salida_modelos/debug/{s}.png", full_page=True)
+            with open(f"salida_modelos/debug/{s}.html", "w", encoding="utf-8") as f:
+                f.write(page.content())
+        except Exception:
+            pass
+    return versiones
+
 # ===================== orquestación por marca =====================
 def scrape_zentrum_json_plano(url_listado, out_file="zentrum_planito.json", headless=False):
     ensure_outdir()
@@ -259,67 +331,52 @@ def scrape_zentrum_json_plano(url_listado, out_file="zentrum_planito.json", head
     }
 
     resultados = []
-    browser = None
-    ctx = None
+
+    # páginas de modelo primero por HTTP + parser; el navegador solo para el listado y las que no salen completas
+    web = HttpFirst("zentrum")
+    browser = LazyPage(
+        site="zentrum",
+        launch={"headless": headless, "args": ["--window-size=1366,900"]},
+        context={
+            "locale": "es-CL",
+            "user_agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome Safari",
+        },
+    )
 
     try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=headless, args=["--window-size=1366,900"])
-            ctx = browser.new_context(
-                locale="es-CL",
-                user_agent="Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome Safari"
-            )
-            page = ctx.new_page()
-
-            page.goto(url_listado, wait_until="domcontentloaded", timeout=45000)
-            close_cookies_if_any(page)
-            scroll_carga(page, barridos=10)
-
-            modelos = extraer_modelos_zentrum(page)
-            stats["models_found"] = len(modelos)
-            print(f"[INFO] {len(modelos)} modelos recogidos")
-
-            for m in modelos:
-                print(f"→ {m['modelo'] or '(sin título)'}")
-                try:
-                    try:
-                        page.goto(m["url_modelo"], wait_until="domcontentloaded", timeout=45000)
-                    except Exception:
-                        page.goto(m["url_modelo"], wait_until="commit", timeout=45000)
-
-                    close_cookies_if_any(page)
-                    scroll_carga(page, barridos=6)
-
-                    if not m["modelo"]:
-                        m["modelo"] = titulo_modelo(page)
-
-                    versiones = extraer_versiones_en_modelo(page, m)
-                    if not versiones:
-                        scroll_carga(page, barridos=8)
-                        versiones = extraer_versiones_en_modelo(page, m)
-
-                    if not versiones:
-                        stats["model_errors"] += 1
-                        s = slugify(m["url_modelo"])
-                        try:
-                            page.screenshot(path=f"salida_modelos/debug/{s}.png", full_page=True)
-                            with open(f"salida_modelos/debug/{s}.html", "w", encoding="utf-8") as f:
-                                f.write(page.content())
-                            print(f"  [WARN] sin versiones detectadas -> {m['url_modelo']}")
-                        except Exception:
-                            pass
-                        continue
-
-                    resultados.extend(versiones)
-                    stats["models_processed"] += 1
-                    stats["versions_found"] += len(versiones)
-
-                except Exception as e:
+        # el listado se queda en el navegador: las cards cargan con el scroll y el HTML
+        # estático no trae con qué saber si están todas
+        page = browser.get()
+        page.goto(url_listado, wait_until="domcontentloaded", timeout=45000)
+        close_cookies_if_any(page)
+        scroll_carga(page, barridos=10)
+        modelos = extraer_modelos_zentrum(page)
+
+        stats["models_found"] = len(modelos)
+        print(f"[INFO] {len(modelos)} modelos recogidos")
+
+        for m in modelos:
+            print(f"→ {m['modelo'] or '(sin título)'}")
+            try:
+                versiones = web.extract("modelo", m["url_modelo"], lambda doc: versiones_desde_html(doc, m), versiones_completas)
+                if versiones is None:
+                    versiones = versiones_con_navegador(browser.get(), m)
+
+                if not versiones:
                     stats["model_errors"] += 1
-                    print(f"  [ERR] {m['url_modelo']}: {e}")
-                    traceback.print_exc()
+                    print(f"  [WARN] sin versiones detectadas -> {m['url_modelo']}")
                     continue
 
+                resultados.extend(versiones)
+                stats["models_processed"] += 1
+                stats["versions_found"] += len(versiones)
+
+            except Exception as e:
+                stats["model_errors"] += 1
+                print(f"  [ERR] {m['url_modelo']}: {e}")
+                traceback.print_exc()
+                continue
+
     except Exception as e:
         print(f"[FATAL] {e}")
         traceback.print_exc()
@@ -332,16 +389,8 @@ def scrape_zentrum_json_plano(url_listado, out_file="zentrum_planito.json", head
         return None, [], stats, summary
 
     finally:
-        if ctx:
-            try:
-                ctx.close()
-            except Exception:
-                pass
-        if browser:
-            try:
-                browser.close()
-            except Exception:
-                pass
+        browser.close()
+        web.close()
 
     out_path = os.path.join("salida_modelos", out_file)
     with open(out_path, "w", encoding="utf-8") as f:
@@ -367,14 +416,14 @@ def scrape_zentrum_json_plano(url_listado, out_file="zentrum_planito.json", head
 
             print("-" * 100)
             print(datos)
-            saveCar(r['marca'], datos, 'www.zentrum.cl')
-            stats["saved_ok"] += 1
+            saveCar(r['marca'], datos, 'www.zentrum.cl', on_commit=count_saved(stats))
 
         except Exception as e:
             stats["save_errors"] += 1
             print(f"[ERROR] saveCar falló para fila {r}: {e}")
             traceback.print_exc()
 
+    writer.flush()  # saved_ok / save_errors de esta marca llegan con el commit
     summary = {
         "status": "success",
         "source": url_listado,
@@ -454,6 +503,7 @@ def main():
     final_summary = {
         "status": "error" if had_error else "success",
         "source": "www.zentrum.cl",
+        **run_stats(),
         **global_stats,
         "brand_summaries": summaries
     }
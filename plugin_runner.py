@@ -0,0 +1,163 @@
+"""
+Runner en un solo proceso: importa cada orq_* una vez y corre su main() con _plugins.run_main,
+compartiendo cliente Firestore, writer, caches de utils y (opcional) un Chromium por CDP.
+
+    python plugin_runner.py [--jobs 3] [--browsers 1] [--subprocess orq_carscrapper,orq_kia] [--only orq_kia,...]
+                            [--schedule list|lpt]
+
+Los scripts listados en --subprocess (o PLUGIN_SUBPROCESS) corren aislados como en orchestrator.py;
+también cae a subprocess cualquier script que no se pueda importar o no tenga main().
+"""
+
+import argparse
+import importlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from datetime import datetime
+
+from _browser import BrowserPool
+from _journal import new_run_id
+from _plugins import RunContext, run_main
+from _schedule import JobHistory, order_jobs
+from _telemetry import record_all
+from orchestrator import SCHEDULE, SCRIPTS, emit, run_script
+
+RESULT_FILE = "plugin_runner_resultado.json"
+
+
+def _csv(value):
+    return {x.strip().removesuffix(".py") for x in (value or "").split(",") if x.strip()}
+
+
+def load_plugins(scripts, isolated):
+    """Importa una vez cada módulo; devuelve {script: módulo} y el tiempo de import por script."""
+    modules, import_ms = {}, {}
+    for script in scripts:
+        name = script.removesuffix(".py")
+        if name in isolated:
+            continue
+        t0 = time.perf_counter()
+        try:
+            mod = importlib.import_module(name)
+        except Exception as e:
+            print(f"[WARN] {name}: no se pudo importar ({e}); corre en subprocess")
+            continue
+        import_ms[script] = round((time.perf_counter() - t0) * 1000, 1)
+        if callable(getattr(mod, "main", None)):
+            modules[script] = mod
+        else:
+            print(f"[WARN] {name}: sin main(); corre en subprocess")
+    return modules, import_ms
+
+
+def run_inprocess(script, module, pool, headless):
+    tag = script.removesuffix(".py")
+    emit(f"🧩 Ejecutando en proceso: {script}", tag)
+    t0 = time.perf_counter()
+    ctx = RunContext(
+        job=tag,
+        headless=headless,
+        browser_endpoint=pool.endpoint() if pool else None,
+        emit=lambda line: emit(line, tag),
+    )
+    report = run_main(module.main, ctx)
+    meta = report.meta or {}
+    return {
+        "script": script,
+        "mode": "inprocess",
+        "success": bool(meta.get("success")),
+        "duration_sec": round(time.perf_counter() - t0, 2),
+        "return_code": meta.get("return_code"),
+        "summary": meta.get("summary"),
+        "report": asdict(report),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Scrapers en un solo proceso")
+    ap.add_argument("--jobs", type=int, default=int(os.getenv("ORQ_MAX_JOBS", "1")))
+    ap.add_argument("--browsers", type=int, default=int(os.getenv("ORQ_BROWSER_POOL", "0")))
+    ap.add_argument("--subprocess", default=os.getenv("PLUGIN_SUBPROCESS", ""),
+                    help="scripts que corren aislados (coma)")
+    ap.add_argument("--only", help="scripts a correr (coma)")
+    ap.add_argument("--schedule", choices=["list", "lpt"], default=SCHEDULE if SCHEDULE == "lpt" else "list",
+                    help="list = orden de SCRIPTS (default, ORQ_SCHEDULE); lpt = más largos primero según historial")
+    args = ap.parse_args()
+
+    headless = os.getenv("HEADLESS", "true").lower() == "true"
+    isolated = _csv(args.subprocess)
+    scripts = list(SCRIPTS)
+    if args.only:
+        wanted = _csv(args.only)
+        scripts = [s for s in scripts if s.removesuffix(".py") in wanted]
+
+    history = JobHistory()
+    if args.schedule == "lpt":
+        scripts = order_jobs(scripts, history)
+    print(f"Orden ({args.schedule}): {', '.join(s.removesuffix('.py') for s in scripts)}")
+
+    t_import = time.perf_counter()
+    modules, import_ms = load_plugins(scripts, isolated)
+    print(f"Plugins cargados: {len(modules)}/{len(scripts)} en {round((time.perf_counter() - t_import) * 1000)} ms")
+
+    pool = None
+    if args.browsers > 0:
+        try:
+            pool = BrowserPool(args.browsers, headless=headless).start()
+        except Exception as e:
+            print(f"[WARN] No se pudo levantar el Chromium compartido: {e}")
+
+    def run_one(script):
+        if script in modules:
+            try:
+                return run_inprocess(script, modules[script], pool, headless)
+            except Exception as e:
+                emit(f"[ERROR] main() reventó: {e}", script.removesuffix(".py"))
+                return {"script": script, "mode": "inprocess", "success": False,
+                        "duration_sec": 0.0, "return_code": 1, "summary": None}
+        return {**run_script(script, prefix=True, browser_pool=pool), "mode": "subprocess"}
+
+    global_start = time.time()
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as ex:
+            results = list(ex.map(run_one, scripts))
+    finally:
+        if pool:
+            pool.close()
+    global_end = time.time()
+
+    for r in results:
+        r["import_ms"] = import_ms.get(r["script"])
+        history.record(r["script"], r["duration_sec"], r["success"])
+    history.save()
+    record_all("plugin_runner", results, new_run_id())
+
+    failed = [r["script"] for r in results if not r["success"]]
+    final_summary = {
+        "timestamp": datetime.now().isoformat(),
+        "total_scripts": len(results),
+        "inprocess": sum(r["mode"] == "inprocess" for r in results),
+        "max_jobs": max(1, args.jobs),
+        "success": len(results) - len(failed),
+        "failed": len(failed),
+        "duration_total_sec": round(global_end - global_start, 2),
+        "details": results,
+    }
+
+    with open(RESULT_FILE, "w", encoding="utf-8") as f:
+        json.dump(final_summary, f, indent=2, ensure_ascii=False, default=str)
+
+    print(json.dumps({k: v for k, v in final_summary.items() if k != "details"}, ensure_ascii=False))
+    if failed:
+        print(f"\n❌ Fallaron: {', '.join(failed)}")
+        return 1
+    print("\n✅ Todos los procesos OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""
+Consultas y mantenimiento del store local de precios (data/prices/, Parquet por día).
+
+    python prices.py compact [--date 2026-01-15]
+    python prices.py trend --brand Kia [--model Sportage] [--since 2026-01-01] [--until ...]
+"""
+
+import argparse
+import sys
+import time
+
+import _prices
+
+
+def cmd_compact(args):
+    res = _prices.compact(args.root, args.date)
+    if not res:
+        print("[INFO] Nada que compactar")
+    for day, info in res.items():
+        print(f"[COMPACT] {day}: {info['files']} archivos → 1 ({info['rows']} filas)")
+    return 0
+
+
+def cmd_trend(args):
+    import pyarrow.compute as pc
+
+    t0 = time.perf_counter()
+    table = _prices.scan(
+        args.root,
+        brand=args.brand,
+        model=args.model,
+        since=args.since,
+        until=args.until,
+        columns=["date", "model", "version", "price_type", "price"],
+    )
+    if args.price_type:
+        table = table.filter(pc.equal(table["price_type"], args.price_type))
+
+    grouped = (
+        table.group_by(["model", "version", "price_type", "date"])
+        .aggregate([("price", "min"), ("price", "max"), ("price", "count")])
+        .sort_by([("model", "ascending"), ("version", "ascending"), ("price_type", "ascending"), ("date", "ascending")])
+    )
+    ms = round((time.perf_counter() - t0) * 1000, 1)
+
+    for r in grouped.to_pylist():
+        print(f"{r['date']}  {r['model']} | {r['version']} | {r['price_type']}: "
+              f"min={r['price_min']} max={r['price_max']} n={r['price_count']}")
+    print(f"[TREND] {table.num_rows} observaciones, {grouped.num_rows} filas en {ms} ms")
+    return 0
+
+
+def main():
+    if not _prices.HAS_ARROW:
+        print("[ERROR] pyarrow no está instalado (pip install pyarrow)")
+        return 1
+
+    ap = argparse.ArgumentParser(description="Store local de precios (Parquet)")
+    ap.add_argument("--root", default=str(_prices.PRICES_DIR))
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    c = sub.add_parser("compact", help="junta los archivos chicos de cada día")
+    c.add_argument("--date", help="YYYY-MM-DD (default: todos los días)")
+    c.set_defaults(fn=cmd_compact)
+
+    t = sub.add_parser("trend", help="evolución diaria de precios")
+    t.add_argument("--brand")
+    t.add_argument("--model")
+    t.add_argument("--price-type")
+    t.add_argument("--since")
+    t.add_argument("--until")
+    t.set_defaults(fn=cmd_trend)
+
+    args = ap.parse_args()
+    return args.fn(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+Reenvía las escrituras sin confirmar del journal (state/journal/*.jsonl).
+
+    python replay_journal.py                 # todos los segmentos
+    python replay_journal.py --run 20260110-031500-4242
+    python replay_journal.py --dry-run
+
+Los segmentos se reenvían de a uno (el más viejo primero) y cada uno en orden de seq, en
+lotes secuenciales: un set posterior al mismo doc nunca llega antes que uno anterior. Lo
+confirmado se marca con ack en el mismo segmento, así que volver a correrlo solo reenvía lo
+que siga pendiente. Se saltan los segmentos que un run sigue escribiendo (ver claim_segment).
+
+Los set / merge son idempotentes (valores absolutos con su doc_id); los Increment no: si el
+commit había llegado pero su ack se perdió (crash entre uno y otro) se aplican dos veces. Hoy
+el único es seen_count de modelos_index, que puede quedar contando una vista de más.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from _journal import JOURNAL_DIR, claim_segment, read_pending, mark_acked
+from _storage import get_storage, FIRESTORE_BATCH_LIMIT
+
+
+def replay_segment(storage, path: Path, chunk_size: int, dry_run: bool) -> dict:
+    res = {"segment": path.name, "pending": 0, "written": 0, "failed": 0, "owned": False}
+    with claim_segment(path) as claimed:
+        if not claimed:
+            res["owned"] = True
+            return res
+        pending = read_pending(path)
+        res["pending"] = len(pending)
+        if dry_run:
+            return res
+
+        for i in range(0, len(pending), chunk_size):
+            chunk = pending[i:i + chunk_size]
+            ok = storage.commit([(e["collection"], e["doc_id"], e["data"], e["merge"]) for e in chunk])
+            seqs = [e["seq"] for e, x in zip(chunk, ok) if x]
+            mark_acked(path, seqs)
+            res["written"] += len(seqs)
+            res["failed"] += len(chunk) - len(seqs)
+
+        if res["failed"] == 0:
+            path.unlink(missing_ok=True)
+    return res
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Replay del journal de escrituras pendientes")
+    ap.add_argument("--dir", default=str(JOURNAL_DIR))
+    ap.add_argument("--run", help="run_id del segmento (default: todos)")
+    ap.add_argument("--chunk", type=int, default=400)
+    ap.add_argument("--dry-run", action="store_true")
+    args = ap.parse_args()
+
+    directory = Path(args.dir)
+    if args.run:
+        segments = [directory / f"{args.run}.jsonl"]
+    else:
+        segments = sorted(directory.glob("*.jsonl"))
+
+    segments = [p for p in segments if p.exists()]
+    if not segments:
+        print("[INFO] No hay segmentos pendientes")
+        return 0
+
+    storage = get_storage()
+    chunk_size = max(1, min(args.chunk, FIRESTORE_BATCH_LIMIT))
+
+    t0 = time.time()
+    total = {"pending": 0, "written": 0, "failed": 0}
+    for path in segments:
+        res = replay_segment(storage, path, chunk_size, args.dry_run)
+        if res["owned"]:
+            print(f"[REPLAY] {res['segment']}: en uso por un run vivo, se salta")
+            continue
+        for k in total:
+            total[k] += res[k]
+        print(f"[REPLAY] {res['segment']}: pendientes={res['pending']} ok={res['written']} err={res['failed']}")
+
+    print(f"[REPLAY] total pendientes={total['pending']} ok={total['written']} err={total['failed']} "
+          f"en {round(time.time() - t0, 2)} s")
+    return 1 if total["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,321 @@
+"""
+Runner de jobs.yaml: timeout duro por proceso, reintentos con backoff exponencial + jitter,
+un log comprimido por intento en runs/logs/ (ver logs.py) y varios jobs en paralelo.
+
+    python run_jobs.py [--config jobs.yaml] [--max-parallel 3] [--only bmw,kia] [--workdir ..]
+
+Formato de jobs.yaml:
+
+    max_parallel: 2          # opcional
+    jobs:
+      - id: bmw
+        cmd: ["python3", "scripts/bmw.py"]
+        timeout_sec: 1800
+        retries: 2           # reintentos (intentos totales = retries + 1)
+        env: {HEADLESS: "true"}   # opcional
+        max_rss_mb: 2500          # opcional: se mata el árbol si lo supera (default JOBS_MAX_RSS_MB)
+
+Antes de lanzar cada intento espera a que RAM/CPU de la máquina bajen de --max-mem-pct/--max-cpu-pct.
+"""
+
+import argparse
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import yaml
+
+from _journal import new_run_id
+from _resources import ResourceMonitor
+from _runlogs import LOG_DIR, RETENTION_DAYS, RunLog, prune
+from _schedule import JobHistory, order_jobs, predict_makespan
+from _telemetry import OutputScanner, record_all
+
+
+# ===================== CONFIG =====================
+
+RESULT_FILE = Path("runs/last_run.json")
+
+DEFAULT_TIMEOUT_SEC = 1800
+DEFAULT_RETRIES = 0
+BACKOFF_BASE_SEC = 30
+BACKOFF_MAX_SEC = 600
+KILL_GRACE_SEC = 10
+
+# techos de la máquina para admitir un job más, y cap de RSS por árbol de job (MB, None = sin cap)
+MAX_MEM_PCT = float(os.getenv("JOBS_MAX_MEM_PCT", "85"))
+MAX_CPU_PCT = float(os.getenv("JOBS_MAX_CPU_PCT", "90"))
+MAX_RSS_MB = float(os.getenv("JOBS_MAX_RSS_MB", "0")) or None
+
+_print_lock = threading.Lock()
+
+
+def log(msg):
+    with _print_lock:
+        print(msg, flush=True)
+
+
+def load_jobs(path):
+    with open(path, "r", encoding="utf-8") as f:
+        cfg = yaml.safe_load(f) or {}
+    jobs = [j for j in (cfg.get("jobs") or []) if j and j.get("id")]
+    return cfg, jobs
+
+
+def backoff_delay(attempt):
+    # attempt = intento que acaba de fallar (1, 2, ...); full jitter sobre el exponencial
+    cap = min(BACKOFF_MAX_SEC, BACKOFF_BASE_SEC * (2 ** (attempt - 1)))
+    return random.uniform(cap / 2, cap)
+
+
+# ===================== EJECUTOR =====================
+
+def kill_group(proc):
+    """SIGTERM a todo el grupo (python + chromium hijos); SIGKILL si no sale a tiempo."""
+    try:
+        pgid = os.getpgid(proc.pid)
+    except ProcessLookupError:
+        return
+    for sig, wait in ((signal.SIGTERM, KILL_GRACE_SEC), (signal.SIGKILL, 5)):
+        try:
+            os.killpg(pgid, sig)
+        except ProcessLookupError:
+            return
+        try:
+            proc.wait(timeout=wait)
+            return
+        except subprocess.TimeoutExpired:
+            continue
+
+
+def kill_group_now(proc):
+    # cap de memoria superado: SIGKILL directo, no hay que esperar a que libere
+    try:
+        os.killpg(os.getpgid(proc.pid), signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+def run_attempt(job, attempt, workdir, log_dir, monitor):
+    job_id = job["id"]
+    cmd = [str(c) for c in job["cmd"]]
+    timeout = float(job.get("timeout_sec") or DEFAULT_TIMEOUT_SEC)
+    env = {**os.environ, "PYTHONUNBUFFERED": "1", **{k: str(v) for k, v in (job.get("env") or {}).items()}}
+
+    # no arrancar otro Chromium si la máquina ya está al límite
+    monitor.admit(job_id)
+
+    runlog = RunLog(job_id, attempt, log_dir)
+    scanner = OutputScanner()
+
+    def write(line):
+        runlog.write_line(line)
+        # summary / __RESULT__ del script para la telemetría, sin releer el log
+        scanner.feed(line)
+
+    write(f"[START] job={job_id} attempt={attempt}")
+    write(f"cmd={' '.join(cmd)}")
+    write("")
+
+    start = time.time()
+    timed_out = False
+    try:
+        proc = subprocess.Popen(
+            cmd,
+            cwd=workdir,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+            env=env,
+            start_new_session=True,  # grupo propio para poder matar el árbol completo
+        )
+    except OSError as e:
+        monitor.unregister((job_id, attempt))
+        write(f"[ERROR] no se pudo lanzar: {e}")
+        runlog.close(return_code=None, timed_out=False, duration_sec=0.0)
+        return {"attempt": attempt, "return_code": None, "timed_out": False,
+                "duration_sec": 0.0, "log": str(runlog.path)}
+
+    # la salida se comprime a medida que llega: memoria plana aunque el hijo imprima mucho
+    def pump():
+        for line in proc.stdout:
+            write(line)
+
+    reader = threading.Thread(target=pump, name=f"log-{job_id}", daemon=True)
+    reader.start()
+
+    key = (job_id, attempt)
+    monitor.register(key, proc.pid, max_rss_mb=job.get("max_rss_mb") or MAX_RSS_MB,
+                     on_cap=lambda: kill_group_now(proc))
+    try:
+        rc = proc.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        timed_out = True
+        kill_group(proc)
+        rc = proc.returncode
+    finally:
+        resources = monitor.unregister(key)
+
+    # algún nieto (chromium) puede seguir con el pipe abierto: se cierra el grupo
+    reader.join(KILL_GRACE_SEC)
+    if reader.is_alive():
+        kill_group_now(proc)
+        reader.join(5)
+
+    duration = round(time.time() - start, 2)
+    write("")
+    write(f"[END] job={job_id} attempt={attempt} rc={rc} timeout={timed_out} "
+          f"mem_cap={resources.get('killed_mem_cap', False)} duration_sec={duration}")
+    runlog.close(return_code=rc, timed_out=timed_out, duration_sec=duration)
+
+    return {
+        "attempt": attempt,
+        "return_code": rc,
+        "timed_out": timed_out,
+        "duration_sec": duration,
+        "log": str(runlog.path),
+        "log_errors": runlog.counts["error"],
+        "summary": scanner.summary,
+        "result": scanner.result,
+        "resources": resources,
+    }
+
+
+def run_job(job, workdir, log_dir, monitor):
+    job_id = job["id"]
+    retries = int(job.get("retries", DEFAULT_RETRIES) or 0)
+    attempts = []
+    start = time.time()
+
+    # todos los intentos comparten checkpoint (ver _checkpoint.py): un reintento retoma donde quedó
+    job = {**job, "env": {"CHECKPOINT_KEY": f"{job_id}-{datetime.now():%Y%m%d-%H%M%S}", **(job.get("env") or {})}}
+
+    for attempt in range(1, retries + 2):
+        log(f"🚀 [{job_id}] intento {attempt}/{retries + 1}")
+        res = run_attempt(job, attempt, workdir, log_dir, monitor)
+        attempts.append(res)
+
+        if res["return_code"] == 0 and not res["timed_out"]:
+            log(f"✅ [{job_id}] OK en {res['duration_sec']} s")
+            break
+
+        if res.get("resources", {}).get("killed_mem_cap"):
+            why = "cap de memoria"
+        elif res["timed_out"]:
+            why = "timeout"
+        else:
+            why = f"rc={res['return_code']}"
+        if attempt <= retries:
+            delay = round(backoff_delay(attempt), 1)
+            log(f"⚠️  [{job_id}] falló ({why}), reintento en {delay} s → {res['log']}")
+            time.sleep(delay)
+        else:
+            log(f"❌ [{job_id}] falló ({why}) tras {attempt} intento(s) → {res['log']}")
+
+    last = attempts[-1]
+    return {
+        "job": job_id,
+        "success": last["return_code"] == 0 and not last["timed_out"],
+        "attempts": attempts,
+        "duration_sec": round(time.time() - start, 2),
+    }
+
+
+# ===================== MAIN =====================
+
+def main():
+    ap = argparse.ArgumentParser(description="Runner de jobs.yaml")
+    ap.add_argument("--config", default="jobs.yaml")
+    ap.add_argument("--max-parallel", type=int)
+    ap.add_argument("--only", help="ids separados por coma")
+    ap.add_argument("--workdir", default=".", help="cwd de los comandos")
+    ap.add_argument("--logs", default=str(LOG_DIR))
+    ap.add_argument("--keep-days", type=int, default=RETENTION_DAYS, help="borra logs más viejos (0 = no borrar)")
+    ap.add_argument("--max-mem-pct", type=float, default=MAX_MEM_PCT, help="no admitir jobs sobre este %% de RAM usada")
+    ap.add_argument("--max-cpu-pct", type=float, default=MAX_CPU_PCT, help="no admitir jobs sobre este %% de CPU")
+    ap.add_argument("--schedule", choices=["list", "lpt"], default="list",
+                    help="list = orden de jobs.yaml; lpt = más largos/propensos a fallar primero según historial")
+    args = ap.parse_args()
+
+    cfg, jobs = load_jobs(args.config)
+    if args.only:
+        wanted = {x.strip() for x in args.only.split(",")}
+        jobs = [j for j in jobs if j["id"] in wanted]
+    if not jobs:
+        print("[ERROR] No hay jobs para correr")
+        return 1
+
+    max_parallel = max(1, args.max_parallel or int(cfg.get("max_parallel") or 1))
+    log_dir = Path(args.logs)
+    pruned = prune(log_dir, args.keep_days)
+    if pruned:
+        print(f"[LOGS] {len(pruned)} archivo(s) de más de {args.keep_days} días borrados")
+    print(f"Jobs: {len(jobs)} | paralelismo: {max_parallel}")
+
+    history = JobHistory()
+    retries_of = lambda j: int(j.get("retries", DEFAULT_RETRIES) or 0)
+    if args.schedule == "lpt":
+        jobs = order_jobs(jobs, history, key=lambda j: j["id"], retries=retries_of)
+    predicted_sec = round(predict_makespan([history.expected_cost(j["id"], retries_of(j)) for j in jobs], max_parallel), 1)
+    print(f"Orden ({args.schedule}): {', '.join(j['id'] for j in jobs)}")
+    print(f"⏱️  Fin estimado: {datetime.now() + timedelta(seconds=predicted_sec):%H:%M:%S} (~{predicted_sec / 60:.1f} min)")
+
+    monitor = ResourceMonitor(max_mem_pct=args.max_mem_pct, max_cpu_pct=args.max_cpu_pct).start()
+
+    global_start = time.time()
+    try:
+        with ThreadPoolExecutor(max_workers=max_parallel) as ex:
+            results = list(ex.map(lambda j: run_job(j, args.workdir, log_dir, monitor), jobs))
+    finally:
+        monitor.stop()
+    global_end = time.time()
+
+    # cada intento cuenta en el historial (duración y si falló)
+    for r in results:
+        for a in r["attempts"]:
+            history.record(r["job"], a["duration_sec"], a["return_code"] == 0 and not a["timed_out"])
+    history.save()
+    # una fila de telemetría por intento
+    record_all("run_jobs", [
+        {"job": r["job"], "success": a["return_code"] == 0 and not a["timed_out"], **a}
+        for r in results for a in r["attempts"]
+    ], new_run_id())
+    actual_sec = round(global_end - global_start, 2)
+
+    failed = [r["job"] for r in results if not r["success"]]
+    summary = {
+        "timestamp": datetime.now().isoformat(),
+        "total_jobs": len(results),
+        "success": len(results) - len(failed),
+        "failed": len(failed),
+        "max_parallel": max_parallel,
+        "duration_total_sec": actual_sec,
+        "predicted_sec": predicted_sec,
+        "details": results,
+    }
+
+    RESULT_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with open(RESULT_FILE, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+
+    print(json.dumps({k: v for k, v in summary.items() if k != "details"}, ensure_ascii=False))
+    print(f"⏱️  Estimado {predicted_sec / 60:.1f} min vs real {actual_sec / 60:.1f} min")
+    if failed:
+        print(f"\n❌ Fallaron: {', '.join(failed)}")
+        return 1
+    print("\n✅ Todos los jobs OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
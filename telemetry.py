@@ -0,0 +1,165 @@
+"""
+Consultas sobre la telemetría de corridas (state/telemetry.db).
+
+    python telemetry.py summary [--days 30]               # p50/p95 de duración y tasa de éxito por job
+    python telemetry.py trend --job orq_mazda [--days 30]  # corrida a corrida
+    python telemetry.py regressions [--factor 1.3]        # última corrida vs las anteriores
+    python telemetry.py phases --job orq_mazda            # tiempo por fase (spans de ReportTimer)
+    python telemetry.py resources [--days 30]             # RSS/CPU por job (run_jobs.py)
+    python telemetry.py waits [--job orq_bmw]             # esperas: bloqueado vs máximo y tiempo muerto
+"""
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime
+from itertools import groupby
+
+from _telemetry import TELEMETRY_DB, TelemetryStore, percentile, regression
+
+
+def _since(days):
+    return int(time.time() - days * 86400) if days else 0
+
+
+def _by_job(runs):
+    return {job: list(rs) for job, rs in groupby(runs, key=lambda r: r["job"])}
+
+
+def cmd_summary(store, args):
+    runs = store.runs(since_ts=_since(args.days))
+    if not runs:
+        print("[INFO] Sin corridas registradas")
+        return 0
+
+    print(f"{'job':<20} {'runs':>5} {'ok%':>6} {'p50 s':>8} {'p95 s':>8} {'último s':>9} {'saved p50':>10}")
+    for job, rs in _by_job(runs).items():
+        ok = [r for r in rs if r["success"]]
+        durs = [r["duration_sec"] for r in ok] or [r["duration_sec"] for r in rs]
+        print(
+            f"{job:<20} {len(rs):>5} {100 * len(ok) / len(rs):>5.0f}% "
+            f"{percentile(durs, 0.5) or 0:>8.1f} {percentile(durs, 0.95) or 0:>8.1f} "
+            f"{rs[-1]['duration_sec']:>9.1f} {percentile([r['saved_ok'] for r in ok], 0.5) or 0:>10.0f}"
+        )
+    return 0
+
+
+def cmd_trend(store, args):
+    runs = store.runs(job=args.job, since_ts=_since(args.days))
+    for r in runs:
+        print(
+            f"{datetime.fromtimestamp(r['ts']):%Y-%m-%d %H:%M}  {'OK ' if r['success'] else 'ERR'} "
+            f"{r['duration_sec']:>8.1f}s  models={r['models']} versions={r['versions']} "
+            f"saved_ok={r['saved_ok']} save_errors={r['save_errors']}  [{r['runner']}]"
+        )
+    print(f"[TREND] {len(runs)} corridas")
+    return 0
+
+
+def cmd_regressions(store, args):
+    found = 0
+    for job, rs in _by_job(store.runs(since_ts=_since(args.days))).items():
+        reg = regression(rs, factor=args.factor, baseline=args.baseline)
+        if reg:
+            found += 1
+            print(f"⚠️  {job}: " + "; ".join(reg["flags"]))
+    if not found:
+        print("✅ Sin regresiones")
+    return 1 if found and args.strict else 0
+
+
+def cmd_phases(store, args):
+    rows = store.phases(args.job, since_ts=_since(args.days))
+    if not rows:
+        print("[INFO] Sin spans registrados para ese job")
+    for r in rows:
+        print(f"{r['phase']:<40} avg={r['avg_sec']:>8.2f}s max={r['max_sec']:>8.2f}s calls={r['calls']} runs={r['runs']}")
+    return 0
+
+
+def cmd_resources(store, args):
+    print(f"{'job':<20} {'n':>4} {'rss p50 MB':>11} {'rss p95 MB':>11} {'rss max MB':>11} {'cpu avg %':>10} {'procs':>6} {'kills':>6}")
+    shown = 0
+    for job, rs in _by_job(store.runs(since_ts=_since(args.days))).items():
+        res = [json.loads(r["metrics"] or "{}").get("resources") or {} for r in rs]
+        res = [x for x in res if x.get("samples")]
+        if not res:
+            continue
+        shown += 1
+        peaks = [x["rss_peak_mb"] for x in res]
+        print(
+            f"{job:<20} {len(res):>4} {percentile(peaks, 0.5):>11.0f} {percentile(peaks, 0.95):>11.0f} {max(peaks):>11.0f} "
+            f"{percentile([x['cpu_avg_pct'] for x in res], 0.5):>10.0f} {max(x['procs_peak'] for x in res):>6} "
+            f"{sum(bool(x.get('killed_mem_cap')) for x in res):>6}"
+        )
+    if not shown:
+        print("[INFO] Sin muestras de recursos (solo run_jobs.py las registra)")
+    return 0
+
+
+def cmd_waits(store, args):
+    # summary.waits de cada corrida (_waits.summary() vía run_stats), sumado por job + espera
+    agg = {}
+    for r in store.runs(job=args.job, since_ts=_since(args.days)):
+        waits = (json.loads(r["metrics"] or "{}").get("summary") or {}).get("waits") or {}
+        for name, w in waits.items():
+            a = agg.setdefault((r["job"], name), {"kind": w.get("kind", ""), "runs": 0, "calls": 0,
+                                                  "blocked_sec": 0.0, "budget_sec": 0.0, "dead_sec": 0.0, "timeouts": 0})
+            a["runs"] += 1
+            for k in ("calls", "blocked_sec", "budget_sec", "dead_sec", "timeouts"):
+                a[k] += w.get(k) or 0
+    if not agg:
+        print("[INFO] Sin esperas registradas (solo los scrapers que usan _waits las reportan)")
+        return 0
+
+    print(f"{'job':<16} {'espera':<30} {'tipo':<12} {'runs':>4} {'calls':>6} {'bloq s':>8} {'máx s':>8} {'muerto s':>9} {'muerto%':>8} {'t/o':>5}")
+    rows = sorted(agg.items(), key=lambda kv: -kv[1]["dead_sec"])
+    for (job, name), a in rows[:args.top]:
+        pct = 100 * a["dead_sec"] / a["blocked_sec"] if a["blocked_sec"] else 0
+        print(
+            f"{job:<16} {name:<30} {a['kind']:<12} {a['runs']:>4} {a['calls']:>6} {a['blocked_sec']:>8.1f} "
+            f"{a['budget_sec']:>8.1f} {a['dead_sec']:>9.1f} {pct:>7.0f}% {a['timeouts']:>5}"
+        )
+    return 0
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Telemetría de corridas")
+    ap.add_argument("--db", default=str(TELEMETRY_DB))
+    ap.add_argument("--days", type=int, default=30)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    sub.add_parser("summary", help="p50/p95 por job").set_defaults(fn=cmd_summary)
+
+    t = sub.add_parser("trend", help="historial de un job")
+    t.add_argument("--job", required=True)
+    t.set_defaults(fn=cmd_trend)
+
+    r = sub.add_parser("regressions", help="última corrida vs mediana de las anteriores")
+    r.add_argument("--factor", type=float, default=1.3)
+    r.add_argument("--baseline", type=int, default=7)
+    r.add_argument("--strict", action="store_true", help="exit 1 si hay regresiones")
+    r.set_defaults(fn=cmd_regressions)
+
+    p = sub.add_parser("phases", help="tiempo por fase de un job")
+    p.add_argument("--job", required=True)
+    p.set_defaults(fn=cmd_phases)
+
+    sub.add_parser("resources", help="RSS/CPU por job").set_defaults(fn=cmd_resources)
+
+    w = sub.add_parser("waits", help="tiempo bloqueado por espera vs su máximo (tiempo muerto primero)")
+    w.add_argument("--job")
+    w.add_argument("--top", type=int, default=40)
+    w.set_defaults(fn=cmd_waits)
+
+    args = ap.parse_args()
+    store = TelemetryStore(args.db)
+    try:
+        return args.fn(store, args)
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""Checkpoint por marca: un reintento retoma lo hecho y lo viejo se borra solo."""
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import _checkpoint  # noqa: E402
+from _checkpoint import Checkpoint  # noqa: E402
+
+
+def test_reintento_retoma(tmp_path):
+    cp = Checkpoint("kia", key="k", directory=tmp_path, enabled=True)
+    assert cp.resumed == 0 and not cp.done("Rio")
+    cp.mark_done("Rio", [{"version": "LX", "precio": 1}])
+    cp.mark_done("Soluto")
+
+    cp2 = Checkpoint("kia", key="k", directory=tmp_path, enabled=True)
+    assert cp2.resumed == 2 and cp2.summary() == {"checkpoint_resumed": 2}
+    assert cp2.done("Rio") and cp2.done("Soluto") and not cp2.done("Sportage")
+    assert cp2.rows("Rio") == [{"version": "LX", "precio": 1}]
+    assert cp2.completed() == ["Rio", "Soluto"]
+    assert cp2.all_rows() == [{"version": "LX", "precio": 1}]
+
+    # otra marca u otra clave (otra corrida) parten de cero
+    assert Checkpoint("mazda", key="k", directory=tmp_path, enabled=True).resumed == 0
+    assert Checkpoint("kia", key="otra", directory=tmp_path, enabled=True).resumed == 0
+
+
+def test_linea_truncada_se_ignora(tmp_path):
+    cp = Checkpoint("kia", key="k", directory=tmp_path, enabled=True)
+    cp.mark_done("Rio")
+    with cp.path.open("a", encoding="utf-8") as f:
+        f.write('{"unit": "Soluto", "ro')  # el proceso murió escribiendo
+    cp2 = Checkpoint("kia", key="k", directory=tmp_path, enabled=True)
+    assert cp2.completed() == ["Rio"]
+
+
+def test_clear(tmp_path):
+    cp = Checkpoint("kia", key="k", directory=tmp_path, enabled=True)
+    cp.mark_done("Rio")
+    cp.clear()
+    assert not cp.path.exists() and not cp.done("Rio")
+    assert Checkpoint("kia", key="k", directory=tmp_path, enabled=True).resumed == 0
+
+
+def test_apagado_no_escribe(tmp_path):
+    cp = Checkpoint("kia", key="k", directory=tmp_path, enabled=False)
+    cp.mark_done("Rio")
+    assert not cp.done("Rio") and not cp.path.exists()
+
+
+def test_prune_por_antiguedad(tmp_path):
+    viejo = tmp_path / "kia_2026-01-01.jsonl"
+    nuevo = tmp_path / "kia_2026-01-03.jsonl"
+    for p in (viejo, nuevo):
+        p.write_text('{"unit": "Rio", "rows": []}\n', encoding="utf-8")
+    hace_3_dias = time.time() - 72 * 3600
+    os.utime(viejo, (hace_3_dias, hace_3_dias))
+
+    assert _checkpoint.prune(tmp_path, max_age_hours=0) == []  # 0 = no borrar
+    assert _checkpoint.prune(tmp_path, max_age_hours=48) == [viejo]
+    assert not viejo.exists() and nuevo.exists()
+
+
+@pytest.mark.skipif(_checkpoint.MAX_AGE_HOURS <= 0, reason="CHECKPOINT_MAX_AGE_HOURS=0 apaga la poda")
+def test_crear_checkpoint_poda_los_viejos(tmp_path):
+    viejo = tmp_path / "mazda_2026-01-01.jsonl"
+    viejo.write_text('{"unit": "CX-5", "rows": []}\n', encoding="utf-8")
+    antes = time.time() - (_checkpoint.MAX_AGE_HOURS + 1) * 3600
+    os.utime(viejo, (antes, antes))
+
+    Checkpoint("kia", key="k", directory=tmp_path, enabled=True)
+    assert not viejo.exists()
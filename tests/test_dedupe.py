@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""Huellas de versiones y el índice local que comparten varios procesos (_dedupe)."""
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from _dedupe import FingerprintIndex, LocalIndexFile, fingerprint, version_key  # noqa: E402
+
+
+def test_fingerprint():
+    fp = fingerprint("Kia", "Rio", "LX", ["lista"], [12990000])
+    assert fp == fingerprint("Kia", "Rio", "LX", "lista", 12990000)  # escalar = lista de uno
+    assert fp != fingerprint("Kia", "Rio", "LX", ["lista"], [12490000])
+    assert version_key("Kia", "Rio", "LX") != version_key("Kia", "Rio", "EX")
+
+
+def test_fingerprint_index():
+    cargas = []
+
+    def loader(marca):
+        cargas.append(marca)
+        return {"k1": "fp1"}
+
+    idx = FingerprintIndex(loader)
+    assert idx.is_unchanged("Kia", "k1", "fp1")
+    assert not idx.is_unchanged("Kia", "k1", "otra")
+    idx.remember("Kia", "k1", "otra")
+    assert idx.is_unchanged("Kia", "k1", "otra")
+    assert cargas == ["Kia"]  # una carga por marca
+    assert idx.summary() == {"dedupe_unchanged": 2, "dedupe_changed": 1}
+
+
+def test_save_mezcla_con_otro_proceso(tmp_path):
+    path = tmp_path / "dedupe_index.json"
+    a = LocalIndexFile(path)
+    b = LocalIndexFile(path)
+    assert a.load("Kia") == {} and b.load("Kia") == {}  # ambos leyeron el archivo vacío
+
+    a.record("Kia", "k1", "fp-a", ts=100, doc_id="doc1")
+    b.record("Kia", "k1", "fp-b", ts=200)
+    b.record("Mazda", "k2", "fp-m", ts=150, doc_id="doc2")
+    a.save()
+    b.save()  # el último en salir no pisa lo de a
+
+    data = json.loads(path.read_text(encoding="utf-8"))
+    k1 = data["Kia"]["k1"]
+    assert k1["seen_count"] == 2                      # los conteos se suman
+    assert (k1["fingerprint"], k1["last_seen"]) == ("fp-b", 200)  # la huella más reciente gana
+    assert k1["doc_id"] == "doc1"                     # b no traía doc_id
+    assert data["Mazda"]["k2"]["doc_id"] == "doc2"
+
+    # un save más viejo no pisa la huella, pero sí suma la vista
+    a.record("Kia", "k1", "fp-vieja", ts=50)
+    a.save()
+    k1 = json.loads(path.read_text(encoding="utf-8"))["Kia"]["k1"]
+    assert (k1["fingerprint"], k1["seen_count"]) == ("fp-b", 3)
+    assert LocalIndexFile(path).load("Kia") == {"k1": "fp-b"}
+
+
+def test_save_sin_cambios_no_escribe(tmp_path):
+    path = tmp_path / "dedupe_index.json"
+    LocalIndexFile(path).save()
+    assert not path.exists()
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""Journal de escrituras: lo que no tuvo ack se reenvía en orden con replay_journal."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import _journal  # noqa: E402
+import replay_journal  # noqa: E402
+from _storage import Increment  # noqa: E402
+from _writer import BufferedWriter  # noqa: E402
+
+
+class FakeStorage:
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.rows = []
+
+    def commit(self, rows):
+        ok = [doc_id not in self.fail for _, doc_id, _, _ in rows]
+        self.rows += [r for r, x in zip(rows, ok) if x]
+        return ok
+
+
+def crashed_segment(tmp_path):
+    """Segmento de un run que murió: 3 sets, solo el 2 con ack, y una línea a medio escribir."""
+    j = _journal.WriteJournal(tmp_path, run_id="20260110-031500-1")
+    j.append("modelos", "a", {"precio": 1}, False)
+    j.append("modelos_index", "a", {"seen_count": Increment(1)}, True)
+    j.append("modelos", "a", {"precio": 2}, False)
+    j.ack([2])
+    j.sync()
+    path = j.path
+    j._f.close()  # sin close(): así queda tras un crash
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"op": "set", "seq": 4, "coll')
+    return path
+
+
+def test_read_pending(tmp_path):
+    pending = _journal.read_pending(crashed_segment(tmp_path))
+    assert [e["seq"] for e in pending] == [1, 3]
+    assert [e["data"]["precio"] for e in pending] == [1, 2]
+
+
+def test_increment_ida_y_vuelta(tmp_path):
+    j = _journal.WriteJournal(tmp_path, run_id="r")
+    j.append("modelos_index", "a", {"seen_count": Increment(3), "n": 1}, True)
+    j.close()
+    (e,) = _journal.read_pending(j.path)
+    assert isinstance(e["data"]["seen_count"], Increment) and e["data"]["seen_count"].value == 3
+    assert e["data"]["n"] == 1 and e["merge"] is True
+
+
+def test_replay_en_orden_y_borra_el_segmento(tmp_path):
+    path = crashed_segment(tmp_path)
+    storage = FakeStorage()
+    res = replay_journal.replay_segment(storage, path, chunk_size=1, dry_run=False)
+    assert res == {"segment": path.name, "pending": 2, "written": 2, "failed": 0, "owned": False}
+    assert [r[2]["precio"] for r in storage.rows] == [1, 2]  # el set posterior llega último
+    assert not path.exists()
+
+
+def test_replay_parcial_se_puede_repetir(tmp_path):
+    path = crashed_segment(tmp_path)
+    storage = FakeStorage(fail={"a"})
+    res = replay_journal.replay_segment(storage, path, chunk_size=400, dry_run=False)
+    assert (res["written"], res["failed"]) == (0, 2) and path.exists()
+
+    storage.fail.clear()
+    res = replay_journal.replay_segment(storage, path, chunk_size=400, dry_run=False)
+    assert (res["pending"], res["written"]) == (2, 2) and not path.exists()
+
+
+def test_dry_run_no_envia(tmp_path):
+    path = crashed_segment(tmp_path)
+    storage = FakeStorage()
+    res = replay_journal.replay_segment(storage, path, chunk_size=400, dry_run=True)
+    assert res["pending"] == 2 and storage.rows == [] and path.exists()
+
+
+@pytest.mark.skipif(not _journal.HAS_FCNTL, reason="sin fcntl el dueño se reconoce por pid")
+def test_replay_salta_segmento_de_un_run_vivo(tmp_path):
+    j = _journal.WriteJournal(tmp_path, run_id="vivo")
+    j.append("modelos", "a", {}, False)
+    j.sync()
+    storage = FakeStorage()
+    res = replay_journal.replay_segment(storage, j.path, chunk_size=400, dry_run=False)
+    assert res["owned"] and storage.rows == [] and j.path.exists()
+
+    j._f.close()  # el run murió: el lock se suelta con el archivo
+    j._f = None
+    res = replay_journal.replay_segment(storage, j.path, chunk_size=400, dry_run=False)
+    assert not res["owned"] and res["written"] == 1
+
+
+def test_writer_con_journal_borra_el_segmento_si_todo_se_confirma(tmp_path):
+    j = _journal.WriteJournal(tmp_path, run_id="ok")
+    writer = BufferedWriter(FakeStorage(fail={"b"}), flush_interval=60, verbose=False, journal=j)
+    writer.set("modelos", "a", {"v": 1})
+    writer.set("modelos", "b", {"v": 2})
+    writer.close()
+    # quedó "b" sin confirmar: el segmento se conserva con solo esa fila pendiente
+    assert [e["doc_id"] for e in _journal.read_pending(j.path)] == ["b"]
+
+    j2 = _journal.WriteJournal(tmp_path, run_id="todo-ok")
+    writer = BufferedWriter(FakeStorage(), flush_interval=60, verbose=False, journal=j2)
+    writer.set("modelos", "a", {"v": 1})
+    writer.close()
+    assert not j2.path.exists()
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""SavePipeline: saved_ok y las unidades se cierran recién cuando el writer confirma."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from _pipeline import SavePipeline  # noqa: E402
+from _writer import BufferedWriter  # noqa: E402
+
+
+class FakeStorage:
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+
+    def commit(self, rows):
+        return [doc_id not in self.fail for _, doc_id, _, _ in rows]
+
+
+def test_sin_flush_cuenta_al_retornar():
+    stats = {}
+    guardados = []
+
+    def save(doc_id):
+        if doc_id == "mala":
+            raise ValueError("sin precio")
+        guardados.append(doc_id)
+
+    with SavePipeline(save, stats, workers=2) as p:
+        for doc_id in ("a", "b", "mala"):
+            p.submit(doc_id)
+    assert sorted(guardados) == ["a", "b"]
+    assert stats == {"save_enqueued": 3, "saved_ok": 2, "save_errors": 1}
+
+
+def test_con_flush_cuenta_lo_que_el_writer_confirma():
+    writer = BufferedWriter(FakeStorage(fail={"mala"}), flush_interval=60, verbose=False)
+    stats = {}
+    unidades = {}
+
+    def save(doc_id, on_commit=None):
+        writer.set("modelos", doc_id, {}, on_commit=on_commit)
+
+    p = SavePipeline(save, stats, workers=2, flush=writer.flush)
+    for doc_id, unit in (("a", "Rio"), ("b", "Rio"), ("mala", "Soluto")):
+        p.submit(doc_id, unit=unit)
+    for unit in ("Rio", "Soluto"):
+        p.seal(unit, lambda errors, u=unit: unidades.__setitem__(u, errors))
+    assert stats["saved_ok"] == 0  # encolado en el writer, todavía sin commit
+    p.close()
+    assert stats == {"save_enqueued": 3, "saved_ok": 2, "save_errors": 1}
+    assert unidades == {"Rio": 0, "Soluto": 1}
+
+
+def test_save_que_explota_cuenta_una_vez():
+    writer = BufferedWriter(FakeStorage(), flush_interval=60, verbose=False)
+    stats = {}
+
+    def save(doc_id, on_commit=None):
+        writer.set("modelos", doc_id, {}, on_commit=on_commit)
+        raise RuntimeError("después de encolar")
+
+    with SavePipeline(save, stats, workers=1, flush=writer.flush) as p:
+        p.submit("a")
+    # el error se contó primero; el commit posterior de la fila no la cuenta de nuevo
+    assert stats == {"save_enqueued": 1, "saved_ok": 0, "save_errors": 1}
+
+
+def test_seal_de_unidad_sin_filas():
+    llamadas = []
+    with SavePipeline(lambda *a: None) as p:
+        p.seal("vacia", llamadas.append)
+    assert llamadas == [0]
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""Normalización de precios del store local (_prices._to_int / add_prices)."""
+import os
+import sys
+from decimal import Decimal
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import _prices  # noqa: E402
+
+
+@pytest.mark.parametrize("value, expected", [
+    (12990000, 12990000),
+    (12990000.0, 12990000),          # float leído de JSON
+    (12990000.5, 12990001),          # se redondea, no se trunca
+    (Decimal("7.5"), 8),
+    ("$ 12.990.000", 12990000),
+    ("12.990.000,5", 12990001),      # miles con "." y decimal con ","
+    ("12990000.0", 12990000),        # un solo "." sin grupos de 3 = decimal
+    ("US$ 45.900", 45900),
+    ("12.990.000.-", 12990000),
+    ("Desde $10.990.000 hasta $12.990.000", 10990000),  # el primer monto, no todos los dígitos juntos
+    ("sin precio", None),
+    ("", None),
+    (None, None),
+    (True, None),
+    (float("nan"), None),
+])
+def test_to_int(value, expected):
+    assert _prices._to_int(value) == expected
+
+
+def test_add_prices_normaliza_cada_precio(tmp_path):
+    store = _prices.PriceStore(tmp_path, run_id="test", flush_rows=10 ** 6)
+    store.enabled = True  # sin pyarrow queda apagado; acumular filas no lo necesita (solo flush)
+    store.add_prices("Kia", "Rio", "LX", ["lista", "bono"], [12990000.0, "$1.000.000"], "kia.cl", "modelos")
+    assert [r["price"] for r in store._rows] == [12990000, 1000000]
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""Logs comprimidos por bloques: índice, lectura por severidad y recuperación tras un crash."""
+import gzip
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import _runlogs  # noqa: E402
+from _runlogs import RunLog, list_logs, rebuild_index  # noqa: E402
+
+LINES = ["[INFO] modelo 1", "[WARN] sin precio", "[INFO] modelo 2", "[ERROR] timeout", "[INFO] modelo 3"]
+
+
+@pytest.fixture(autouse=True)
+def bloques_chicos(monkeypatch):
+    monkeypatch.setattr(_runlogs, "CHUNK_LINES", 2)
+    monkeypatch.setattr(_runlogs, "FLUSH_SEC", 60)
+
+
+def write_log(tmp_path, job="kia", lines=LINES, close=True):
+    log = RunLog(job, directory=tmp_path, codec="gzip")
+    for line in lines:
+        log.write_line(line)
+    if close:
+        log.close(exit_code=0)
+    return log
+
+
+def test_indice_y_lectura(tmp_path):
+    log = write_log(tmp_path)
+    (e,) = list_logs(tmp_path)
+    assert e.job == "kia" and e.index["exit_code"] == 0 and e.index["finished_at"]
+    assert e.index["lines"] == 5 and len(e.index["chunks"]) == 3
+    assert e.index["counts"] == {"error": 1, "warn": 1}
+    assert e.index["errors"] == [[4, "[ERROR] timeout"]]
+    assert [t for _, t in e.iter_lines()] == LINES
+    # solo descomprime el bloque con errores (líneas 3-4)
+    assert list(e.iter_lines("error")) == [(3, "[INFO] modelo 2"), (4, "[ERROR] timeout")]
+    # el archivo completo sigue siendo un .gz válido
+    assert gzip.decompress(log.path.read_bytes()).decode().splitlines() == LINES
+
+
+def test_frame_truncado_sin_indice(tmp_path):
+    log = write_log(tmp_path)
+    log.index_path.unlink()
+    data = log.path.read_bytes()
+    last = log.chunks[-1]
+    log.path.write_bytes(data[:last["offset"] + last["length"] // 2])  # murió escribiendo el último bloque
+
+    index = rebuild_index(log.path)
+    assert index["recovered"] and index["finished_at"] is None
+    assert index["lines"] == 4 and len(index["chunks"]) == 2
+    assert index["counts"] == {"error": 1, "warn": 1}
+    (e,) = list_logs(tmp_path)
+    assert [t for _, t in e.iter_lines()] == LINES[:4]
+
+
+def test_bloques_escritos_despues_del_ultimo_indice(tmp_path):
+    # el proceso murió entre escribir un bloque y reescribir el índice
+    log = write_log(tmp_path, lines=LINES[:4], close=False)
+    stale = log.index_path.read_text(encoding="utf-8")
+    log.write_line(LINES[4])
+    log._flush_chunk()
+    log.index_path.write_text(stale, encoding="utf-8")
+    log._f.close()
+
+    (e,) = list_logs(tmp_path)
+    assert e.index.get("recovered") and e.index["lines"] == 5
+    assert [t for _, t in e.iter_lines()] == LINES
+
+
+def test_basura_al_final_no_rompe(tmp_path):
+    log = write_log(tmp_path)
+    log.index_path.unlink()
+    with open(log.path, "ab") as f:
+        f.write(b"\x1f\x8b\x08\x00basura")
+    assert rebuild_index(log.path)["lines"] == 5
+
+
+def test_prune(tmp_path):
+    viejo = write_log(tmp_path, job="kia")
+    nuevo = write_log(tmp_path, job="mazda")
+    plano = tmp_path / "bmw-20200101-000000-attempt1.log"
+    plano.write_text("[INFO] log de antes\n", encoding="utf-8")
+
+    # el nombre lleva la hora de inicio: se renombra a una de hace 40 días
+    ts = (datetime.now() - timedelta(days=40)).strftime("%Y%m%d-%H%M%S")
+    old_base = f"kia-{ts}-attempt1"
+    viejo.path.rename(tmp_path / (old_base + ".log.gz"))
+    viejo.index_path.unlink()  # sin índice: se reconstruye con la fecha del nombre
+    hace_40_dias = time.time() - 40 * 86400
+    for p in (tmp_path / (old_base + ".log.gz"), plano):
+        os.utime(p, (hace_40_dias, hace_40_dias))
+
+    removed = _runlogs.prune(tmp_path, keep_days=30)
+    assert removed == [tmp_path / (old_base + ".log.gz")]
+    assert plano.exists() and nuevo.path.exists()  # los .log planos solo con plain=True
+    assert _runlogs.prune(tmp_path, keep_days=30, plain=True) == [plano]
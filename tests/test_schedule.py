@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""Orden LPT de los jobs según su historial (_schedule)."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from _schedule import DEFAULT_DURATION_SEC, JobHistory, order_jobs, predict_makespan  # noqa: E402
+
+
+def history(tmp_path, runs):
+    h = JobHistory(tmp_path / "job_history.json")
+    for job, durations in runs.items():
+        for d in durations:
+            ok = d > 0
+            h.record(job, abs(d), ok)  # duración negativa = corrida fallida
+    return h
+
+
+def test_mas_largo_primero(tmp_path):
+    h = history(tmp_path, {"kia": [100, 120, 110], "mazda": [600, 580], "bmw": [30]})
+    assert order_jobs(["bmw", "kia", "mazda"], h) == ["mazda", "kia", "bmw"]
+
+
+def test_empates_y_sin_historial(tmp_path):
+    # sin historial se asume el promedio de los conocidos: queda entre medio, y los empates
+    # mantienen el orden original
+    h = history(tmp_path, {"kia": [100], "mazda": [300], "bmw": [100]})
+    assert h.expected_duration("nuevo") == 500 / 3
+    assert order_jobs(["kia", "bmw", "nuevo", "mazda"], h) == ["mazda", "nuevo", "kia", "bmw"]
+    assert JobHistory(tmp_path / "vacio.json").expected_duration("x") == DEFAULT_DURATION_SEC
+
+
+def test_reintentos_adelantan_lo_que_falla(tmp_path):
+    # misma mediana, pero "derco" falla la mitad de las veces (y tarde): con reintentos va primero
+    h = history(tmp_path, {"kia": [200, 200], "derco": [200, -200]})
+    assert h.failure_rate("derco") == 0.5 and h.fail_at("derco") == 200
+    assert order_jobs(["kia", "derco"], h, retries=lambda j: 2) == ["derco", "kia"]
+
+
+def test_key_para_jobs_que_no_son_str(tmp_path):
+    h = history(tmp_path, {"a": [10], "b": [50]})
+    jobs = [{"id": "a"}, {"id": "b"}]
+    assert order_jobs(jobs, h, key=lambda j: j["id"]) == [{"id": "b"}, {"id": "a"}]
+
+
+def test_ventana_y_persistencia(tmp_path):
+    h = JobHistory(tmp_path / "job_history.json", window=3)
+    for d in (1, 2, 3, 4, 5):
+        h.record("kia", d, True)
+    h.save()
+    h2 = JobHistory(tmp_path / "job_history.json")
+    assert [r["d"] for r in h2.data["kia"]] == [3, 4, 5]
+
+
+def test_historial_ilegible_parte_de_cero(tmp_path):
+    path = tmp_path / "job_history.json"
+    path.write_text("{no es json", encoding="utf-8")
+    assert JobHistory(path).data == {}
+
+
+def test_predict_makespan():
+    assert predict_makespan([], 4) == 0.0
+    # LPT con 2 workers: 7 | 5+3 → 8; en otro orden 3+7 | 5 → 10
+    assert predict_makespan([7, 5, 3], 2) == 8
+    assert predict_makespan([3, 5, 7], 2) == 10
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""Telemetría de corridas: parseo de la salida, store SQLite y detección de regresiones."""
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from _telemetry import RESULT_PREFIX, OutputScanner, TelemetryStore, percentile, regression  # noqa: E402
+
+
+def test_output_scanner():
+    s = OutputScanner()
+    for line in [
+        "[INFO] arrancando",
+        '{"status": "partial", "saved_ok": 1}',
+        "{no es json",
+        '{"status": "ok", "saved_ok": 3}',
+        RESULT_PREFIX + json.dumps({"items": 3, "spans": {}}),
+        RESULT_PREFIX + "{roto",
+        "RUN_OK",
+    ]:
+        s.feed(line)
+    assert s.run_ok and s.summary == {"status": "ok", "saved_ok": 3}
+    assert s.result == {"items": 3, "spans": {}}  # un __RESULT__= roto no pisa el anterior
+
+
+def test_store_record_y_fases(tmp_path):
+    store = TelemetryStore(tmp_path / "telemetry.db")
+    result = {"items": 9, "errors": 1, "spans": {"scrape": {"total_sec": 10.0, "calls": 3}}}
+    store.record("r1", "orchestrator", "orq_kia.py", True, 42.5, return_code=0,
+                 summary={"models_found": 4, "saved_ok": 8}, result=result, ts=100)
+    store.record_result("r2", "run_jobs", {"job": "orq_kia", "success": False, "duration_sec": 5,
+                                           "report": {"spans": {"scrape": {"total_sec": 20.0, "calls": 1}}}})
+
+    runs = store.runs("orq_kia.py")
+    assert [r["run_id"] for r in runs] == ["r1", "r2"]
+    r1 = runs[0]
+    assert (r1["job"], r1["success"], r1["models"], r1["saved_ok"], r1["save_errors"]) == ("orq_kia", 1, 4, 8, 1)
+    assert store.runs("orq_kia", since_ts=10 ** 10) == []
+
+    (fase,) = store.phases("orq_kia")
+    assert fase["phase"] == "scrape" and fase["runs"] == 2 and fase["avg_sec"] == 15.0 and fase["calls"] == 4
+    store.close()
+
+
+def test_percentile():
+    assert percentile([], 0.5) is None
+    assert percentile([10, None, 30, 20], 0.5) == 20
+    assert percentile([10, 20], 0.95) == 19.5
+
+
+def run(d, saved=10, ok=1):
+    return {"job": "orq_kia", "duration_sec": d, "saved_ok": saved, "success": ok}
+
+
+def test_regression():
+    assert regression([run(10)]) is None
+    assert regression([run(10), run(11), run(12)]) is None
+    flags = regression([run(10), run(10), run(20, saved=2, ok=0)])["flags"]
+    assert len(flags) == 3
+    assert flags[0].startswith("duración") and flags[1].startswith("saved_ok") and flags[2] == "falló (venía OK)"
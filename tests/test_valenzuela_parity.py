@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""Mismo HTML por HTTP y por el navegador: orq_valenzuela debe dar las mismas versiones."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import _http  # noqa: E402
+
+orq_valenzuela = pytest.importorskip("orq_valenzuela")  # importa playwright al cargar
+
+# texto partido en inline / saltos de línea y una caja sin precio de lista
+HTML = """<!doctype html>
+<html><body>
+<h1 class="entry-title">NEW HONDA <span>HR-V</span></h1>
+<div id="ajax_get_car_prices_call_sample_id">
+  <div class="box-version">
+    <div class="get-car-prices-modelo">HR-V<b>EXL</b>
+      1.5 CVT</div>
+    <div class="get-car-prices-precio">$ 24.990.000</div>
+    <div class="get-car-prices-precio-all">$23.990.000</div>
+  </div>
+  <div class="box-version">
+    <div class="get-car-prices-modelo">HR-V LX 1.5 CVT</div>
+    <div class="get-car-prices-precio-convencional">$21.490.000</div>
+  </div>
+</div>
+</body></html>
+"""
+
+URL = "https://www.valenzueladelarze.cl/honda/hr-v/"
+
+BACKENDS = [b for b, ok in (("selectolax", _http.HAS_SELECTOLAX), ("lxml", _http.HAS_LXML), ("bs4", _http.HAS_BS4)) if ok]
+
+
+def por_http(monkeypatch, backend):
+    monkeypatch.setattr(_http, "HAS_SELECTOLAX", backend == "selectolax")
+    monkeypatch.setattr(_http, "HAS_LXML", backend == "lxml")
+    doc = _http.Doc(_http.parse_html(HTML), URL)
+    return orq_valenzuela.versions_from_html(doc, "HR-V")
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_http_igual_dom(monkeypatch, backend):
+    from playwright.sync_api import Error, sync_playwright
+
+    monkeypatch.setattr(orq_valenzuela, "wait_detail", lambda page, timeout_ms=0: None)
+    try:
+        with sync_playwright() as p:
+            browser = p.chromium.launch()
+            page = browser.new_page()
+            page.set_content(HTML)
+            dom = orq_valenzuela.read_versions_from_detail(page, "HR-V")
+            browser.close()
+    except Error as e:  # sin chromium instalado
+        pytest.skip(str(e))
+
+    versiones, cajas = por_http(monkeypatch, backend)
+    assert cajas == 2
+    for v in dom + versiones:  # set_content deja la página en about:blank
+        v["url_modelo"] = v["url_version"] = URL
+    assert dom == versiones
+    assert versiones[0]["version"] == "HR-V EXL 1.5 CVT"
+    assert versiones[1]["precio_lista_int"] is None
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""BufferedWriter: on_commit con el resultado real del commit, también cuando el commit falla."""
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from _writer import BufferedWriter  # noqa: E402
+
+
+class FakeStorage:
+    def __init__(self, result=True):
+        self.result = result  # True | False | Exception
+        self.batches = []
+
+    def commit(self, rows):
+        self.batches.append(list(rows))
+        if isinstance(self.result, Exception):
+            raise self.result
+        return [self.result] * len(rows)
+
+
+def make_writer(storage, **kw):
+    kw.setdefault("flush_interval", 60)
+    return BufferedWriter(storage, verbose=False, **kw)
+
+
+@pytest.mark.parametrize("result, expected", [
+    (True, True),
+    (False, False),
+    (RuntimeError("sin red"), False),  # commit que explota: cada fila avisa False
+])
+def test_on_commit_recibe_resultado(result, expected):
+    writer = make_writer(FakeStorage(result))
+    seen = []
+    writer.set("modelos", "a", {"x": 1}, on_commit=seen.append)
+    writer.set("modelos", "b", {"x": 2}, on_commit=seen.append)
+    assert seen == []  # nada hasta el commit
+    writer.flush()
+    assert seen == [expected, expected]
+    s = writer.summary()
+    assert (s["writer_written"], s["writer_failed"]) == ((2, 0) if expected else (0, 2))
+
+
+def test_commit_parcial():
+    class Partial(FakeStorage):
+        def commit(self, rows):
+            return [doc_id != "mala" for _, doc_id, _, _ in rows]
+
+    writer = make_writer(Partial())
+    seen = {}
+    for doc_id in ("buena", "mala"):
+        writer.set("modelos", doc_id, {}, on_commit=lambda ok, d=doc_id: seen.__setitem__(d, ok))
+    writer.flush()
+    assert seen == {"buena": True, "mala": False}
+
+
+def test_lo_encolado_por_un_callback_sale_en_el_mismo_flush():
+    storage = FakeStorage()
+    writer = make_writer(storage)
+    writer.set("modelos", "a", {}, on_commit=lambda ok: writer.set("modelos_index", "a", {"ok": ok}))
+    writer.flush()
+    assert [[r[1] for r in b] for b in storage.batches] == [["a"], ["a"]]
+    assert [r[0] for r in storage.batches[1]] == ["modelos_index"]
+
+
+def test_flush_espera_los_callbacks_de_un_lote_tomado_por_otro_hilo():
+    gate = threading.Event()
+    started = threading.Event()
+
+    class Slow(FakeStorage):
+        def commit(self, rows):
+            started.set()
+            gate.wait(5)
+            return super().commit(rows)
+
+    writer = make_writer(Slow())
+    seen = []
+    writer.set("modelos", "a", {}, on_commit=seen.append)
+    timer = threading.Thread(target=writer.flush)  # como el timer: se lleva el lote
+    timer.start()
+    assert started.wait(5)
+
+    done = threading.Event()
+    other = threading.Thread(target=lambda: (writer.flush(), done.set()))
+    other.start()
+    assert not done.wait(0.2)  # el lote de arriba sigue sin confirmar
+    gate.set()
+    other.join(5)
+    timer.join(5)
+    assert done.is_set() and seen == [True]
+
+
+def test_callback_que_falla_no_corta_el_flush():
+    writer = make_writer(FakeStorage())
+    seen = []
+    writer.set("modelos", "a", {}, on_commit=lambda ok: 1 / 0)
+    writer.set("modelos", "b", {}, on_commit=seen.append)
+    assert writer.flush() == 2
+    assert seen == [True]
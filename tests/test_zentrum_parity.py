@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""El camino HTTP y el del navegador de orq_zentrum deben dar los mismos registros para el mismo HTML."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import _http  # noqa: E402
+import orq_zentrum  # noqa: E402
+
+# marcado inline, &nbsp;, saltos de línea, script / comentario dentro de celdas y tabla sin <tbody>
+HTML = """<!doctype html>
+<html><head><title>T-Cross</title></head>
+<body>
+<h1>T-Cross <small>2025</small></h1>
+<table>
+  <tr><th>Versión</th><th>Precio lista sugerido</th><th>Bono directo</th><th>Precio con bono directo</th></tr>
+  <tr>
+    <td><b>T-Cross</b>Comfortline
+        1.0&nbsp;TSI<script>var x = 1;</script><!-- c --></td>
+    <td>$ 18.990.000</td><td><span>$</span> 1.000.000</td><td>$17.990.000</td>
+  </tr>
+  <tr><td>  Highline   1.4 TSI DSG </td><td>$22.490.000</td><td></td><td>$21.490.000</td></tr>
+  <tr><td></td><td></td><td></td><td></td></tr>
+</table>
+<table>
+  <thead><tr><th>Versión</th><th>Precio lista sugerido</th></tr></thead>
+  <tbody><tr><td>Trendline<br>1.6 MSI</td><td>$15.990.000</td></tr></tbody>
+</table>
+<table><tr><th>Otra cosa</th></tr><tr><td>x</td></tr></table>
+</body></html>
+"""
+
+URL = "https://www.zentrum.cl/modelo/t-cross"
+
+BACKENDS = [b for b, ok in (("selectolax", _http.HAS_SELECTOLAX), ("lxml", _http.HAS_LXML), ("bs4", _http.HAS_BS4)) if ok]
+
+
+def info():
+    return {"marca": "Volkswagen", "modelo": "", "url_modelo": URL, "precio_desde_card_int": None}
+
+
+def por_http(monkeypatch, backend):
+    monkeypatch.setattr(_http, "HAS_SELECTOLAX", backend == "selectolax")
+    monkeypatch.setattr(_http, "HAS_LXML", backend == "lxml")
+    doc = _http.Doc(_http.parse_html(HTML), URL)
+    return orq_zentrum.versiones_desde_html(doc, info())
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_http_backends(monkeypatch, backend):
+    versiones = por_http(monkeypatch, backend)
+    assert [v["version"] for v in versiones] == [
+        "T-Cross Comfortline 1.0 TSI",
+        "Highline 1.4 TSI DSG",
+        "Trendline 1.6 MSI",
+    ]
+    assert versiones[0]["modelo"] == "T-Cross 2025"
+    assert versiones[0]["precio_lista_int"] == 18990000
+    assert versiones[0]["bono_int"] == 1000000
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_http_igual_dom(monkeypatch, backend):
+    sync_api = pytest.importorskip("playwright.sync_api")
+    try:
+        with sync_api.sync_playwright() as p:
+            browser = p.chromium.launch()
+            page = browser.new_page()
+            page.set_content(HTML)
+            datos = info()
+            datos["modelo"] = orq_zentrum.safe_text(page.locator("h1"))
+            dom = []
+            for t in page.locator("table").all():
+                tabla = t.evaluate(orq_zentrum.TABLA_JS)
+                dom.extend(orq_zentrum.versiones_desde_tabla(tabla["headers"], tabla["rows"], datos))
+            browser.close()
+    except sync_api.Error as e:  # sin chromium instalado
+        pytest.skip(str(e))
+
+    assert dom == por_http(monkeypatch, backend)
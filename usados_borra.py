@@ -1,3 +1,6 @@
+# Limpieza de duplicados heredados en "usados" (documentos con id aleatorio).
+# Los guarda_* de utils ya escriben con id determinístico (origen, carID), así que
+# los avisos nuevos no se duplican y este script solo hace falta para datos antiguos.
 import firebase_admin
 from firebase_admin import credentials, firestore
 from collections import defaultdict
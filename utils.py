@@ -1,19 +1,123 @@
-import firebase_admin
-from firebase_admin import credentials
-from firebase_admin import db
-from firebase_admin import firestore
+import hashlib
+import os
+import sys
+import threading
 import time
-from marcas import marcas
+from _brands import brand_id
+import _brands
+import _network
+import _capture
+import _jobscope
 import re
 from datetime import datetime
-import unicodedata
 from zoneinfo import ZoneInfo
-from google.cloud.firestore_v1.base_query import FieldFilter
+from _storage import get_storage, Increment
+from _writer import BufferedWriter
+from _journal import WriteJournal, new_run_id
+from _prices import PriceStore
+from _lookup import ModelLookupCache
+from _dedupe import FingerprintIndex, LocalIndexFile, fingerprint, version_key
+from _text import normalize_text, normalize_many, tokenize, build_model_search_fields
 
 
-cred = credentials.Certificate('carscrapping-2225c-firebase-adminsdk-fbsvc-6abe929cb8.json')
-app = firebase_admin.initialize_app(cred)
-db = firestore.client()
+# Identifica este proceso en el journal y en el store de precios
+RUN_ID = os.getenv("RUN_ID") or new_run_id()
+
+# Backend según STORAGE_BACKEND (firestore | sqlite); se conecta recién al primer uso
+storage = get_storage()
+
+# Escrituras a "modelos" agrupadas en batches (ver _writer.py)
+writer = BufferedWriter(
+    storage,
+    batch_size=int(os.getenv("WRITER_BATCH_SIZE", "400")),
+    flush_interval=float(os.getenv("WRITER_FLUSH_SEC", "5")),
+    # journal en state/journal/ para poder reintentar con replay_journal.py si el envío falla
+    journal=WriteJournal(run_id=RUN_ID) if os.getenv("WRITE_JOURNAL", "on").lower() != "off" else None,
+)
+
+
+# Copia local de cada precio guardado (Parquet por día en data/prices/, ver prices.py)
+price_store = PriceStore(
+    os.getenv("PRICES_DIR", "data/prices"),
+    run_id=RUN_ID,
+    enabled=os.getenv("PRICE_STORE", "on").lower() != "off",
+)
+
+
+def _load_modelos_marca(marca):
+    for _, data in storage.find("modelos", {"marca": marca}, fields=["model", "categoria", "origen"]):
+        yield data
+
+
+# (marca, model) -> (categoria, origen), una query por marca y proceso
+lookup_cache = ModelLookupCache(
+    _load_modelos_marca,
+    ttl_sec=float(os.getenv("LOOKUP_TTL_SEC", "3600")),
+)
+
+
+# Índice de la última huella por versión: "remote" (colección modelos_index), "local" (state/) u "off"
+DEDUPE_INDEX = os.getenv("DEDUPE_INDEX", "remote").lower()
+INDEX_COLLECTION = "modelos_index"
+local_index = LocalIndexFile(os.getenv("DEDUPE_INDEX_PATH", "state/modelos_index.json"))
+
+
+def _load_huellas_marca(marca):
+    if DEDUPE_INDEX == "local":
+        return local_index.load(marca)
+
+    return {
+        doc_id: data.get("fingerprint")
+        for doc_id, data in storage.find(INDEX_COLLECTION, {"marca": marca}, fields=["fingerprint"])
+    }
+
+
+fingerprint_index = FingerprintIndex(_load_huellas_marca)
+
+
+def _registrar_visto(marca, datos, key, fp, ts, doc_id=None):
+    """Observación barata "visto en fecha X"; si doc_id viene, la versión cambió y apunta al doc nuevo."""
+    if DEDUPE_INDEX == "local":
+        local_index.record(marca, key, fp, ts, doc_id=doc_id)
+        return
+
+    if doc_id is None:
+        writer.set(INDEX_COLLECTION, key, {'last_seen': ts, 'seen_count': Increment(1)}, merge=True)
+    else:
+        writer.set(INDEX_COLLECTION, key, {
+            'marca': marca,
+            'model': datos['modelo'],
+            'modelDetail': datos['modelDetail'],
+            'fingerprint': fp,
+            'doc_id': doc_id,
+            'last_seen': ts,
+            'seen_count': 1,
+        })
+
+
+def _brand_id_or_raise(marca):
+    # alias / mayúsculas / acentos / typos cercanos resuelven; lo desconocido sigue siendo KeyError
+    id_marca = brand_id(marca)
+    if id_marca is None:
+        raise KeyError(marca)
+    return id_marca
+
+
+def run_stats() -> dict:
+    """Vacía el writer y devuelve sus métricas + las de cache, dedupe, marcas, red, captura, HTTP y esperas, para el summary del run."""
+    writer.flush()
+    out = {
+        **writer.summary(), **lookup_cache.summary(), **_brands.summary(),
+        **_network.summary(), **_capture.summary(), **_usados_stats(),
+    }
+    # _http / _waits solo los importan los scrapers que los usan; si no están cargados no hay nada que sumar
+    for name in ("_http", "_waits"):
+        mod = sys.modules.get(name)
+        if mod is not None:
+            out.update(mod.summary())
+    if DEDUPE_INDEX != "off":
+        out.update(fingerprint_index.summary())
+    return out
 
 
 def quitar_palabra(texto, palabra):
@@ -31,63 +135,41 @@ def quitar_palabra(texto, palabra):
     return resultado
 
 
-def normalize_text(text: str) -> str:
-    if not text:
-        return ""
+def _usados_stats() -> dict:
+    return _jobscope.current().get("usados", lambda: {"usados_url_id": 0, "usados_save_errors": 0})
 
-    # lowercase
-    text = text.lower()
 
-    # quitar acentos
-    text = unicodedata.normalize("NFD", text)
-    text = "".join(c for c in text if unicodedata.category(c) != "Mn")
+def usado_doc_id(origen, car_id, url=None):
+    """
+    Id determinístico de un aviso: el mismo (origen, carID) siempre cae en el mismo documento.
+    Sin carID usable se usa un hash de la URL del aviso; sin ninguno de los dos, None.
+    """
+    car_id = str(car_id).strip() if car_id is not None else ""
+    if car_id and car_id.lower() not in ("none", "null", "nan"):
+        return re.sub(r"[^A-Za-z0-9_.\-]", "_", f"{origen}_{car_id}")
+    if url:
+        return f"{origen}_url-{hashlib.sha1(str(url).encode('utf-8')).hexdigest()[:20]}"
+    return None
 
-    # reemplazar separadores comunes por espacio
-    text = re.sub(r"[\/\-\_]", " ", text)
 
-    # quitar todo lo que no sea alfanumérico o espacio
-    text = re.sub(r"[^a-z0-9\s]", " ", text)
+def _upsert_usado(datac):
+    # merge: re-scrapear el mismo aviso actualiza el documento en vez de duplicarlo
+    doc_id = usado_doc_id(datac['origen'], datac['carID'], datac.get('fuente'))
+    stats = _usados_stats()
+    if doc_id is None:
+        # sin id todos los avisos caerían en el mismo documento "{origen}_None"
+        stats["usados_save_errors"] += 1
+        print(f"[WARN] aviso sin carID ni URL, no se guarda: {datac.get('marca')} {datac.get('model')} {datac.get('modelDetail')}")
+        return
+    if "_url-" in doc_id:
+        stats["usados_url_id"] += 1
+    writer.set("usados", doc_id, datac, merge=True)
+    price_store.add(datac['marca'], datac['model'], datac['modelDetail'], 'usado', datac['precio'], datac['origen'], "usados")
 
-    # colapsar espacios
-    text = re.sub(r"\s+", " ", text).strip()
 
-    return text
-
-def tokenize(text: str, min_len: int = 2) -> list[str]:
-    norm = normalize_text(text)
-    tokens = norm.split(" ")
-
-    # filtrar tokens cortos / basura
-    tokens = [
-        t for t in tokens
-        if len(t) >= min_len and not t.isdigit()
-    ]
-
-    return sorted(set(tokens))
-
-
-def build_model_search_fields(model: str, model_detail: str | None = None) -> dict:
-    base = model or ""
-    detail = model_detail or ""
-
-    combined = f"{base} {detail}".strip()
-
-    norm = normalize_text(combined)
-    tokens = tokenize(combined)
-
-    return {
-        "model_norm": norm,
-        "model_tokens": tokens
-    }
-
-
-    
 def guarda_yapo(record):
      datos_b = build_model_search_fields(record['modelo'], record['titulo'])
-     try:
-          id_marca = marcas[record['marca']]
-     except:
-          id_marca = 999
+     id_marca = brand_id(record['marca'], 999)
      datac = {
           'carID': record['ad_id'],
           'model': record['modelo'],
@@ -105,17 +187,12 @@ def guarda_yapo(record):
           'model_tokens': datos_b['model_tokens'],
           'origen': 'yapo.cl'
      }
-     doc_ref = db.collection("usados").document()
      print(datac)
-     doc_id = doc_ref.id
-     doc_ref.set(datac)
+     _upsert_usado(datac)
 
 def guarda_usado(record):
      datos_b = build_model_search_fields(record['model_list'], record['model_detail'])
-     try:
-          id_marca = marcas[record['make_list']]
-     except:
-          id_marca = 999 
+     id_marca = brand_id(record['make_list'], 999)
      datac = {
           'carID': record['listing_id'],
           'model': record['model_list'],
@@ -136,17 +213,12 @@ def guarda_usado(record):
 
 
      }
-     doc_ref = db.collection("usados").document()
      print(datac)
-     doc_id = doc_ref.id
-     doc_ref.set(datac)
+     _upsert_usado(datac)
      
 def guarda_autocl(record):
     datos_b = build_model_search_fields(record['modelo'], record['version'])
-    try:
-        id_marca = marcas[record['marca']]
-    except:
-        id_marca = 999
+    id_marca = brand_id(record['marca'], 999)
     datac = {
         'carID': record['id'],
         'model': record['modelo'],
@@ -161,25 +233,17 @@ def guarda_autocl(record):
         'anio': record['año'],
         'transmision': record['transmision'],
         'model_norm': datos_b['model_norm'],
-<<<<<<< HEAD
-        'model_tokens': datos_b['model_tokens']
-=======
         'model_tokens': datos_b['model_tokens'],
         'origen': 'auto.cl'
->>>>>>> 4bbf2dc (nuevos procesos)
     }
-    doc_ref = db.collection("usados").document()
     print(datac)
-    doc_id = doc_ref.id
-    doc_ref.set(datac)
+    _upsert_usado(datac)
      
 def borrar_error():
-     col_ref = db.collection("modelos")
-     query = col_ref.where("marca", "==", "Chevrolet").stream()
      count = 0
-     for doc in query:
-          print(f"Borrando {doc.id}")
-          doc.reference.delete()
+     for doc_id, _ in storage.find("modelos", {"marca": "Chevrolet"}, fields=["marca"]):
+          print(f"Borrando {doc_id}")
+          storage.delete("modelos", doc_id)
           count += 1
 
      print(f"✅ Se eliminaron {count} documentos de Suzuki.")
@@ -191,10 +255,8 @@ def to_title_custom(texto: str) -> str:
     )
 def saveCar2(marca,datos,fuente):
     
-    id_marca = marcas[marca]
-    doc_ref = db.collection("modelos").document()
-    print(doc_ref)
-    doc_id = doc_ref.id
+    id_marca = _brand_id_or_raise(marca)
+    doc_id = storage.new_id("modelos")
     print(doc_id)
     print(datos)
     
@@ -210,15 +272,15 @@ def saveCar2(marca,datos,fuente):
     'fuente': fuente 
     }
     print(arreglo)
-    doc_ref.set(arreglo)
+    writer.set("modelos", doc_id, arreglo)
+    price_store.add_prices(marca, datos['modelo'], datos['modelDetail'], datos['tiposprecio'], datos['precio'], fuente, "modelos", ts=arreglo['date_add'])
     print(f"Guardando {marca} {datos}")
 
 
 
 
 def guardaSpecs(marca,modelo,version,datos):
-     id_marca = marcas[marca]
-     doc_ref = db.collection("especificaciones").document()
+     id_marca = _brand_id_or_raise(marca)
      arreglo = {
         'brandID': id_marca,
         'marca': marca,
@@ -227,43 +289,48 @@ def guardaSpecs(marca,modelo,version,datos):
         'specs': datos,
         'date_add':int(time.time())
      }
-     doc_ref.set(arreglo)
+     storage.set("especificaciones", storage.new_id("especificaciones"), arreglo)
 
 
-def saveCar(marca, datos, fuente):
-    
-    id_marca = marcas[marca]
-
-    # Buscar si ya existe un modelo previo con misma marca + modelo + modelDetail
-<<<<<<< HEAD
-    existing_docs = db.collection("modelos") \
-        .where("marca", "==", marca) \
-        .where("model", "==", datos['modelo']) \
-        .where("modelDetail", "==", datos['modelDetail']) \
-        .limit(1) \
-        .stream()
-=======
-    existing_docs = (
-    db.collection("modelos")
-    .where(filter=FieldFilter("marca", "==", marca))
-    .where(filter=FieldFilter("model", "==", datos['modelo']))
-    .limit(1)
-    .stream()
-    )
->>>>>>> 4bbf2dc (nuevos procesos)
-
-    # Extraer categoria y origen si existen
-    categoria = None
-    origen = None
-    for doc in existing_docs:
-        existing_data = doc.to_dict()
-        categoria = existing_data.get("categoria")
-        origen = existing_data.get("origen")
+_count_lock = threading.Lock()
+
+
+def count_saved(stats):
+    """
+    on_commit para saveCar que suma a stats["saved_ok"] / stats["save_errors"] cuando el writer
+    confirma (o rechaza) la fila. Los contadores quedan completos después de writer.flush(),
+    que run_stats() hace: armar el summary con run_stats() antes de leer stats.
+    """
+    def on_commit(ok):
+        with _count_lock:
+            stats["saved_ok" if ok else "save_errors"] += 1
+    return on_commit
+
+
+def saveCar(marca, datos, fuente, on_commit=None):
+    """on_commit(ok): cuando la fila quedó escrita (o no hacía falta escribirla); ver SavePipeline."""
+
+    id_marca = _brand_id_or_raise(marca)
+    now = int(time.time())
+    price_store.add_prices(marca, datos['modelo'], datos['modelDetail'], datos['tiposprecio'], datos['precio'], fuente, "modelos", ts=now)
+
+    # Si precio y tiposprecio no cambiaron desde la última vez, solo se registra que se vio
+    if DEDUPE_INDEX != "off":
+        key = version_key(marca, datos['modelo'], datos['modelDetail'])
+        fp = fingerprint(marca, datos['modelo'], datos['modelDetail'], datos['tiposprecio'], datos['precio'])
+        if fingerprint_index.is_unchanged(marca, key, fp):
+            _registrar_visto(marca, datos, key, fp, now)
+            print(f"Sin cambios {marca} {datos['modelo']} {datos['modelDetail']}")
+            if on_commit is not None:
+                on_commit(True)
+            return
+
+    # categoria y origen de un modelo previo con misma marca + modelo (cache por marca)
+    categoria, origen = lookup_cache.get(marca, datos['modelo'])
+    if categoria or origen:
         print(f"Datos previos encontrados → categoria: {categoria}, origen: {origen}")
-        break
 
-    doc_ref = db.collection("modelos").document()
-    doc_id = doc_ref.id
+    doc_id = storage.new_id("modelos")
 
     arreglo = {
         'carID': doc_id,
@@ -273,16 +340,25 @@ def saveCar(marca, datos, fuente):
         'marca': marca,
         'tiposprecio': datos['tiposprecio'],
         'precio': datos['precio'],
-        'date_add': int(time.time()),
+        'date_add': now,
         'fuente': fuente,
         'categoria': categoria,
         'origen': origen,
     }
 
     print(arreglo)
-    doc_ref.set(arreglo)
-<<<<<<< HEAD
-=======
+    def committed(ok):
+        # el índice apunta al doc nuevo recién cuando el doc quedó escrito; si el commit falla
+        # la próxima corrida lo ve como cambiado y lo vuelve a guardar
+        if ok and DEDUPE_INDEX != "off":
+            _registrar_visto(marca, datos, key, fp, now, doc_id=doc_id)
+        if on_commit is not None:
+            on_commit(ok)
+
+    if DEDUPE_INDEX != "off":
+        # en memoria de inmediato: una misma versión repetida en esta corrida no se duplica
+        fingerprint_index.remember(marca, key, fp)
+    writer.set("modelos", doc_id, arreglo, on_commit=committed)
     print(f"Guardando {marca} {datos}")
 
 
@@ -295,28 +371,16 @@ def convertir_date_add_a_timestamp(date_add: str) -> int:
 
 def saveCarDate(marca, datos, fuente,date_add):
     
-    id_marca = marcas[marca]
-
-        # Buscar si ya existe un modelo previo con misma marca + modelo + modelDetail
-    existing_docs = db.collection("modelos") \
-        .where("marca", "==", marca) \
-        .where("model", "==", datos['modelo']) \
-        .limit(1) \
-        .stream()
-
-        # Extraer categoria y origen si existen
-    categoria = None
-    origen = None
-    for doc in existing_docs:
-        existing_data = doc.to_dict()
-        categoria = existing_data.get("categoria")
-        origen = existing_data.get("origen")
+    id_marca = _brand_id_or_raise(marca)
+
+    # categoria y origen de un modelo previo con misma marca + modelo (cache por marca)
+    categoria, origen = lookup_cache.get(marca, datos['modelo'])
+    if categoria or origen:
         print(f"Datos previos encontrados → categoria: {categoria}, origen: {origen}")
-        break
 
-    doc_ref = db.collection("modelos").document()
-    doc_id = doc_ref.id
+    doc_id = storage.new_id("modelos")
     timestamp_date_add = convertir_date_add_a_timestamp(date_add)
+    price_store.add_prices(marca, datos['modelo'], datos['modelDetail'], datos['tiposprecio'], datos['precio'], fuente, "modelos", ts=timestamp_date_add)
 
     arreglo = {
             'carID': doc_id,
@@ -333,6 +397,5 @@ def saveCarDate(marca, datos, fuente,date_add):
         }
 
     print(arreglo)
-    doc_ref.set(arreglo)
->>>>>>> 4bbf2dc (nuevos procesos)
+    writer.set("modelos", doc_id, arreglo)
     print(f"Guardando {marca} {datos}")
\ No newline at end of file
@@ -20,12 +20,16 @@ from dataclasses import dataclass, asdict
 from datetime import datetime, timedelta
 from typing import Dict, Optional, Set, List
 from utils import guarda_yapo
+from _network import block_resources_async
+import _waits
+from _waits import selector_ready_async, sleep_async
 from playwright.async_api import async_playwright, TimeoutError as PWTimeoutError
 
 START = "https://yapo.cl/autos-usados"
 
 # Ajusta a gusto
 HEADLESS = True
+# pausas de cortesía con el sitio (no esperan nada): quedan en el perfil de _waits como sleep
 SLEEP_LIST = 0.6
 SLEEP_DETAIL = 0.4
 
@@ -509,13 +513,7 @@ async def main():
             user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7)"
         )
 
-        async def block_heavy(route):
-            r = route.request
-            if r.resource_type in ("image", "font", "media"):
-                return await route.abort()
-            await route.continue_()
-
-        await context.route("**/*", block_heavy)
+        await block_resources_async(context, "yapo")
 
         page = await context.new_page()
 
@@ -558,6 +556,8 @@ async def main():
 
                 seguidos_vistos = 0
 
+                # al volver al listado, esperar a que el aviso esté en el DOM en vez de una pausa fija
+                await selector_ready_async(page, f'a[href*="/{ad_id}"]', "yapo/aviso_en_listado", max_ms=3000)
                 detail_url = await find_detail_url_for_ad(page, ad_id)
                 if not detail_url:
                     print(f"   ⚠️ No encontré URL para ad_id={ad_id} en el listado (skip).")
@@ -568,7 +568,6 @@ async def main():
                 except PWTimeoutError:
                     print(f"   ❌ Timeout en detalle: {detail_url} (skip)")
                     await safe_goto(page, list_url, wait_css="body", timeout=60000)
-                    await asyncio.sleep(0.2)
                     continue
 
                 # Validación obligatoria: si no hay precio válido, NO guardar
@@ -577,9 +576,8 @@ async def main():
                         f"   ⚠️ SKIP sin precio válido | ad_id={ad_id} "
                         f"precio_texto={ad.precio_texto!r} precio={ad.precio} url={detail_url}"
                     )
-                    await asyncio.sleep(SLEEP_DETAIL)
+                    await sleep_async(SLEEP_DETAIL, "yapo/pausa_detalle")
                     await safe_goto(page, list_url, wait_css="body", timeout=60000)
-                    await asyncio.sleep(0.1)
                     continue
 
                 append_jsonl(out_jsonl, ad)
@@ -597,10 +595,9 @@ async def main():
                     f"precio={ad.precio} año={ad.anio} km={ad.kilometros} combustible={ad.combustible!r}"
                 )
 
-                await asyncio.sleep(SLEEP_DETAIL)
+                await sleep_async(SLEEP_DETAIL, "yapo/pausa_detalle")
 
                 await safe_goto(page, list_url, wait_css="body", timeout=60000)
-                await asyncio.sleep(0.1)
 
                 if MAX_ADS_TOTAL is not None and total_new >= MAX_ADS_TOTAL:
                     print("\n🛑 Corte por MAX_ADS_TOTAL")
@@ -610,7 +607,7 @@ async def main():
             if corte_total:
                 break
 
-            await asyncio.sleep(SLEEP_LIST)
+            await sleep_async(SLEEP_LIST, "yapo/pausa_listado")
 
         await context.close()
         await browser.close()
@@ -618,6 +615,7 @@ async def main():
     print(f"\n✅ Terminado. Avisos nuevos guardados hoy: {total_new}")
     print(f"📁 JSONL: {out_jsonl}")
     print(f"📁 CSV : {out_csv}")
+    print(f"⏱️ Esperas: {json.dumps(_waits.summary(), ensure_ascii=False)}")
 
 
 if __name__ == "__main__":